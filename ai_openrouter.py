@@ -1,14 +1,31 @@
 # ai_openrouter.py
+import asyncio
 import os
+import time
+from typing import Dict, Optional, Tuple
+
+import httpx
 import requests
 
+from result_cache import CacheLRU
+
 API_KEY = os.getenv("OPENROUTER_API_KEY")
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_URL = os.getenv("OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions")
 MODEL = "openai/gpt-4o-mini"
 
+# Cliente async: pedidos simultáneos al modelo, caché de respuestas y timeout
+OPENROUTER_MAX_CONCURRENCY = int(os.getenv("OPENROUTER_MAX_CONCURRENCY", "4"))
+OPENROUTER_CACHE_TTL = float(os.getenv("OPENROUTER_CACHE_TTL", "600"))
+OPENROUTER_CACHE_MAX_ENTRIES = int(os.getenv("OPENROUTER_CACHE_MAX_ENTRIES", "256"))
+OPENROUTER_TIMEOUT = float(os.getenv("OPENROUTER_TIMEOUT", "60"))
+
+MENSAJE_SIN_API_KEY = "No hay API Key configurada para OpenRouter."
+MENSAJE_RESPUESTA_INVALIDA = "La consulta es demasiado grande o inválida, o hubo un problema con el modelo."
+MENSAJE_NO_INTERPRETABLE = "No se pudo interpretar la respuesta del modelo."
+
 def ask_openrouter(system_prompt: str, user_prompt: str) -> str:
     if not API_KEY:
-        return "No hay API Key configurada para OpenRouter."
+        return MENSAJE_SIN_API_KEY
 
     payload = {
         "model": MODEL,
@@ -30,10 +47,138 @@ def ask_openrouter(system_prompt: str, user_prompt: str) -> str:
 
     if resp.status_code != 200:
         print("OpenRouter error:", resp.status_code, resp.text)
-        return "La consulta es demasiado grande o inválida, o hubo un problema con el modelo."
+        return MENSAJE_RESPUESTA_INVALIDA
 
     data = resp.json()
     try:
         return data["choices"][0]["message"]["content"]
     except Exception:
-        return "No se pudo interpretar la respuesta del modelo."
+        return MENSAJE_NO_INTERPRETABLE
+
+
+# ============================================================
+# CLIENTE ASYNC (POOL + SEMÁFORO + SINGLE-FLIGHT + CACHÉ)
+# ============================================================
+
+class ErrorOpenRouter(Exception):
+    """
+    Falla de un pedido; el mensaje es el texto que se le devuelve al usuario.
+    """
+
+
+class ClienteOpenRouter:
+    """
+    Cliente async para usar desde la app sin bloquear el event loop:
+    - Un httpx.AsyncClient persistente (conexiones keep-alive reutilizadas).
+    - Un semáforo que limita los pedidos simultáneos al modelo.
+    - Pedidos idénticos en vuelo comparten una sola llamada.
+    - Caché LRU con TTL por (modelo, system, prompt); solo respuestas válidas.
+    """
+
+    def __init__(self, url: str = OPENROUTER_URL, api_key: Optional[str] = API_KEY,
+                 modelo: str = MODEL,
+                 max_concurrencia: int = OPENROUTER_MAX_CONCURRENCY,
+                 ttl: float = OPENROUTER_CACHE_TTL,
+                 max_entradas: int = OPENROUTER_CACHE_MAX_ENTRIES,
+                 timeout: float = OPENROUTER_TIMEOUT):
+        self.url = url
+        self.api_key = api_key
+        self.modelo = modelo
+        self.max_concurrencia = max(max_concurrencia, 1)
+        self.ttl = ttl
+        self.timeout = timeout
+        self._cache = CacheLRU(max_entradas=max_entradas, tamano=lambda v: len(v[1]))
+        self._http: Optional[httpx.AsyncClient] = None
+        self._semaforo: Optional[asyncio.Semaphore] = None
+        self._en_vuelo: Dict[Tuple[str, str, str], asyncio.Future] = {}
+        self._stats = {"pedidos": 0, "llamadas": 0, "compartidas": 0, "errores": 0}
+
+    def _cliente(self) -> httpx.AsyncClient:
+        # Se crea dentro del event loop que lo usa
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrencia,
+                    max_keepalive_connections=self.max_concurrencia,
+                ),
+                headers={"Authorization": f"Bearer {self.api_key}"},
+            )
+            self._semaforo = asyncio.Semaphore(self.max_concurrencia)
+        return self._http
+
+    async def _llamar(self, modelo: str, system_prompt: str, user_prompt: str) -> str:
+        payload = {
+            "model": modelo,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+        }
+
+        http = self._cliente()
+        async with self._semaforo:
+            self._stats["llamadas"] += 1
+            try:
+                resp = await http.post(self.url, json=payload)
+            except httpx.HTTPError as e:
+                raise ErrorOpenRouter(f"Error de conexión con OpenRouter: {e}")
+
+        if resp.status_code != 200:
+            print("OpenRouter error:", resp.status_code, resp.text)
+            raise ErrorOpenRouter(MENSAJE_RESPUESTA_INVALIDA)
+
+        try:
+            return resp.json()["choices"][0]["message"]["content"]
+        except Exception:
+            raise ErrorOpenRouter(MENSAJE_NO_INTERPRETABLE)
+
+    async def preguntar(self, system_prompt: str, user_prompt: str, modelo: Optional[str] = None) -> str:
+        """
+        Mismo contrato que ask_openrouter: devuelve el texto del modelo o un
+        mensaje de error para el usuario (los errores no se cachean).
+        """
+        if not self.api_key:
+            return MENSAJE_SIN_API_KEY
+
+        self._stats["pedidos"] += 1
+        clave = (modelo or self.modelo, system_prompt, user_prompt)
+
+        # Una entrada vencida cuenta como fallo, no como acierto
+        guardado = self._cache.obtener(clave, vigente=lambda v: v[0] > time.monotonic())
+        if guardado is not None:
+            return guardado[1]
+
+        tarea = self._en_vuelo.get(clave)
+        if tarea is not None:
+            self._stats["compartidas"] += 1
+        else:
+            tarea = self._en_vuelo[clave] = asyncio.ensure_future(self._resolver(clave))
+            tarea.add_done_callback(lambda _: self._en_vuelo.pop(clave, None))
+
+        # shield: si se cancela un request, la llamada compartida sigue
+        return await asyncio.shield(tarea)
+
+    async def _resolver(self, clave: Tuple[str, str, str]) -> str:
+        try:
+            texto = await self._llamar(*clave)
+        except ErrorOpenRouter as e:
+            self._stats["errores"] += 1
+            return str(e)
+        self._cache.guardar(clave, (time.monotonic() + self.ttl, texto))
+        return texto
+
+    async def cerrar(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            self._semaforo = None
+
+    def estadisticas(self) -> Dict[str, object]:
+        return {**self._stats, "cache": self._cache.estadisticas()}
+
+
+cliente_openrouter = ClienteOpenRouter()
+
+async def ask_openrouter_async(system_prompt: str, user_prompt: str) -> str:
+    return await cliente_openrouter.preguntar(system_prompt, user_prompt)
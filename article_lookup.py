@@ -0,0 +1,138 @@
+import copy
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from query_phrases import normalizar
+from snapshot import Snapshot
+from stock_schema import codigos_texto, como_texto
+
+# Talles con letras, en el orden en que se muestran (después de los numéricos)
+ORDEN_TALLES_LETRA = ["XXS", "XS", "S", "M", "L", "XL", "XXL", "XXXL", "U"]
+
+# ============================================================
+# NORMALIZACIÓN
+# ============================================================
+
+def _clave_codigo(codigo: Any) -> str:
+    # "123-45", "123/45" y "12345" son el mismo código
+    return normalizar(codigo).replace(" ", "")
+
+
+def _orden_talle(talle: str):
+    try:
+        return (0, float(talle.replace(",", ".")), talle)
+    except ValueError:
+        pass
+    if talle.upper() in ORDEN_TALLES_LETRA:
+        return (1, ORDEN_TALLES_LETRA.index(talle.upper()), talle)
+    return (2, 0, talle)
+
+# ============================================================
+# FICHAS DE ARTÍCULO
+# ============================================================
+
+def _fichas(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """
+    Una ficha por artículo (clave: código normalizado) con lo que necesita
+    la respuesta por voz: descripción, stock total, talles con stock
+    (sumando los colores) y precio de lista.
+    """
+    ids, codigos = pd.factorize(df["Artículo"])
+    validas = ids >= 0
+    if not validas.any():
+        return {}
+    ids = ids[validas]
+    n = len(codigos)
+
+    cantidades = pd.to_numeric(df["Cantidad"], errors="coerce").fillna(0).astype(int).to_numpy()[validas]
+    precios = pd.to_numeric(df["LISTA1"], errors="coerce").fillna(0).astype(float).to_numpy()[validas]
+
+    stock_total = np.bincount(ids, weights=cantidades, minlength=n).astype(np.int64)
+    precio_publico = np.zeros(n)
+    np.maximum.at(precio_publico, ids, precios)
+
+    _, primeras = np.unique(ids, return_index=True)
+    descripciones = como_texto(df["Descripción"], np.flatnonzero(validas)[primeras])
+
+    # Stock por (artículo, talle): se suman los colores y quedan los positivos
+    tids, talles = codigos_texto(df["Talle"])
+    tids = tids[validas]
+    pares, inversa = np.unique(ids.astype(np.int64) * len(talles) + tids, return_inverse=True)
+    stock_par = np.bincount(inversa, weights=cantidades)
+    con_stock = stock_par > 0
+    talles_por_articulo: Dict[int, List[str]] = {}
+    for par in pares[con_stock].tolist():
+        talles_por_articulo.setdefault(par // len(talles), []).append(str(talles[par % len(talles)]))
+
+    fichas: Dict[str, Dict[str, Any]] = {}
+    for i, codigo in enumerate(codigos):
+        clave = _clave_codigo(codigo)
+        if not clave or clave in fichas:
+            continue
+        fichas[clave] = {
+            "codigo": str(codigo),
+            "descripcion": str(descripciones[i]),
+            "stock_total": int(stock_total[i]),
+            "talles": sorted(talles_por_articulo.get(i, []), key=_orden_talle),
+            "precio_publico": float(precio_publico[i]) or None,
+        }
+    return fichas
+
+
+class FichasArticulos:
+    """
+    Índice hash del snapshot para responder preguntas sobre un artículo
+    puntual: código normalizado -> ficha precalculada, y descripción
+    normalizada -> código. Una búsqueda son unos pocos accesos a dict, sin
+    recorrer el dataframe.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.por_codigo = _fichas(df)
+
+        self.por_descripcion: Dict[str, str] = {}
+        for clave in sorted(self.por_codigo):
+            descripcion = normalizar(self.por_codigo[clave]["descripcion"])
+            if descripcion:
+                self.por_descripcion.setdefault(descripcion, clave)
+        self.max_palabras = max((d.count(" ") + 1 for d in self.por_descripcion), default=0)
+
+    def parchear(self, df: pd.DataFrame, cambios) -> Optional["FichasArticulos"]:
+        """
+        Para un snapshot donde solo cambiaron stock y precios: recalcula las
+        fichas de los artículos con filas actualizadas y comparte el resto.
+        """
+        if not cambios.parcheable():
+            return None
+
+        nuevo = copy.copy(self)
+        nuevo.por_codigo = dict(self.por_codigo)
+        if len(cambios.actualizadas):
+            afectados = df["Artículo"].iloc[cambios.actualizadas].unique()
+            nuevo.por_codigo.update(_fichas(df[df["Artículo"].isin(afectados)]))
+        return nuevo
+
+    def buscar(self, pregunta: str) -> Optional[Dict[str, Any]]:
+        """
+        Ficha del artículo mencionado en la pregunta: primero por código
+        (cualquier palabra de la pregunta) y si no, por la descripción más
+        larga contenida en la pregunta.
+        """
+        for palabra in str(pregunta).split():
+            ficha = self.por_codigo.get(_clave_codigo(palabra))
+            if ficha is not None:
+                return ficha
+
+        palabras = normalizar(pregunta).split()
+        for largo in range(min(len(palabras), self.max_palabras), 0, -1):
+            for i in range(len(palabras) - largo + 1):
+                clave = self.por_descripcion.get(" ".join(palabras[i:i + largo]))
+                if clave is not None:
+                    return self.por_codigo[clave]
+        return None
+
+
+def fichas_articulos(snap: Snapshot) -> FichasArticulos:
+    return snap.derivado("fichas_articulos", lambda s: FichasArticulos(s.df))
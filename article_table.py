@@ -0,0 +1,270 @@
+import copy
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from snapshot import Snapshot
+from snapshot_cache import cargar_arrays, guardar_arrays
+from stock_schema import codigos_texto
+
+# ============================================================
+# TABLA DE ARTÍCULOS PRE-AGRUPADA
+# ============================================================
+
+def _codigos_ordenados(serie: pd.Series) -> Tuple[np.ndarray, int]:
+    """
+    Códigos de la columna numerados según el orden de los valores (-1 para
+    los faltantes) y cuántos valores distintos hay. Con las categóricas del
+    snapshot son directamente sus códigos: las categorías están ordenadas.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype) and serie.cat.categories.is_monotonic_increasing:
+        return serie.cat.codes.to_numpy(), len(serie.cat.categories)
+    codigos, valores = pd.factorize(serie, sort=True)
+    return codigos, len(valores)
+
+
+def _grupos(articulos: pd.Series, descripciones: pd.Series) -> np.ndarray:
+    """
+    Número de grupo (Artículo, Descripción) de cada fila, igual que
+    df.groupby([...], sort=True).ngroup() pero combinando códigos enteros;
+    -1 si alguna de las dos es nula.
+    """
+    a, _ = _codigos_ordenados(articulos)
+    d, n_d = _codigos_ordenados(descripciones)
+    grupo = np.full(len(a), -1, dtype=np.int64)
+    validas = (a >= 0) & (d >= 0)
+    if validas.any():
+        clave = a[validas].astype(np.int64) * max(n_d, 1) + d[validas]
+        _, grupo[validas] = np.unique(clave, return_inverse=True)
+    return grupo
+
+
+# Columnas por fila (en el orden de la tabla) y por grupo que se guardan
+# como códigos enteros sobre una tabla de textos distintos
+_POR_FILA = {"talle": "Talle", "marca": "Marca", "rubro": "Rubro", "color": "Color"}
+_POR_GRUPO = {"codigo": "Artículo", "descripcion": "Descripción"}
+
+_ARRAYS = ("orden", "grupo_fila", "inicios", "cantidades", "precios", "valorizado", "precio_ref")
+
+
+def _codigos_compactos(serie: pd.Series, posiciones: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Códigos de texto de la columna en `posiciones`, en el entero más chico
+    que alcanza, y la tabla de textos (el último es "nan", los faltantes).
+    """
+    codigos, textos = codigos_texto(serie)
+    return codigos[posiciones].astype(np.min_scalar_type(len(textos) - 1)), textos
+
+
+def _tabla_textos(valores: List[str]) -> np.ndarray:
+    textos = np.empty(len(valores), dtype=object)
+    textos[:] = valores
+    return textos
+
+
+class TablaArticulos:
+    """
+    Las filas del snapshot ordenadas por artículo (Artículo + Descripción),
+    con cantidades y precios ya convertidos y los totales de cada grupo
+    precalculados. Una consulta solo elige filas y corta rangos.
+
+    Los textos no se guardan por fila: cada columna es un array de códigos
+    más la tabla de sus valores distintos, y los strings se buscan recién al
+    armar la respuesta. Así la tabla son solo arrays numéricos, que se pueden
+    guardar junto al snapshot compartido y mapear desde cada worker.
+
+    El orden de los grupos y de los talles dentro de cada grupo es el
+    mismo que daba df.groupby(["Artículo", "Descripción"]).
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        grupo = _grupos(df["Artículo"], df["Descripción"])
+
+        # Filas con clave nula quedan afuera, como en groupby
+        validas = np.flatnonzero(grupo >= 0)
+        self.orden = validas[np.argsort(grupo[validas], kind="stable")]
+        self.grupo_fila = grupo[self.orden]
+        self.n_grupos = int(self.grupo_fila[-1]) + 1 if len(self.orden) else 0
+
+        self.inicios = np.searchsorted(self.grupo_fila, np.arange(self.n_grupos + 1))
+
+        cantidades = pd.to_numeric(df["Cantidad"], errors="coerce").fillna(0).astype(int)
+        precios = pd.to_numeric(df["LISTA1"], errors="coerce").fillna(0).astype(float)
+        self.cantidades = cantidades.to_numpy()[self.orden]
+        self.precios = precios.to_numpy()[self.orden]
+
+        # Marca, rubro y color se toman de la primera fila elegida del grupo
+        self.codigos: Dict[str, np.ndarray] = {}
+        self.textos: Dict[str, np.ndarray] = {}
+        for nombre, col in _POR_FILA.items():
+            self.codigos[nombre], self.textos[nombre] = _codigos_compactos(df[col], self.orden)
+
+        primeras = self.orden[self.inicios[:-1]]
+        for nombre, col in _POR_GRUPO.items():
+            self.codigos[nombre], self.textos[nombre] = _codigos_compactos(df[col], primeras)
+
+        self.valorizado, self.precio_ref = self._totales(np.arange(len(self.orden)))
+        self._mayusculas: Dict[str, np.ndarray] = {}
+
+    # ------------------------------------------------------------
+    # Persistencia junto al snapshot
+    # ------------------------------------------------------------
+
+    def guardar(self, carpeta: str) -> None:
+        arrays = {nombre: getattr(self, nombre) for nombre in _ARRAYS}
+        arrays.update({f"cod_{nombre}": codigos for nombre, codigos in self.codigos.items()})
+        datos = {
+            "n_grupos": self.n_grupos,
+            "textos": {nombre: textos.tolist() for nombre, textos in self.textos.items()},
+        }
+        guardar_arrays(carpeta, arrays, datos)
+
+    @classmethod
+    def cargar(cls, carpeta: str) -> "TablaArticulos":
+        """
+        Tabla guardada con guardar(): los arrays quedan mapeados (solo
+        lectura) y compartidos con los demás procesos que lean la carpeta.
+        """
+        arrays, datos = cargar_arrays(carpeta)
+        tabla = cls.__new__(cls)
+        for nombre in _ARRAYS:
+            setattr(tabla, nombre, arrays[nombre])
+        tabla.n_grupos = int(datos["n_grupos"])
+        tabla.codigos = {nombre: arrays[f"cod_{nombre}"] for nombre in datos["textos"]}
+        tabla.textos = {nombre: _tabla_textos(valores) for nombre, valores in datos["textos"].items()}
+        tabla._mayusculas = {}
+        return tabla
+
+    def parchear(self, df: pd.DataFrame, cambios) -> Optional["TablaArticulos"]:
+        """
+        Copia de la tabla para un df con las mismas filas en el mismo orden
+        donde solo cambiaron Cantidad/precios en `cambios.actualizadas`.
+        Recalcula los totales solo de los grupos afectados.
+        """
+        if not cambios.parcheable():
+            return None
+
+        nueva = copy.copy(self)
+        nueva.cantidades = np.array(self.cantidades)
+        nueva.precios = np.array(self.precios)
+        nueva.valorizado = np.array(self.valorizado)
+        nueva.precio_ref = np.array(self.precio_ref)
+
+        filas = cambios.actualizadas
+        posicion = np.full(len(df), -1, dtype=np.int64)
+        posicion[self.orden] = np.arange(len(self.orden))
+        en_tabla = posicion[filas] >= 0
+        filas, posiciones = filas[en_tabla], posicion[filas][en_tabla]
+        if len(posiciones) == 0:
+            return nueva
+
+        sub = df.iloc[filas]
+        nueva.cantidades[posiciones] = pd.to_numeric(sub["Cantidad"], errors="coerce").fillna(0).astype(int).to_numpy()
+        nueva.precios[posiciones] = pd.to_numeric(sub["LISTA1"], errors="coerce").fillna(0).astype(float).to_numpy()
+
+        grupos = np.unique(self.grupo_fila[posiciones])
+        afectadas = np.concatenate([
+            np.arange(self.inicios[g], self.inicios[g + 1]) for g in grupos.tolist()
+        ])
+        nueva.valorizado[grupos], nueva.precio_ref[grupos] = nueva._totales(afectadas)
+        return nueva
+
+    def _totales(self, posiciones: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Valorizado y precio de referencia por grupo, sobre las posiciones dadas
+        (ya ordenadas por grupo). El precio de referencia es el precio común
+        del grupo, o 0 si los talles tienen precios distintos.
+        """
+        if len(posiciones) == 0:
+            return np.empty(0), np.empty(0)
+
+        grupos = self.grupo_fila[posiciones]
+        cortes = np.flatnonzero(np.r_[True, grupos[1:] != grupos[:-1]])
+
+        cant = self.cantidades[posiciones]
+        precios = self.precios[posiciones]
+
+        valorizado = np.add.reduceat(cant * precios, cortes).astype(float)
+        minimo = np.minimum.reduceat(precios, cortes)
+        maximo = np.maximum.reduceat(precios, cortes)
+        precio_ref = np.where(minimo == maximo, precios[cortes], 0.0)
+        return valorizado, precio_ref
+
+    def grupos_de(self, seleccion: np.ndarray) -> np.ndarray:
+        """
+        Grupos que tienen al menos una posición seleccionada.
+        """
+        return np.unique(self.grupo_fila[seleccion])
+
+    def _mayuscula(self, nombre: str) -> np.ndarray:
+        # Tabla de textos en mayúsculas, armada una vez por proceso
+        tabla = self._mayusculas.get(nombre)
+        if tabla is None:
+            tabla = self._mayusculas.setdefault(
+                nombre, _tabla_textos([t.upper() for t in self.textos[nombre]])
+            )
+        return tabla
+
+    def grupos_con_pregunta(self, grupos: np.ndarray, pregunta: str) -> np.ndarray:
+        """
+        Los `grupos` cuyo código es exactamente `pregunta` (ya en mayúsculas)
+        o, si no hay ninguno, cuya descripción la contiene como texto
+        literal (nunca se compila como regex).
+        """
+        exactos = grupos[self._mayuscula("codigo")[self.codigos["codigo"][grupos]] == pregunta]
+        if len(exactos):
+            return exactos
+
+        # Se busca una vez por descripción distinta, no por grupo
+        contiene = pd.Series(self._mayuscula("descripcion"), dtype=object).str.contains(
+            pregunta, na=False, regex=False
+        ).to_numpy(dtype=bool)
+        return grupos[contiene[self.codigos["descripcion"][grupos]]]
+
+    def _texto(self, nombre: str, indices: np.ndarray) -> List[str]:
+        return self.textos[nombre][self.codigos[nombre][indices]].tolist()
+
+    def articulos(self, seleccion: np.ndarray) -> Iterator[tuple]:
+        """
+        Recorre los artículos con alguna posición seleccionada (máscara en el
+        orden de la tabla) y devuelve
+        (codigo, descripcion, marca, rubro, color, precio, valorizado, talles).
+        """
+        if seleccion.all():
+            posiciones = np.arange(len(self.orden))
+            grupos = np.arange(self.n_grupos)
+            valorizado, precio_ref = self.valorizado, self.precio_ref
+            limites = self.inicios
+        else:
+            posiciones = np.flatnonzero(seleccion)
+            if len(posiciones) == 0:
+                return
+            g = self.grupo_fila[posiciones]
+            cortes = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+            grupos = g[cortes]
+            valorizado, precio_ref = self._totales(posiciones)
+            limites = np.r_[cortes, len(posiciones)]
+
+        primeras = posiciones[limites[:-1]]
+        filas = zip(
+            self._texto("codigo", grupos),
+            self._texto("descripcion", grupos),
+            self._texto("marca", primeras),
+            self._texto("rubro", primeras),
+            self._texto("color", primeras),
+            precio_ref.tolist(),
+            valorizado.tolist(),
+        )
+
+        cantidades = self.cantidades[posiciones].tolist()
+        talles = self._texto("talle", posiciones)
+        limites = limites.tolist()
+
+        for i, fila in enumerate(filas):
+            a, b = limites[i], limites[i + 1]
+            yield fila + (list(zip(talles[a:b], cantidades[a:b])),)
+
+
+def tabla_articulos(snap: Snapshot) -> TablaArticulos:
+    return snap.derivado("tabla_articulos", lambda s: TablaArticulos(s.df))
@@ -0,0 +1,94 @@
+"""
+Compara el catálogo completo (un solo documento JSON) con el streaming por
+lotes (NDJSON y JSON en partes): tiempo hasta la primera parte, tiempo
+total y pico de memoria reservada (tracemalloc). Verifica además que los
+tres den las mismas filas y el mismo resumen.
+
+    python -m benchmarks.bench_catalog_stream --rows 100000 1000000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from benchmarks.synthetic import ConfigSintetica, generar_xlsx
+from catalog import (
+    FORMATO_JSON,
+    FORMATO_NDJSON,
+    VARIANTE_ADMIN,
+    VARIANTE_PUBLICA,
+    construir_items,
+    construir_resumen,
+    stream_catalogo,
+)
+from excel_reader import leer_stock_xlsx
+from snapshot import Snapshot
+
+
+def medir(partes) -> dict:
+    """
+    Consume las partes sin guardarlas (como un cliente que las va leyendo).
+    """
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    primera = None
+    total = 0
+    for parte in partes():
+        if primera is None:
+            primera = time.perf_counter() - t0
+        total += len(parte)
+    segundos = time.perf_counter() - t0
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "primera_parte_segundos": round(primera or segundos, 4),
+        "segundos": round(segundos, 4),
+        "bytes": total,
+        "pico_memoria_mb": round(pico / 1e6, 1),
+    }
+
+
+def completo(snap: Snapshot, variante: str):
+    yield json.dumps(
+        {"items": construir_items(snap.df, variante), "resumen": construir_resumen(snap)},
+        ensure_ascii=False, separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def verificar(snap: Snapshot, variante: str, lote: int) -> None:
+    esperado = json.loads(b"".join(completo(snap, variante)))
+
+    en_partes = json.loads(b"".join(stream_catalogo(snap, variante, FORMATO_JSON, lote)))
+    assert en_partes == esperado
+
+    lineas = b"".join(stream_catalogo(snap, variante, FORMATO_NDJSON, lote)).decode("utf-8").splitlines()
+    assert json.loads(lineas[0]) == {"resumen": esperado["resumen"]}
+    assert [json.loads(l) for l in lineas[1:]] == esperado["items"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--lote", type=int, default=5000)
+    args = parser.parse_args()
+
+    resultados = []
+    for filas in args.rows:
+        df, _ = leer_stock_xlsx(generar_xlsx(ConfigSintetica(filas=filas)))
+        snap = Snapshot(df=df, version=f"bench-{filas}", file_id="bench", file_name="bench.xlsx")
+
+        for variante in (VARIANTE_ADMIN, VARIANTE_PUBLICA):
+            verificar(snap, variante, 997)
+
+        resultados.append({
+            "filas": filas,
+            "completo": medir(lambda: completo(snap, VARIANTE_PUBLICA)),
+            "ndjson": medir(lambda: stream_catalogo(snap, VARIANTE_PUBLICA, FORMATO_NDJSON, args.lote)),
+            "json_en_partes": medir(lambda: stream_catalogo(snap, VARIANTE_PUBLICA, FORMATO_JSON, args.lote)),
+        })
+
+    print(json.dumps(resultados, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Compara el lector streaming (excel_reader.leer_stock_xlsx) contra la ruta
+anterior con pd.read_excel sobre un Excel sintético.
+
+    python -m benchmarks.bench_excel_reader --rows 200000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from benchmarks.synthetic import ConfigSintetica, generar_xlsx
+from excel_reader import _leer_con_pandas, leer_stock_xlsx
+
+
+def medir(fn, contenido: bytes, memoria: bool) -> dict:
+    if memoria:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    fn(contenido)
+    segundos = time.perf_counter() - t0
+    pico = None
+    if memoria:
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {"segundos": round(segundos, 3), "pico_bytes": pico}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--memoria", action="store_true", help="mide el pico con tracemalloc (más lento)")
+    args = parser.parse_args()
+
+    contenido = generar_xlsx(ConfigSintetica(filas=args.rows))
+
+    resultado = {
+        "filas": args.rows,
+        "bytes_xlsx": len(contenido),
+        "pandas": medir(_leer_con_pandas, contenido, args.memoria),
+        "streaming": medir(leer_stock_xlsx, contenido, args.memoria),
+    }
+    print(json.dumps(resultado, indent=2))
+
+
+if __name__ == "__main__":
+    main()
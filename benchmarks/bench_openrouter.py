@@ -0,0 +1,77 @@
+"""
+Mide el cliente async de OpenRouter contra el stub local: pedidos
+idénticos simultáneos, repetidos desde la caché, distintos con el
+semáforo y errores. Los chequeos de cada escenario están en
+tests/test_openrouter.py.
+
+    python -m benchmarks.bench_openrouter --latencia 0.2 --concurrencia 4
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from ai_openrouter import ClienteOpenRouter
+from benchmarks.openrouter_stub import iniciar_stub
+
+
+async def _medir(cliente: ClienteOpenRouter, prompts):
+    t0 = time.perf_counter()
+    respuestas = await asyncio.gather(*(cliente.preguntar("system", p) for p in prompts))
+    return respuestas, round(time.perf_counter() - t0, 4)
+
+
+async def escenarios(url: str, registro, args) -> dict:
+    cliente = ClienteOpenRouter(url=url, api_key="stub", max_concurrencia=args.concurrencia, ttl=60)
+    resultado = {}
+
+    try:
+        registro.reiniciar()
+        _, segundos = await _medir(cliente, ["hola"] * args.pedidos)
+        resultado["identicos_simultaneos"] = {
+            "pedidos": args.pedidos, "llamadas": len(registro.llamadas), "segundos": segundos,
+        }
+
+        registro.reiniciar()
+        _, segundos = await _medir(cliente, ["hola"] * args.pedidos)
+        resultado["desde_cache"] = {"pedidos": args.pedidos, "llamadas": len(registro.llamadas), "segundos": segundos}
+
+        registro.reiniciar()
+        distintos = [f"prompt {i}" for i in range(args.pedidos)]
+        _, segundos = await _medir(cliente, distintos)
+        resultado["distintos"] = {
+            "pedidos": args.pedidos,
+            "llamadas": len(registro.llamadas),
+            "pico_simultaneas": registro.pico,
+            "segundos": segundos,
+            "segundos_ideal": round(-(-args.pedidos // args.concurrencia) * args.latencia, 4),
+        }
+
+        registro.reiniciar()
+        for _ in range(2):
+            await cliente.preguntar("system", "ERROR500")
+        resultado["errores_sin_cache"] = {"pedidos": 2, "llamadas": len(registro.llamadas)}
+
+        resultado["cliente"] = cliente.estadisticas()
+    finally:
+        await cliente.cerrar()
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latencia", type=float, default=0.2)
+    parser.add_argument("--concurrencia", type=int, default=4)
+    parser.add_argument("--pedidos", type=int, default=40)
+    args = parser.parse_args()
+
+    servidor, url, registro = iniciar_stub(args.latencia)
+    try:
+        resultado = asyncio.run(escenarios(url, registro, args))
+    finally:
+        servidor.shutdown()
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compara el analizador de frases (query_phrases) con la implementación
+anterior de clasificar_intencion e Indexer._clean_query (búsqueda de
+substrings y str.replace frase por frase) sobre un corpus de consultas
+reales, y lista las consultas donde el resultado cambia. También mide
+las dos con la tabla de frases vacías agrandada (--frases-extra), donde la
+implementación anterior crece con la cantidad de frases.
+
+    python -m benchmarks.bench_query_phrases --repeticiones 200 --frases-extra 500
+"""
+import argparse
+import json
+import os
+import re
+import unicodedata
+
+from benchmarks.bench_stock import cronometrar
+from query_phrases import FRASES_VACIAS, SINONIMOS, AnalizadorConsulta, analizador
+
+CORPUS = os.path.join(os.path.dirname(__file__), "frases_consulta.txt")
+
+
+def _normalize(text):
+    text = str(text).lower()
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    text = re.sub(r"[^a-z0-9 ]", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+
+def intencion_anterior(pregunta):
+    p = pregunta.lower()
+    if any(x in p for x in ["stock", "hay de", "talle", "talles", "disponible", "disponibilidad"]):
+        return "consulta_stock"
+    if any(x in p for x in ["precio", "cuanto sale", "lista", "vale", "publico", "costo"]):
+        return "consulta_precio"
+    return "general"
+
+
+def limpiar_anterior(q, frases=FRASES_VACIAS):
+    q = _normalize(q)
+    for phrase in frases:
+        q = q.replace(phrase, "")
+    return " ".join(SINONIMOS.get(w, w) for w in q.split()).strip()
+
+
+def anterior(frases, vacias=FRASES_VACIAS):
+    return [(intencion_anterior(f), limpiar_anterior(f, vacias)) for f in frases]
+
+
+def nuevo(frases, analizador=analizador):
+    return [(a.intencion, a.limpio) for a in map(analizador.analizar, frases)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--frases-extra", type=int, default=500)
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        frases = [linea.strip() for linea in f if linea.strip()]
+
+    diferencias = [
+        {"consulta": frase, "anterior": a, "nuevo": n}
+        for frase, a, n in zip(frases, anterior(frases), nuevo(frases))
+        if a != n
+    ]
+    informe = {
+        "consultas": len(frases),
+        "anterior": cronometrar(lambda: anterior(frases), args.repeticiones),
+        "nuevo": cronometrar(lambda: nuevo(frases), args.repeticiones),
+        "diferencias": diferencias,
+    }
+
+    if args.frases_extra:
+        vacias = FRASES_VACIAS + [f"relleno {i}" for i in range(args.frases_extra)]
+        grande = AnalizadorConsulta(frases_vacias=vacias)
+        informe["con_frases_extra"] = {
+            "frases_vacias": len(vacias),
+            "anterior": cronometrar(lambda: anterior(frases, vacias), args.repeticiones),
+            "nuevo": cronometrar(lambda: nuevo(frases, grande), args.repeticiones),
+        }
+    print(json.dumps(informe, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
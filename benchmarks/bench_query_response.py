@@ -0,0 +1,88 @@
+"""
+Compara el armado de la respuesta de /query con modelos pydantic
+(ItemResponse/TalleItem + QueryResponse.model_dump + JSONResponse) contra
+la ruta rápida de dicts planos y json.dumps por lotes. Verifica además que
+los dos cuerpos sean idénticos byte a byte.
+
+    python -m benchmarks.bench_query_response --rows 10000 100000
+"""
+import argparse
+import json
+import os
+
+os.environ["SNAPSHOT_CACHE_DIR"] = ""
+
+from fastapi.responses import JSONResponse
+
+from benchmarks.bench_stock import cronometrar
+from benchmarks.synthetic import ConfigSintetica, generar_xlsx
+from article_table import tabla_articulos
+from excel_reader import leer_stock_xlsx
+from query_response import enmascarar, items_de_tabla, serializar_items
+from snapshot import Snapshot
+import main
+
+
+def ruta_pydantic(tabla, seleccion, admin: bool) -> bytes:
+    items = [
+        main.ItemResponse.model_construct(
+            codigo=codigo,
+            descripcion=descripcion,
+            marca=marca,
+            rubro=rubro,
+            color=color,
+            precio=precio,
+            valorizado=valorizado,
+            talles=[main.TalleItem.model_construct(talle=t, stock=s) for t, s in talles],
+        )
+        for codigo, descripcion, marca, rubro, color, precio, valorizado, talles
+        in tabla.articulos(seleccion)
+    ]
+    if not admin:
+        items = [item.model_copy(update={"valorizado": 0.0}) for item in items]
+    return JSONResponse(main.QueryResponse(items=items).model_dump(mode="json")).body
+
+
+def ruta_rapida(tabla, seleccion, admin: bool) -> bytes:
+    items = items_de_tabla(tabla, seleccion)
+    if not admin:
+        items = enmascarar(items)
+    return serializar_items(items)
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    resultados = []
+    for filas in args.rows:
+        df, _ = leer_stock_xlsx(generar_xlsx(ConfigSintetica(filas=filas)))
+        snap = Snapshot(df=df, version=f"bench:{filas}", file_id="bench", file_name="bench.xlsx", modified_time="")
+        tabla = tabla_articulos(snap)
+
+        for nombre, filtros in (("sin_filtros", {}), ("marca", {"marca": "NIKE"})):
+            seleccion = main.mascara_filtros(snap, filtros)[tabla.orden]
+            for admin in (True, False):
+                esperado = ruta_pydantic(tabla, seleccion, admin)
+                obtenido = ruta_rapida(tabla, seleccion, admin)
+                assert obtenido == esperado, f"Cuerpos distintos ({filas} filas, {nombre}, admin={admin})"
+
+                antes = cronometrar(lambda: ruta_pydantic(tabla, seleccion, admin), args.repeticiones)
+                despues = cronometrar(lambda: ruta_rapida(tabla, seleccion, admin), args.repeticiones)
+                resultados.append({
+                    "filas": filas,
+                    "filtros": nombre,
+                    "admin": admin,
+                    "bytes": len(esperado),
+                    "pydantic": antes,
+                    "rapida": despues,
+                    "mejora": round(antes["min"] / despues["min"], 2),
+                })
+
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == "__main__":
+    main_bench()
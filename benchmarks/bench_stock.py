@@ -0,0 +1,157 @@
+"""
+Micro-benchmarks de las rutas calientes sobre planillas sintéticas:
+load_excel_smart (contra un Drive falso), aplicar_filtros_globales,
+procesar, el armado de filas de /catalog e Indexer (construcción y query),
+más la memoria por columna del snapshot.
+
+    python -m benchmarks.bench_stock --rows 10000 100000 1000000 --salida bench.json
+
+El JSON incluye el commit para comparar regresiones entre versiones.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from typing import Any, Callable, Dict, List
+
+# Sin caché en disco: cada tamaño se descarga y parsea de verdad
+os.environ["SNAPSHOT_CACHE_DIR"] = ""
+os.environ["SHARED_SNAPSHOT_DIR"] = ""
+
+from benchmarks.synthetic import ConfigSintetica, generar_xlsx
+from drive_service import FakeDriveClient, configurar_cliente
+from catalog import VARIANTE_ADMIN, VARIANTE_PUBLICA, construir_items
+from indexer import Indexer
+from stock_schema import memoria_por_columna
+import main
+
+FILTROS = {
+    "sin_filtros": {},
+    "marca": {"marca": "NIKE"},
+    "rubro_talle": {"rubro": "CALZADO", "talleDesde": 38, "talleHasta": 42},
+    "pregunta": {"question": "RUNNING"},
+    "codigo": {"question": "A0000042"},
+}
+
+PREGUNTAS = [
+    "zapatillas nike",
+    "buzo",
+    "camiseta azul 40",
+    "mostrame que hay de adidas running",
+    "xyz inexistente",
+]
+
+
+def cronometrar(fn: Callable[[], Any], repeticiones: int) -> Dict[str, float]:
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        fn()
+        tiempos.append(time.perf_counter() - t0)
+    return {
+        "min": round(min(tiempos), 6),
+        "mediana": round(statistics.median(tiempos), 6),
+        "repeticiones": repeticiones,
+    }
+
+
+def _commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except Exception:
+        return ""
+
+
+def medir_tamano(drive: FakeDriveClient, cfg: ConfigSintetica, n: int, repeticiones: int) -> dict:
+    t0 = time.perf_counter()
+    contenido = generar_xlsx(cfg)
+    generado = time.perf_counter() - t0
+
+    # Cada tamaño es un archivo más nuevo: load_excel_smart lo toma como versión nueva
+    drive.agregar_archivo(
+        f"bench-{cfg.filas}", f"stock_{cfg.filas}.xlsx", contenido,
+        modified_time=f"2099-01-01T00:00:{n:02d}.000Z",
+    )
+
+    resultado: Dict[str, Any] = {
+        "filas": cfg.filas,
+        "bytes_xlsx": len(contenido),
+        "generacion_segundos": round(generado, 3),
+        # Incluye el diff contra el snapshot del tamaño anterior
+        "load_excel_smart": cronometrar(main.load_excel_smart, 1),
+        "load_excel_smart_sin_cambios": cronometrar(main.load_excel_smart, repeticiones),
+    }
+    snap = main.snapshots.actual()
+    resultado["memoria_columnas"] = memoria_por_columna(snap.df)
+
+    resultado["aplicar_filtros_globales"] = {
+        nombre: cronometrar(lambda f=f: main.aplicar_filtros_globales(snap, f), repeticiones)
+        for nombre, f in FILTROS.items()
+    }
+    resultado["procesar"] = {
+        nombre: cronometrar(lambda f=f: main.procesar(snap, f), repeticiones)
+        for nombre, f in FILTROS.items()
+    }
+    resultado["catalogo_items"] = {
+        variante: cronometrar(lambda v=variante: construir_items(snap.df, v), repeticiones)
+        for variante in (VARIANTE_ADMIN, VARIANTE_PUBLICA)
+    }
+
+    indexer: List[Indexer] = []
+    resultado["indexer_init"] = cronometrar(lambda: indexer.append(Indexer(snap.df)), 1)
+    resultado["indexer_query"] = {
+        q: cronometrar(lambda q=q: indexer[0].query(q), repeticiones)
+        for q in PREGUNTAS
+    }
+    return resultado
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--marcas", type=int, default=6)
+    parser.add_argument("--rubros", type=int, default=5)
+    parser.add_argument("--talles", type=int, default=11)
+    parser.add_argument("--negativos", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--salida", default="", help="archivo JSON (por defecto, stdout)")
+    args = parser.parse_args()
+
+    drive = FakeDriveClient()
+    configurar_cliente(drive)
+
+    resultados = []
+    for n, filas in enumerate(args.rows):
+        cfg = ConfigSintetica(
+            filas=filas, marcas=args.marcas, rubros=args.rubros, talles=args.talles,
+            negativos=args.negativos, seed=args.seed,
+        )
+        print(f">>> Benchmark con {filas} filas")
+        resultados.append(medir_tamano(drive, cfg, n, args.repeticiones))
+
+    informe = {
+        "commit": _commit(),
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "maquina": platform.machine(),
+        "resultados": resultados,
+    }
+
+    texto = json.dumps(informe, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto)
+        print(f">>> Resultados en {args.salida}")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main_bench()
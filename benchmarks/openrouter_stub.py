@@ -0,0 +1,96 @@
+"""
+Servidor local que imita /api/v1/chat/completions de OpenRouter, para
+probar y medir ai_openrouter sin salir a internet. Registra cada llamada
+(prompt y duración) y el pico de llamadas simultáneas.
+
+    python -m benchmarks.openrouter_stub --port 8765 --latencia 0.2
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+
+class RegistroStub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.llamadas: List[Dict[str, Any]] = []
+        self.activas = 0
+        self.pico = 0
+
+    def entrar(self) -> None:
+        with self._lock:
+            self.activas += 1
+            self.pico = max(self.pico, self.activas)
+
+    def salir(self, prompt: str, segundos: float, estado: int) -> None:
+        with self._lock:
+            self.activas -= 1
+            self.llamadas.append({"prompt": prompt, "segundos": round(segundos, 4), "estado": estado})
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self.llamadas = []
+            self.pico = self.activas
+
+
+def _handler(registro: RegistroStub, latencia: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            inicio = time.perf_counter()
+            registro.entrar()
+            largo = int(self.headers.get("Content-Length") or 0)
+            cuerpo = json.loads(self.rfile.read(largo) or b"{}")
+            prompt = cuerpo.get("messages", [{}])[-1].get("content", "")
+
+            time.sleep(latencia)
+
+            # Un prompt con "ERROR500" simula una falla del modelo
+            if "ERROR500" in prompt:
+                estado, respuesta = 500, {"error": "stub"}
+            else:
+                estado, respuesta = 200, {"choices": [{"message": {"content": f"eco: {prompt}"}}]}
+
+            datos = json.dumps(respuesta).encode("utf-8")
+            self.send_response(estado)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(datos)))
+            self.end_headers()
+            self.wfile.write(datos)
+            registro.salir(prompt, time.perf_counter() - inicio, estado)
+
+    return Handler
+
+
+def iniciar_stub(latencia: float = 0.1, port: int = 0) -> Tuple[ThreadingHTTPServer, str, RegistroStub]:
+    """
+    Levanta el stub en un hilo. Devuelve (servidor, url, registro);
+    se detiene con servidor.shutdown().
+    """
+    registro = RegistroStub()
+    servidor = ThreadingHTTPServer(("127.0.0.1", port), _handler(registro, latencia))
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_address[1]}/api/v1/chat/completions"
+    return servidor, url, registro
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latencia", type=float, default=0.2)
+    args = parser.parse_args()
+
+    servidor, url, _ = iniciar_stub(args.latencia, args.port)
+    print(f">>> Stub de OpenRouter en {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
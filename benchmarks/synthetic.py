@@ -0,0 +1,174 @@
+"""
+Generador de planillas de stock sintéticas con el formato de 9 columnas
+que espera load_excel_smart (Marca, Rubro, Artículo, Descripción, Color,
+Talle, Cantidad, LISTA1, Valorizado LISTA1).
+
+Escribe el .xlsx a mano (shared strings + una hoja), porque openpyxl tarda
+minutos en generar un millón de filas.
+"""
+import io
+import random
+import zipfile
+from dataclasses import dataclass
+from typing import Iterator, List
+from xml.sax.saxutils import escape
+
+from excel_reader import COLUMNAS_STOCK
+
+MARCAS = [
+    "NIKE", "ADIDAS", "PUMA", "TOPPER", "FILA", "REEBOK", "UMBRO", "KAPPA",
+    "NEW BALANCE", "ASICS", "DIADORA", "LE COQ SPORTIF", "MIZUNO", "ATHIX",
+]
+RUBROS = [
+    "CALZADO", "CAMISETA", "BALON", "BUZO", "OJOTAS", "SANDALIA", "GORRA",
+    "CAMPERA", "SHORT", "MEDIAS", "BOLSO", "PANTALON",
+]
+MODELOS = [
+    "RUNNING", "TRAINING", "URBANA", "FUTBOL", "TENIS", "BASKET", "HOODIE",
+    "DRY FIT", "CLASSIC", "PRO", "AIR", "ELASTICA", "TECH", "RETRO",
+]
+COLORES = ["NEGRO", "BLANCO", "AZUL", "ROJO", "GRIS", "VERDE", "ROSA", "MARINO"]
+TALLES = [
+    "34", "35", "36", "37", "38", "39", "40", "41", "42", "43", "44", "45",
+    "XS", "S", "M", "L", "XL", "XXL", "U",
+]
+PRECIOS = [4999.0, 9999.0, 15999.5, 24999.0, 45999.0, 89999.0]
+
+
+@dataclass
+class ConfigSintetica:
+    filas: int = 10_000
+    marcas: int = 6
+    rubros: int = 5
+    talles: int = 11
+    colores: int = 4
+    talles_por_articulo: int = 6
+    negativos: float = 0.05
+    seed: int = 1
+
+
+def generar_filas(cfg: ConfigSintetica) -> Iterator[list]:
+    """
+    Filas de stock: cada artículo tiene una descripción fija, un precio y
+    varias combinaciones de color y talle (sin repetir la clave
+    Artículo + Color + Talle). Una fracción `negativos` tiene stock negativo.
+    """
+    rnd = random.Random(cfg.seed)
+    marcas = MARCAS[:max(cfg.marcas, 1)]
+    rubros = RUBROS[:max(cfg.rubros, 1)]
+    colores = COLORES[:max(cfg.colores, 1)]
+    talles = TALLES[:max(cfg.talles, 1)]
+    por_articulo = max(1, min(cfg.talles_por_articulo, len(talles)))
+
+    emitidas = 0
+    articulo = 0
+    while emitidas < cfg.filas:
+        codigo = f"A{articulo:07d}"
+        marca = rnd.choice(marcas)
+        rubro = rnd.choice(rubros)
+        descripcion = f"{rubro} {rnd.choice(MODELOS)} {marca} {articulo % 97}"
+        precio = rnd.choice(PRECIOS)
+        articulo += 1
+
+        for color in rnd.sample(colores, rnd.randint(1, len(colores))):
+            for talle in rnd.sample(talles, por_articulo):
+                if emitidas >= cfg.filas:
+                    return
+                if rnd.random() < cfg.negativos:
+                    cantidad = -rnd.randint(1, 3)
+                else:
+                    cantidad = rnd.randint(0, 20)
+                # Como en el Excel real, los talles numéricos son celdas numéricas
+                valor_talle = int(talle) if talle.isdigit() else talle
+                yield [marca, rubro, codigo, descripcion, color, valor_talle, cantidad, precio, cantidad * precio]
+                emitidas += 1
+
+# ============================================================
+# ESCRITURA DEL XLSX
+# ============================================================
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Stock" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>'
+    '</Relationships>'
+)
+
+
+def _numero(v) -> str:
+    return repr(v) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+
+def _xml_hoja(filas: Iterator[list], textos: dict) -> Iterator[str]:
+    def indice(texto: str) -> int:
+        i = textos.get(texto)
+        if i is None:
+            i = textos[texto] = len(textos)
+        return i
+
+    yield (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+    )
+    for r, fila in enumerate(filas, start=1):
+        celdas: List[str] = []
+        for v in fila:
+            if isinstance(v, str):
+                celdas.append(f'<c t="s"><v>{indice(v)}</v></c>')
+            else:
+                celdas.append(f'<c><v>{_numero(v)}</v></c>')
+        yield f'<row r="{r}">{"".join(celdas)}</row>'
+    yield '</sheetData></worksheet>'
+
+
+def generar_xlsx(cfg: ConfigSintetica) -> bytes:
+    """
+    Planilla .xlsx con encabezado COLUMNAS_STOCK y `cfg.filas` filas.
+    """
+    def con_encabezado():
+        yield list(COLUMNAS_STOCK)
+        yield from generar_filas(cfg)
+
+    textos: dict = {}
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        z.writestr("_rels/.rels", _RELS)
+        z.writestr("xl/workbook.xml", _WORKBOOK)
+        z.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+
+        with z.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as hoja:
+            for parte in _xml_hoja(con_encabezado(), textos):
+                hoja.write(parte.encode("utf-8"))
+
+        sst = "".join(f"<si><t>{escape(t)}</t></si>" for t in textos)
+        z.writestr(
+            "xl/sharedStrings.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="{len(textos)}" '
+            f'uniqueCount="{len(textos)}">{sst}</sst>',
+        )
+    return buffer.getvalue()
@@ -0,0 +1,280 @@
+import gzip
+import hashlib
+import os
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from json_body import codificar_json, serializar_json
+from snapshot import Snapshot
+from stock_schema import codigos_texto, como_texto
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+# Filas por lote en el catálogo por streaming
+CATALOG_STREAM_BATCH = int(os.getenv("CATALOG_STREAM_BATCH", "5000"))
+
+# ============================================================
+# VARIANTES POR ROL
+# ============================================================
+
+VARIANTE_ADMIN = "admin"
+VARIANTE_PUBLICA = "publico"
+
+_CLAVES_ITEM = (
+    "marca",
+    "rubro",
+    "codigo",
+    "descripcion",
+    "color",
+    "talle",
+    "stock",
+    "precio",
+    "valorizado",
+)
+
+_COLUMNAS_TEXTO = ("Marca", "Rubro", "Artículo", "Descripción", "Color", "Talle")
+
+
+def variante_para_rol(role: str) -> str:
+    return VARIANTE_ADMIN if role == "admin" else VARIANTE_PUBLICA
+
+# ============================================================
+# ARMADO DEL CATÁLOGO
+# ============================================================
+
+def construir_resumen(snap: Snapshot) -> Dict[str, Any]:
+    df = snap.df
+    return {
+        "archivo": snap.file_name or "No informado",
+        "fecha": "Automático",
+        "marcas": int(df["Marca"].nunique()),
+        "rubros": int(df["Rubro"].nunique()),
+        "articulos": len(df),
+        "stock_total": int(df["Cantidad"].sum()),
+        "stock_negativo": int((df["Cantidad"] < 0).sum()),
+    }
+
+
+def _columna_texto(serie: pd.Series) -> List[str]:
+    # Categóricas: un str por categoría, no por fila. Los faltantes salen
+    # como "nan", igual que str(valor) en el endpoint original
+    return como_texto(serie).tolist()
+
+
+def _columna_numero(serie: pd.Series) -> pd.Series:
+    return pd.to_numeric(serie, errors="coerce").fillna(0)
+
+
+def construir_items(df: pd.DataFrame, variante: str,
+                    textos: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, Any]]:
+    """
+    Filas del catálogo armadas por columnas (sin iterrows).
+    La variante pública informa valorizado en 0. `textos` trae las columnas
+    de texto ya convertidas para estas filas; si no, se convierten acá.
+    """
+    if textos is None:
+        textos = {col: _columna_texto(df[col]) for col in _COLUMNAS_TEXTO}
+
+    stock = _columna_numero(df["Cantidad"]).astype(int).tolist()
+    precio = _columna_numero(df["LISTA1"]).astype(float).tolist()
+
+    if variante == VARIANTE_ADMIN:
+        valorizado = _columna_numero(df["Valorizado LISTA1"]).astype(float).tolist()
+    else:
+        valorizado = [0.0] * len(df)
+
+    columnas = (
+        textos["Marca"],
+        textos["Rubro"],
+        textos["Artículo"],
+        textos["Descripción"],
+        textos["Color"],
+        textos["Talle"],
+        stock,
+        precio,
+        valorizado,
+    )
+    return [dict(zip(_CLAVES_ITEM, fila)) for fila in zip(*columnas)]
+
+# ============================================================
+# CUERPOS PRE-SERIALIZADOS POR SNAPSHOT
+# ============================================================
+
+def etag_catalogo(snap: Snapshot, variante: str, formato: str = "", comprimido: bool = False) -> str:
+    # El cuerpo gzip y el sin comprimir son representaciones distintas:
+    # cada una lleva su propio ETag fuerte
+    digest = hashlib.sha1(snap.version.encode("utf-8")).hexdigest()[:20]
+    sufijo = f"-{formato}" if formato else ""
+    if comprimido:
+        sufijo += "-gz"
+    return f'"{digest}-{variante}{sufijo}"'
+
+
+def coincide_etag(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidato in if_none_match.split(","):
+        candidato = candidato.strip()
+        if candidato == "*":
+            return True
+        if candidato.startswith("W/"):
+            candidato = candidato[2:]
+        if candidato == etag:
+            return True
+    return False
+
+
+def _cuerpo_catalogo(snap: Snapshot, variante: str) -> bytes:
+    return serializar_json({
+        "items": construir_items(snap.df, variante),
+        "resumen": construir_resumen(snap),
+    })
+
+
+def catalogo_serializado(snap: Snapshot, variante: str, comprimido: bool = False) -> bytes:
+    """
+    Cuerpo JSON de /catalog para la variante, calculado una vez por snapshot.
+    Con `comprimido` devuelve además la versión gzip (también cacheada).
+    """
+    cuerpo = snap.derivado(f"catalogo:{variante}", lambda s: _cuerpo_catalogo(s, variante))
+
+    if not comprimido:
+        return cuerpo
+
+    return snap.derivado(
+        f"catalogo:{variante}:gzip",
+        lambda s: gzip.compress(cuerpo, compresslevel=6),
+    )
+
+# ============================================================
+# CUERPOS EN DISCO, JUNTO AL SNAPSHOT COMPARTIDO
+# ============================================================
+
+def _archivo_catalogo(carpeta: str, variante: str, comprimido: bool) -> str:
+    return os.path.join(carpeta, f"{variante}.json.gz" if comprimido else f"{variante}.json")
+
+
+def escribir_catalogos(snap: Snapshot, carpeta: str) -> None:
+    """
+    Escribe en `carpeta` los cuerpos de /catalog de cada variante, con y
+    sin gzip. No quedan en la memoria del proceso: los workers los sirven
+    desde el archivo.
+    """
+    for variante in (VARIANTE_ADMIN, VARIANTE_PUBLICA):
+        cuerpo = _cuerpo_catalogo(snap, variante)
+        with open(_archivo_catalogo(carpeta, variante, False), "wb") as f:
+            f.write(cuerpo)
+        with open(_archivo_catalogo(carpeta, variante, True), "wb") as f:
+            f.write(gzip.compress(cuerpo, compresslevel=6))
+
+
+def abrir_catalogo(carpeta: Optional[str], variante: str, comprimido: bool) -> Optional[BinaryIO]:
+    """
+    Cuerpo de /catalog escrito con escribir_catalogos, ya abierto (así sigue
+    legible aunque la entrada se borre al publicarse otra versión), o None.
+    """
+    if carpeta is None:
+        return None
+    try:
+        return open(_archivo_catalogo(carpeta, variante, comprimido), "rb")
+    except OSError:
+        return None
+
+
+def partes_archivo(archivo: BinaryIO, tamano: int = 256 * 1024) -> Iterator[bytes]:
+    with archivo:
+        while True:
+            parte = archivo.read(tamano)
+            if not parte:
+                return
+            yield parte
+
+# ============================================================
+# CATÁLOGO POR STREAMING
+# ============================================================
+
+FORMATO_NDJSON = "ndjson"
+FORMATO_JSON = "json"
+
+MEDIA_TYPES_STREAM = {
+    FORMATO_NDJSON: "application/x-ndjson",
+    FORMATO_JSON: "application/json",
+}
+
+def formato_stream(accept: Optional[str], stream: Optional[str]) -> Optional[str]:
+    """
+    Formato de streaming pedido por el cliente, o None para el catálogo
+    completo de siempre. `?stream=ndjson|json` (o 1/true, que es json)
+    tiene prioridad sobre el header Accept (application/x-ndjson o
+    application/ndjson).
+    """
+    if stream is not None:
+        valor = stream.strip().lower()
+        if valor == FORMATO_NDJSON:
+            return FORMATO_NDJSON
+        if valor in (FORMATO_JSON, "1", "true", "si"):
+            return FORMATO_JSON
+        if valor in ("", "0", "false", "no"):
+            return None
+        raise ValueError(f"stream debe ser 'ndjson' o 'json', no '{stream}'")
+
+    accept = (accept or "").lower()
+    if "application/x-ndjson" in accept or "application/ndjson" in accept:
+        return FORMATO_NDJSON
+    return None
+
+
+def tablas_texto(snap: Snapshot) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    (códigos, textos) de cada columna de texto del catálogo, armados una
+    vez por snapshot: cada lote solo indexa la tabla con sus códigos.
+    """
+    return snap.derivado(
+        "catalogo:textos",
+        lambda s: {col: codigos_texto(s.df[col]) for col in _COLUMNAS_TEXTO},
+    )
+
+
+def lotes_items(snap: Snapshot, variante: str, lote: int = CATALOG_STREAM_BATCH) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Filas del catálogo de a `lote`, armadas (y enmascaradas según la
+    variante) recién cuando se piden.
+    """
+    lote = max(lote, 1)
+    df = snap.df
+    tablas = tablas_texto(snap)
+    for inicio in range(0, len(df), lote):
+        fin = inicio + lote
+        textos = {col: valores[codigos[inicio:fin]].tolist() for col, (codigos, valores) in tablas.items()}
+        yield construir_items(df.iloc[inicio:fin], variante, textos)
+
+
+def stream_catalogo(snap: Snapshot, variante: str, formato: str,
+                    lote: int = CATALOG_STREAM_BATCH) -> Iterator[bytes]:
+    """
+    Cuerpo de /catalog en partes, con el resumen primero y las filas
+    después, un lote por parte. En memoria hay un solo lote a la vez.
+
+    - ndjson: una línea {"resumen": ...} y después una línea por fila.
+    - json: el mismo documento que el catálogo completo,
+      {"resumen": {...}, "items": [...]}, enviado en partes.
+    """
+    resumen = construir_resumen(snap)
+
+    if formato == FORMATO_NDJSON:
+        yield serializar_json({"resumen": resumen}) + b"\n"
+        for items in lotes_items(snap, variante, lote):
+            yield "".join(codificar_json(item) + "\n" for item in items).encode("utf-8")
+        return
+
+    yield b'{"resumen":' + serializar_json(resumen) + b',"items":['
+    separador = b""
+    for items in lotes_items(snap, variante, lote):
+        if items:
+            yield separador + serializar_json(items)[1:-1]
+            separador = b","
+    yield b"]}"
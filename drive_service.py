@@ -1,10 +1,17 @@
+import io
 import os
 import json
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Optional
 
+import httplib2
 from google.oauth2 import service_account
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaIoBaseDownload
+
+from metrics import medir_etapa
 
 
 # ============================================================
@@ -50,40 +57,70 @@ def _ensure_service_account_file() -> str:
 
 
 # ============================================================
-# CLIENTE DE GOOGLE DRIVE
+# CLIENTE DE GOOGLE DRIVE (REUTILIZABLE)
 # ============================================================
 
-def _get_drive_service():
+DRIVE_SCOPES = ["https://www.googleapis.com/auth/drive.readonly"]
+
+
+class DriveClient:
     """
-    Inicializa el cliente de Google Drive usando el service account.
+    Cliente de Google Drive de larga vida.
+    - Las credenciales y el servicio (discovery) se arman una sola vez.
+    - El token se refresca solo cuando vence (lo hace AuthorizedHttp).
+    - Cada hilo usa su propio transporte HTTP, porque httplib2 no es thread-safe.
     """
-    try:
-        credentials_path = _ensure_service_account_file()
 
-        scopes = ["https://www.googleapis.com/auth/drive.readonly"]
-        credentials = service_account.Credentials.from_service_account_file(
-            credentials_path,
-            scopes=scopes,
-        )
+    def __init__(self, scopes: Optional[List[str]] = None):
+        self._scopes = scopes or DRIVE_SCOPES
+        self._lock = threading.Lock()
+        self._credentials = None
+        self._service = None
+        self._local = threading.local()
+        self._stats = {"builds": 0, "conexiones": 0, "reusos": 0}
 
-        service = build("drive", "v3", credentials=credentials)
-        return service
+    def _get_service(self):
+        if self._service is not None:
+            return self._service
 
-    except Exception as e:
-        print(">>> ERROR al inicializar Google Drive service:", repr(e))
-        raise RuntimeError("No se pudo inicializar el cliente de Google Drive")
+        with self._lock:
+            if self._service is None:
+                try:
+                    credentials_path = _ensure_service_account_file()
+                    self._credentials = service_account.Credentials.from_service_account_file(
+                        credentials_path,
+                        scopes=self._scopes,
+                    )
+                    self._service = build(
+                        "drive", "v3",
+                        credentials=self._credentials,
+                        cache_discovery=False,
+                    )
+                    self._stats["builds"] += 1
+                    print(">>> Cliente de Google Drive inicializado")
+                except Exception as e:
+                    print(">>> ERROR al inicializar Google Drive service:", repr(e))
+                    raise RuntimeError("No se pudo inicializar el cliente de Google Drive")
 
+        return self._service
 
-# ============================================================
-# LISTAR ARCHIVOS EN UNA CARPETA
-# ============================================================
+    def _get_http(self):
+        """
+        Transporte HTTP autenticado propio del hilo actual.
+        """
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = AuthorizedHttp(self._credentials, http=httplib2.Http())
+            self._local.http = http
+            with self._lock:
+                self._stats["conexiones"] += 1
+        else:
+            with self._lock:
+                self._stats["reusos"] += 1
+        return http
 
-def listar_archivos_en_carpeta(folder_id: str) -> List[Dict[str, Any]]:
-    """
-    Lista archivos dentro de una carpeta de Google Drive por folder_id.
-    """
-    try:
-        service = _get_drive_service()
+    def listar(self, folder_id: str) -> List[Dict[str, Any]]:
+        service = self._get_service()
 
         query = f"'{folder_id}' in parents and trashed = false"
         fields = "files(id, name, mimeType, modifiedTime)"
@@ -92,9 +129,112 @@ def listar_archivos_en_carpeta(folder_id: str) -> List[Dict[str, Any]]:
             q=query,
             fields=fields,
             pageSize=1000,
-        ).execute()
+        ).execute(http=self._get_http())
+
+        return results.get("files", [])
+
+    def descargar(self, file_id: str) -> bytes:
+        service = self._get_service()
+
+        request = service.files().get_media(fileId=file_id)
+        request.http = self._get_http()
+
+        fh = io.BytesIO()
+        downloader = MediaIoBaseDownload(fh, request)
+
+        done = False
+        while not done:
+            status, done = downloader.next_chunk()
+            if status:
+                print(f">>> Descargando {file_id}: {int(status.progress() * 100)}%")
+
+        return fh.getvalue()
+
+    def estadisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+class FakeDriveClient:
+    """
+    Drive local en memoria para pruebas y benchmarks.
+    Implementa la misma interfaz que DriveClient.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._archivos: Dict[str, Dict[str, Any]] = {}
+        self._stats = {"builds": 0, "conexiones": 0, "reusos": 0, "listados": 0, "descargas": 0}
+
+    def agregar_archivo(self, file_id: str, name: str, contenido: bytes,
+                        modified_time: str = "", folder_id: str = "") -> None:
+        with self._lock:
+            self._archivos[file_id] = {
+                "id": file_id,
+                "name": name,
+                "mimeType": "application/octet-stream",
+                "modifiedTime": modified_time,
+                "parent": folder_id,
+                "contenido": contenido,
+            }
 
-        files = results.get("files", [])
+    def listar(self, folder_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._stats["listados"] += 1
+            return [
+                {k: v for k, v in f.items() if k not in ("parent", "contenido")}
+                for f in self._archivos.values()
+                if not f["parent"] or f["parent"] == folder_id
+            ]
+
+    def descargar(self, file_id: str) -> bytes:
+        with self._lock:
+            self._stats["descargas"] += 1
+            if file_id not in self._archivos:
+                raise RuntimeError(f"Archivo inexistente en FakeDriveClient: {file_id}")
+            return self._archivos[file_id]["contenido"]
+
+    def estadisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+_cliente = None
+_cliente_lock = threading.Lock()
+
+
+def obtener_cliente():
+    """
+    Devuelve el cliente de Drive compartido por todo el proceso.
+    """
+    global _cliente
+    if _cliente is None:
+        with _cliente_lock:
+            if _cliente is None:
+                _cliente = DriveClient()
+    return _cliente
+
+
+def configurar_cliente(cliente) -> None:
+    """
+    Reemplaza el cliente compartido (por ejemplo por un FakeDriveClient).
+    """
+    global _cliente
+    with _cliente_lock:
+        _cliente = cliente
+
+
+# ============================================================
+# LISTAR ARCHIVOS EN UNA CARPETA
+# ============================================================
+
+def listar_archivos_en_carpeta(folder_id: str) -> List[Dict[str, Any]]:
+    """
+    Lista archivos dentro de una carpeta de Google Drive por folder_id.
+    """
+    try:
+        with medir_etapa("drive_listado"):
+            files = obtener_cliente().listar(folder_id)
         print(f">>> listar_archivos_en_carpeta: encontrados {len(files)} archivos en {folder_id}")
         return files
 
@@ -114,25 +254,11 @@ def descargar_archivo_por_id(file_id: str) -> bytes:
     """
     Descarga un archivo de Google Drive por su ID.
     """
-    from googleapiclient.http import MediaIoBaseDownload
-    import io
-
     try:
-        service = _get_drive_service()
-
-        request = service.files().get_media(fileId=file_id)
-        fh = io.BytesIO()
-        downloader = MediaIoBaseDownload(fh, request)
-
-        done = False
-        while not done:
-            status, done = downloader.next_chunk()
-            if status:
-                print(f">>> Descargando {file_id}: {int(status.progress() * 100)}%")
-
-        fh.seek(0)
+        with medir_etapa("drive_descarga"):
+            contenido = obtener_cliente().descargar(file_id)
         print(f">>> Archivo descargado correctamente desde Drive: {file_id}")
-        return fh.read()
+        return contenido
 
     except HttpError as e:
         print(">>> ERROR en descargar_archivo_por_id (HttpError):", repr(e))
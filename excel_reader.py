@@ -0,0 +1,258 @@
+import io
+import sys
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from array import array
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from stock_schema import compactar
+
+# ============================================================
+# LAYOUT DEL EXCEL DE STOCK
+# ============================================================
+
+COLUMNAS_STOCK = [
+    "Marca",
+    "Rubro",
+    "Artículo",
+    "Descripción",
+    "Color",
+    "Talle",
+    "Cantidad",
+    "LISTA1",
+    "Valorizado LISTA1",
+]
+
+COLUMNAS_TEXTO = COLUMNAS_STOCK[:6]
+COLUMNAS_NUMERICAS = COLUMNAS_STOCK[6:]
+
+_NAN = float("nan")
+
+# ============================================================
+# CONVERSIÓN DE CELDAS
+# ============================================================
+
+def _a_numero(v: Any) -> float:
+    """
+    Mismo criterio que pd.to_numeric(errors="coerce"): lo que no es número es NaN.
+    """
+    if v is None:
+        return _NAN
+    if isinstance(v, (int, float)):
+        return float(v)
+    if isinstance(v, str):
+        try:
+            return float(v.strip())
+        except ValueError:
+            return _NAN
+    return _NAN
+
+
+def _a_texto(v: Any, memo: Dict[Any, Any]) -> Any:
+    """
+    Texto internado. Los números enteros guardados como float (38.0) se
+    escriben como "38", igual que pandas los convierte al leer.
+    """
+    if isinstance(v, bool):
+        # True == 1 en un dict: no puede compartir la entrada del memo
+        return str(v)
+
+    try:
+        return memo[v]
+    except KeyError:
+        pass
+    except TypeError:
+        return str(v)
+
+    if v is None:
+        t = _NAN
+    elif isinstance(v, float) and v.is_integer():
+        t = sys.intern(str(int(v)))
+    else:
+        t = sys.intern(str(v))
+
+    memo[v] = t
+    return t
+
+# ============================================================
+# LECTURA DIRECTA DEL XML DE LA HOJA
+# ============================================================
+
+_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_TAG_ROW = _NS + "row"
+_TAG_C = _NS + "c"
+_TAG_V = _NS + "v"
+_TAG_T = _NS + "t"
+_TAG_SI = _NS + "si"
+_TAG_RPH = _NS + "rPh"
+
+
+def _ruta_primera_hoja(z: zipfile.ZipFile) -> str:
+    """
+    Resuelve la primera hoja del libro (la que lee pd.read_excel por defecto).
+    """
+    try:
+        libro = ET.fromstring(z.read("xl/workbook.xml"))
+        hoja = libro.find(f"{_NS}sheets/{_NS}sheet")
+        rid = hoja.get(f"{_NS_REL}id")
+
+        rels = ET.fromstring(z.read("xl/_rels/workbook.xml.rels"))
+        for rel in rels.iter(f"{_NS_PKG}Relationship"):
+            if rel.get("Id") == rid:
+                target = rel.get("Target").lstrip("/")
+                return target if target.startswith("xl/") else "xl/" + target
+    except (KeyError, AttributeError, ET.ParseError):
+        pass
+    return "xl/worksheets/sheet1.xml"
+
+
+def _texto_de(el) -> str:
+    # Concatena los runs de texto, ignorando las guías fonéticas (rPh)
+    partes = []
+    for hijo in el:
+        if hijo.tag == _TAG_T:
+            partes.append(hijo.text or "")
+        elif hijo.tag != _TAG_RPH:
+            for t in hijo.iter(_TAG_T):
+                partes.append(t.text or "")
+    return "".join(partes)
+
+
+def _leer_shared_strings(z: zipfile.ZipFile) -> List[str]:
+    if "xl/sharedStrings.xml" not in z.namelist():
+        return []
+
+    valores = []
+    for _, el in ET.iterparse(z.open("xl/sharedStrings.xml")):
+        if el.tag == _TAG_SI:
+            valores.append(sys.intern(_texto_de(el)))
+            el.clear()
+    return valores
+
+
+def _indice_columna(ref: str) -> int:
+    n = 0
+    for ch in ref:
+        o = ord(ch)
+        if 65 <= o <= 90:
+            n = n * 26 + o - 64
+        else:
+            break
+    return n - 1
+
+
+def _filas_xlsx(contenido: bytes, ancho: int):
+    """
+    Genera las filas de la primera hoja como listas de `ancho` valores,
+    parseando el XML en streaming y descartando las columnas sobrantes.
+    """
+    z = zipfile.ZipFile(io.BytesIO(contenido))
+    shared = _leer_shared_strings(z)
+
+    fila = [None] * ancho
+    col = -1
+
+    for _, el in ET.iterparse(z.open(_ruta_primera_hoja(z))):
+        tag = el.tag
+
+        if tag == _TAG_C:
+            ref = el.get("r")
+            col = _indice_columna(ref) if ref else col + 1
+
+            if col < ancho:
+                tipo = el.get("t")
+                if tipo == "inlineStr":
+                    is_ = el.find(_NS + "is")
+                    valor = _texto_de(is_) if is_ is not None else None
+                else:
+                    v = el.find(_TAG_V)
+                    valor = v.text if v is not None else None
+                    if valor is not None:
+                        if tipo is None or tipo == "n":
+                            valor = float(valor)
+                        elif tipo == "s":
+                            valor = shared[int(valor)]
+                        elif tipo == "b":
+                            valor = valor == "1"
+                fila[col] = valor
+            el.clear()
+
+        elif tag == _TAG_ROW:
+            yield fila
+            fila = [None] * ancho
+            col = -1
+            el.clear()
+
+# ============================================================
+# LECTOR STREAMING
+# ============================================================
+
+def _leer_con_pandas(contenido: bytes) -> pd.DataFrame:
+    """
+    Ruta anterior (pd.read_excel completo). Queda para formatos que
+    no son .xlsx, como .xls.
+    """
+    df = pd.read_excel(io.BytesIO(contenido))
+    df = df.iloc[:, :9]
+    df.columns = COLUMNAS_STOCK
+    return compactar(df)
+
+
+def leer_stock_xlsx(contenido: bytes) -> Tuple[pd.DataFrame, Dict[str, float]]:
+    """
+    Recorre la primera hoja en streaming y materializa solo las 9 columnas
+    conocidas, ya con el esquema compacto (stock_schema.compactar): texto
+    como categóricas, Cantidad int32 y precios float64.
+    Devuelve el dataframe y las estadísticas de la lectura.
+    """
+    t0 = time.perf_counter()
+
+    if not zipfile.is_zipfile(io.BytesIO(contenido)):
+        df = _leer_con_pandas(contenido)
+        stats = {"filas": len(df), "segundos": time.perf_counter() - t0}
+        print(f">>> Excel leído con pandas: {stats['filas']} filas en {stats['segundos']:.2f}s")
+        return df, stats
+
+    textos: List[List[Any]] = [[] for _ in COLUMNAS_TEXTO]
+    numeros = [array("d") for _ in COLUMNAS_NUMERICAS]
+    memo: Dict[Any, Any] = {}
+    n_texto = len(COLUMNAS_TEXTO)
+    ancho = len(COLUMNAS_STOCK)
+
+    filas = _filas_xlsx(contenido, ancho)
+
+    # La primera fila es el encabezado, igual que en pd.read_excel
+    next(filas, None)
+
+    for fila in filas:
+        if all(v is None for v in fila):
+            continue
+
+        for i in range(n_texto):
+            textos[i].append(_a_texto(fila[i], memo))
+        for i, destino in enumerate(numeros):
+            destino.append(_a_numero(fila[n_texto + i]))
+
+    datos: Dict[str, np.ndarray] = {}
+
+    for nombre, valores in zip(COLUMNAS_TEXTO, textos):
+        col = np.empty(len(valores), dtype=object)
+        col[:] = valores
+        datos[nombre] = col
+
+    # compactar() pasa Cantidad a int32
+    for nombre, valores in zip(COLUMNAS_NUMERICAS, numeros):
+        datos[nombre] = np.frombuffer(valores, dtype=np.float64).copy()
+
+    df = compactar(pd.DataFrame(datos, columns=COLUMNAS_STOCK))
+
+    stats = {"filas": len(df), "segundos": time.perf_counter() - t0}
+    print(f">>> Excel leído: {stats['filas']} filas en {stats['segundos']:.2f}s")
+    return df, stats
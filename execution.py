@@ -0,0 +1,80 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+# Hilos para I/O bloqueante (Drive, disco). Esperan red, casi no usan CPU.
+IO_MAX_WORKERS = int(os.getenv("IO_MAX_WORKERS", "8"))
+
+# Hilos para el trabajo de pandas/numpy de los requests. Es también el
+# límite de consultas pesadas en paralelo: el resto espera en cola sin
+# bloquear el event loop.
+CPU_MAX_WORKERS = int(os.getenv("CPU_MAX_WORKERS", "4"))
+
+# Procesos para parsear el Excel fuera del GIL. Con 0 se parsea en el hilo
+# del refresco (recomendado en instancias de 1 CPU).
+CPU_PROCESS_WORKERS = int(os.getenv("CPU_PROCESS_WORKERS", "0"))
+
+# ============================================================
+# POOLS
+# ============================================================
+
+_pool_io = ThreadPoolExecutor(max_workers=IO_MAX_WORKERS, thread_name_prefix="io")
+_pool_cpu = ThreadPoolExecutor(max_workers=CPU_MAX_WORKERS, thread_name_prefix="cpu")
+_pool_procesos: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def _procesos() -> Optional[ProcessPoolExecutor]:
+    global _pool_procesos
+    if CPU_PROCESS_WORKERS <= 0:
+        return None
+    with _lock:
+        if _pool_procesos is None:
+            _pool_procesos = ProcessPoolExecutor(max_workers=CPU_PROCESS_WORKERS)
+        return _pool_procesos
+
+
+async def _en(pool: Executor, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+
+
+async def en_io(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Corre I/O bloqueante (Drive, disco) en el pool de I/O.
+    """
+    return await _en(_pool_io, fn, *args, **kwargs)
+
+
+async def en_cpu(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Corre trabajo de pandas/numpy de un request en el pool acotado de CPU.
+    """
+    return await _en(_pool_cpu, fn, *args, **kwargs)
+
+
+def ejecutar_pesado(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Ejecución sincrónica para trabajo pesado fuera de los requests (parseo del
+    Excel): en el pool de procesos si está configurado, si no en el hilo actual.
+    `fn` y sus argumentos tienen que poder serializarse con pickle.
+    """
+    pool = _procesos()
+    if pool is None:
+        return fn(*args)
+    return pool.submit(fn, *args).result()
+
+
+def cerrar() -> None:
+    global _pool_procesos
+    with _lock:
+        if _pool_procesos is not None:
+            _pool_procesos.shutdown(wait=False, cancel_futures=True)
+            _pool_procesos = None
@@ -0,0 +1,204 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from snapshot import Snapshot
+from snapshot_cache import cargar_arrays, guardar_arrays
+from stock_schema import como_numero
+
+# ============================================================
+# BITMAPS
+# ============================================================
+
+def _bitmap_de_filas(filas: np.ndarray, n: int) -> np.ndarray:
+    mask = np.zeros(n, dtype=bool)
+    mask[filas] = True
+    return np.packbits(mask)
+
+def _valor_json(v: Any) -> Any:
+    # Los valores de las facetas se guardan en JSON; un valor que no lo es
+    # hace fallar el guardado y la faceta se reconstruye al leer el snapshot
+    return v.item() if isinstance(v, np.generic) else v
+
+# ============================================================
+# FACETAS
+# ============================================================
+
+class FacetaCategorica:
+    """
+    Columna de texto codificada: código por fila más, para cada valor, el
+    bitmap (empaquetado, 1 bit por fila) de las filas que lo tienen.
+    Los bitmaps se arman la primera vez que se piden.
+    """
+
+    def __init__(self, serie: pd.Series):
+        codes, valores = pd.factorize(serie, use_na_sentinel=True)
+        orden = np.argsort(codes, kind="stable")
+        inicios = np.searchsorted(codes[orden], np.arange(len(valores) + 1))
+        self._armar(codes.astype(np.int32), list(valores), orden, inicios)
+
+    def _armar(self, codes: np.ndarray, valores: list, orden: np.ndarray, inicios: np.ndarray) -> None:
+        self.n = len(codes)
+        self.codes = codes
+        self.valores = valores
+        self._codigo = {v: i for i, v in enumerate(self.valores)}
+
+        self._orden = orden
+        self._inicios = inicios
+        self._bitmaps: Dict[int, np.ndarray] = {}
+
+    def arrays(self, prefijo: str) -> Dict[str, np.ndarray]:
+        return {f"{prefijo}_codes": self.codes, f"{prefijo}_orden": self._orden, f"{prefijo}_inicios": self._inicios}
+
+    @classmethod
+    def desde_arrays(cls, arrays: Dict[str, np.ndarray], prefijo: str, valores: list) -> "FacetaCategorica":
+        faceta = cls.__new__(cls)
+        faceta._armar(arrays[f"{prefijo}_codes"], valores, arrays[f"{prefijo}_orden"], arrays[f"{prefijo}_inicios"])
+        return faceta
+
+    def codigo(self, valor: Any) -> Optional[int]:
+        try:
+            return self._codigo.get(valor)
+        except TypeError:
+            return None
+
+    def filas(self, codigo: int) -> np.ndarray:
+        return self._orden[self._inicios[codigo]:self._inicios[codigo + 1]]
+
+    def bitmap(self, valor: Any) -> np.ndarray:
+        codigo = self.codigo(valor)
+        if codigo is None:
+            return np.zeros((self.n + 7) // 8, dtype=np.uint8)
+
+        bm = self._bitmaps.get(codigo)
+        if bm is None:
+            bm = self._bitmaps.setdefault(codigo, _bitmap_de_filas(self.filas(codigo), self.n))
+        return bm
+
+    def contar(self, mascara: Optional[np.ndarray] = None) -> Dict[str, int]:
+        """
+        Cantidad de filas por valor, opcionalmente solo entre las filas de `mascara`.
+        """
+        codes = self.codes if mascara is None else self.codes[mascara]
+        conteos = np.bincount(codes[codes >= 0], minlength=len(self.valores))
+        return {str(v): int(c) for v, c in zip(self.valores, conteos) if c}
+
+
+class FacetaRango:
+    """
+    Columna numérica ordenada para consultas por rango (talle desde/hasta).
+    Los valores no numéricos quedan fuera de cualquier rango.
+    """
+
+    def __init__(self, serie: pd.Series):
+        numeros = como_numero(serie)
+        self.n = len(serie)
+        validas = np.flatnonzero(~np.isnan(numeros))
+        orden = np.argsort(numeros[validas], kind="stable")
+        self.filas_ordenadas = validas[orden]
+        self.valores_ordenados = numeros[self.filas_ordenadas]
+
+    def arrays(self, prefijo: str) -> Dict[str, np.ndarray]:
+        return {f"{prefijo}_filas": self.filas_ordenadas, f"{prefijo}_valores": self.valores_ordenados}
+
+    @classmethod
+    def desde_arrays(cls, arrays: Dict[str, np.ndarray], prefijo: str, n: int) -> "FacetaRango":
+        faceta = cls.__new__(cls)
+        faceta.n = n
+        faceta.filas_ordenadas = arrays[f"{prefijo}_filas"]
+        faceta.valores_ordenados = arrays[f"{prefijo}_valores"]
+        return faceta
+
+    def bitmap(self, desde: Optional[float] = None, hasta: Optional[float] = None) -> np.ndarray:
+        a = 0 if desde is None else np.searchsorted(self.valores_ordenados, float(desde), side="left")
+        b = len(self.valores_ordenados) if hasta is None else np.searchsorted(self.valores_ordenados, float(hasta), side="right")
+        return _bitmap_de_filas(self.filas_ordenadas[a:max(a, b)], self.n)
+
+
+class Facetas:
+    """
+    Índices de filtrado del snapshot: marca, rubro y talle.
+    Los filtros se combinan con AND bit a bit sobre los bitmaps.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.n = len(df)
+        self.marca = FacetaCategorica(df["Marca"])
+        self.rubro = FacetaCategorica(df["Rubro"])
+        self.talle = FacetaCategorica(df["Talle"])
+        self.talle_num = FacetaRango(df["Talle"])
+
+    def guardar(self, carpeta: str) -> None:
+        arrays = {**self.marca.arrays("marca"), **self.rubro.arrays("rubro"),
+                  **self.talle.arrays("talle"), **self.talle_num.arrays("talle_num")}
+        datos = {
+            "n": self.n,
+            "valores": {
+                nombre: [_valor_json(v) for v in getattr(self, nombre).valores]
+                for nombre in ("marca", "rubro", "talle")
+            },
+        }
+        guardar_arrays(carpeta, arrays, datos)
+
+    @classmethod
+    def cargar(cls, carpeta: str) -> "Facetas":
+        """
+        Facetas guardadas con guardar(), con los arrays mapeados y
+        compartidos entre procesos. Los bitmaps se arman por proceso, y
+        solo los de los valores que se filtran.
+        """
+        arrays, datos = cargar_arrays(carpeta)
+        cargadas = cls.__new__(cls)
+        cargadas.n = int(datos["n"])
+        for nombre, valores in datos["valores"].items():
+            setattr(cargadas, nombre, FacetaCategorica.desde_arrays(arrays, nombre, valores))
+        cargadas.talle_num = FacetaRango.desde_arrays(arrays, "talle_num", cargadas.n)
+        return cargadas
+
+    def _bitmaps(self, filtros: dict, excluir: str = "") -> list:
+        bitmaps = []
+
+        if filtros.get("marca") and excluir != "marca":
+            bitmaps.append(self.marca.bitmap(filtros["marca"]))
+
+        if filtros.get("rubro") and excluir != "rubro":
+            bitmaps.append(self.rubro.bitmap(filtros["rubro"]))
+
+        desde, hasta = filtros.get("talleDesde"), filtros.get("talleHasta")
+        if (desde is not None or hasta is not None) and excluir != "talle":
+            bitmaps.append(self.talle_num.bitmap(desde, hasta))
+
+        return bitmaps
+
+    def parchear(self, df: pd.DataFrame, cambios) -> Optional["Facetas"]:
+        # Marca, rubro y talle no cambian si solo cambiaron valores
+        return self if cambios.parcheable() else None
+
+    def mascara(self, filtros: dict, excluir: str = "") -> np.ndarray:
+        """
+        Máscara booleana de las filas que cumplen los filtros (orden del df).
+        """
+        bitmaps = self._bitmaps(filtros, excluir)
+        if not bitmaps:
+            return np.ones(self.n, dtype=bool)
+
+        combinado = bitmaps[0]
+        for bm in bitmaps[1:]:
+            combinado = np.bitwise_and(combinado, bm)
+        return np.unpackbits(combinado, count=self.n).view(bool)
+
+    def conteos(self, filtros: dict) -> Dict[str, Dict[str, int]]:
+        """
+        Filas por valor para los desplegables: cada faceta se cuenta con los
+        demás filtros aplicados, pero no el propio.
+        """
+        return {
+            "marcas": self.marca.contar(self.mascara(filtros, excluir="marca")),
+            "rubros": self.rubro.contar(self.mascara(filtros, excluir="rubro")),
+            "talles": self.talle.contar(self.mascara(filtros, excluir="talle")),
+        }
+
+
+def facetas(snap: Snapshot) -> Facetas:
+    return snap.derivado("facetas", lambda s: Facetas(s.df))
@@ -0,0 +1,146 @@
+import os
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+# Distancia de edición máxima aceptada (Damerau, con transposiciones)
+FUZZY_MAX_DISTANCE = int(os.getenv("FUZZY_MAX_DISTANCE", "2"))
+
+# Tope de candidatos verificados por palabra: acota el tiempo de una
+# búsqueda sin importar el tamaño del catálogo
+FUZZY_MAX_CANDIDATES = int(os.getenv("FUZZY_MAX_CANDIDATES", "1000"))
+
+# Solo se indexan los borrados de los primeros N caracteres de cada término
+FUZZY_PREFIX_LENGTH = int(os.getenv("FUZZY_PREFIX_LENGTH", "7"))
+
+# Palabras más cortas no se corrigen (demasiado ambiguas)
+FUZZY_MIN_LENGTH = 3
+
+# ============================================================
+# DISTANCIA DE EDICIÓN
+# ============================================================
+
+def distancia(a: str, b: str, maximo: int) -> int:
+    """
+    Distancia de Damerau-Levenshtein (alineamiento óptimo de strings) con
+    corte: si supera `maximo` devuelve maximo + 1 sin terminar el cálculo.
+    """
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+
+    anterior2: List[int] = []
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        actual = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            costo = 0 if a[i - 1] == b[j - 1] else 1
+            actual[j] = min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + costo)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                actual[j] = min(actual[j], anterior2[j - 2] + 1)
+        if min(actual) > maximo:
+            return maximo + 1
+        anterior2, anterior = anterior, actual
+    return min(anterior[-1], maximo + 1)
+
+
+def _borrados(palabra: str, distancia_max: int) -> Set[str]:
+    """
+    La palabra y todas las variantes con hasta `distancia_max` caracteres
+    borrados.
+    """
+    resultado = {palabra}
+    frontera = {palabra}
+    for _ in range(distancia_max):
+        siguiente = set()
+        for p in frontera:
+            if len(p) <= 1:
+                continue
+            for i in range(len(p)):
+                siguiente.add(p[:i] + p[i + 1:])
+        siguiente -= resultado
+        resultado |= siguiente
+        frontera = siguiente
+    return resultado
+
+# ============================================================
+# ÍNDICE DE BORRADOS SIMÉTRICOS
+# ============================================================
+
+@dataclass
+class ResultadoAproximado:
+    palabra: str
+    distancia_max: int
+    candidatos_examinados: int = 0
+    # (término, distancia), de la mejor a la peor
+    sugerencias: List[Tuple[str, int]] = field(default_factory=list)
+
+    @property
+    def mejor(self) -> Optional[str]:
+        return self.sugerencias[0][0] if self.sugerencias else None
+
+
+class BuscadorAproximado:
+    """
+    Corrección de palabras por borrados simétricos (el método de SymSpell):
+    al construir se indexan los borrados de cada término; al buscar se
+    generan los borrados de la palabra y solo se verifican los términos que
+    comparten alguno. El costo depende del largo de la palabra y del tope
+    de candidatos, no del tamaño del vocabulario.
+    """
+
+    def __init__(self, terminos: Sequence[str], pesos: Optional[Sequence[int]] = None,
+                 distancia_max: int = FUZZY_MAX_DISTANCE,
+                 prefijo: int = FUZZY_PREFIX_LENGTH):
+        self.terminos = list(terminos)
+        self.pesos = list(pesos) if pesos is not None else [1] * len(self.terminos)
+        self.distancia_max = distancia_max
+        self.prefijo = prefijo
+
+        borrados: Dict[str, List[int]] = defaultdict(list)
+        for tid, termino in enumerate(self.terminos):
+            for b in _borrados(termino[:prefijo], distancia_max):
+                borrados[b].append(tid)
+        self._borrados = dict(borrados)
+
+    def _corte(self, palabra: str, distancia_max: Optional[int]) -> int:
+        corte = self.distancia_max if distancia_max is None else min(distancia_max, self.distancia_max)
+        # Palabras cortas toleran menos errores
+        return min(corte, 1) if len(palabra) <= 4 else corte
+
+    def sugerir(self, palabra: str, distancia_max: Optional[int] = None,
+                max_sugerencias: int = 5,
+                max_candidatos: int = FUZZY_MAX_CANDIDATES) -> ResultadoAproximado:
+        """
+        Términos a distancia <= corte de `palabra`, ordenados por distancia
+        y después por peso (más filas primero).
+        """
+        corte = self._corte(palabra, distancia_max)
+        resultado = ResultadoAproximado(palabra=palabra, distancia_max=corte)
+        if len(palabra) < FUZZY_MIN_LENGTH:
+            return resultado
+
+        vistos: Set[int] = set()
+        encontrados: List[Tuple[int, int, str]] = []
+
+        # Primero los borrados más largos: los candidatos más parecidos
+        for b in sorted(_borrados(palabra[:self.prefijo], corte), key=len, reverse=True):
+            if len(vistos) >= max_candidatos:
+                break
+            for tid in self._borrados.get(b, ()):
+                if len(vistos) >= max_candidatos:
+                    break
+                if tid in vistos:
+                    continue
+                vistos.add(tid)
+                d = distancia(palabra, self.terminos[tid], corte)
+                if d <= corte:
+                    encontrados.append((d, -self.pesos[tid], self.terminos[tid]))
+
+        resultado.candidatos_examinados = len(vistos)
+        encontrados.sort()
+        resultado.sugerencias = [(t, d) for d, _, t in encontrados[:max_sugerencias]]
+        return resultado
@@ -1,84 +1,177 @@
-import re
-import unicodedata
+import copy
+import json
+import os
+import threading
+import time
 from collections import defaultdict
 
+import numpy as np
+import pandas as pd
+
+from article_lookup import fichas_articulos
+from fuzzy_search import BuscadorAproximado
+from query_phrases import SINONIMOS, analizador, normalizar
+from search_index import IndiceInvertido
+from snapshot import snapshots
+from snapshot_cache import guardar_derivado, ruta_derivado
+from stock_schema import texto_categorico
+
+# Mapeo REAL de columnas según tu Excel (por posición)
+COLUMNAS_TEXTO = ["marca", "rubro", "codigo", "nombre", "color", "talle"]
+COLUMNAS_VALOR = ["stock", "precio", "valorizado"]
+
 class Indexer:
-    def __init__(self, df):
-        self.df = df
-
-        # Mapeo REAL de columnas según tu Excel
-        self.df["marca"] = self.df.iloc[:, 0].astype(str)
-        self.df["rubro"] = self.df.iloc[:, 1].astype(str)
-        self.df["codigo"] = self.df.iloc[:, 2].astype(str)
-        self.df["nombre"] = self.df.iloc[:, 3].astype(str)
-        self.df["color"] = self.df.iloc[:, 4].astype(str)
-        self.df["talle"] = self.df.iloc[:, 5].astype(str)
-        self.df["stock"] = self.df.iloc[:, 6]
-        self.df["precio"] = self.df.iloc[:, 7]
-        self.df["valorizado"] = self.df.iloc[:, 8]
-
-        # Texto indexado para búsqueda
-        self.df["texto"] = self.df.apply(self._build_text, axis=1)
-
-        # Sinónimos
-        self.synonyms = {
-            "pelota": "balon",
-            "pelotas": "balon",
-            "balon": "balon",
-            "balones": "balon",
-            "remera": "camiseta",
-            "remeras": "camiseta",
-            "zapatilla": "calzado",
-            "zapatillas": "calzado",
-            "gorra": "gorra",
-            "buzo": "hoodie",
-            "ojota": "ojotas",
-            "ojotas": "ojotas",
-            "sandalia": "sandalia",
-            "sandalias": "sandalia"
-        }
+    def __init__(self, df, texto=None, indice=None):
+        """
+        Arma un dataframe propio con las columnas renombradas (no modifica
+        ni copia `df`: las columnas numéricas se comparten) y el índice de
+        búsqueda. `texto` e `indice` permiten reutilizar un índice guardado.
+        """
+        self._memo = {}
+
+        columnas = {}
+        normalizadas = []
+        for i, alias in enumerate(COLUMNAS_TEXTO):
+            serie = texto_categorico(df.iloc[:, i])
+            columnas[alias] = serie
+            if texto is None:
+                normalizadas.append(self._normalizar_columna(serie))
+        for i, alias in enumerate(COLUMNAS_VALOR, start=len(COLUMNAS_TEXTO)):
+            columnas[alias] = df.iloc[:, i]
+
+        # Texto indexado para búsqueda: cada valor distinto se normaliza una vez
+        if texto is None:
+            texto = [" ".join(filter(None, partes)) for partes in zip(*normalizadas)]
+        columnas["texto"] = pd.Series(texto, index=df.index, dtype=object)
+
+        self.df = pd.DataFrame(columnas, index=df.index, copy=False)
+
+        # Índice invertido sobre "texto" y filas con stock (para solo_stock)
+        self.indice = indice if indice is not None else IndiceInvertido(self.df["texto"].tolist())
+        self._con_stock = self._filas_con_stock(self.df["stock"])
+
+        # Búsqueda aproximada: se arma recién la primera vez que hace falta
+        self._aproximado = None
+        self._lock_aproximado = threading.Lock()
+
+        # Sinónimos (las frases vacías las saca query_phrases.analizador)
+        self.synonyms = dict(SINONIMOS)
+
+    # ---------------------------------------------------------
+    # ACTUALIZACIÓN INCREMENTAL
+    # ---------------------------------------------------------
+    def parchear(self, df, cambios):
+        """
+        Indexer para un snapshot nuevo donde solo cambiaron stock y precios:
+        las filas son las mismas, así que se reutilizan el texto y el índice
+        invertido y solo se toman las columnas numéricas del df nuevo.
+        """
+        if not cambios.parcheable():
+            return None
 
-        # Frases que no aportan significado
-        self.stop_phrases = [
-            "dime", "decime", "mostrame", "mostrar", "que hay", "qué hay",
-            "que tenes", "qué tenés", "quiero ver", "hay", "tengo", "busco",
-            "necesito", "decime que hay", "mostrame que hay", "cuantos", "cuánto"
-        ]
+        nuevo = copy.copy(self)
+        nuevo.df = self.df.copy(deep=False)
+        for i, alias in enumerate(COLUMNAS_VALOR, start=len(COLUMNAS_TEXTO)):
+            nuevo.df[alias] = df.iloc[:, i].to_numpy()
+        nuevo._con_stock = nuevo._filas_con_stock(nuevo.df["stock"])
+        return nuevo
 
     # ---------------------------------------------------------
     # NORMALIZACIÓN
     # ---------------------------------------------------------
     def _normalize(self, text):
-        text = str(text).lower()
-        text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
-        text = re.sub(r"[^a-z0-9 ]", " ", text)
-        text = re.sub(r"\s+", " ", text).strip()
-        return text
-
-    def _build_text(self, row):
-        parts = [
-            row["marca"],
-            row["rubro"],
-            row["codigo"],
-            row["nombre"],
-            row["color"],
-            row["talle"]
-        ]
-        return self._normalize(" ".join(parts))
+        return normalizar(text)
 
-    def _clean_query(self, q):
-        q = self._normalize(q)
+    def _normalizar_columna(self, serie):
+        """
+        Valores normalizados de una columna, calculando _normalize una sola
+        vez por valor distinto (marcas, colores y talles se repiten mucho).
+        Normalizar cada parte y unirlas da lo mismo que normalizar el texto
+        ya unido.
+        """
+        codigos, valores = pd.factorize(serie)
+        memo = self._memo
+        normalizados = np.empty(len(valores), dtype=object)
+        for i, v in enumerate(valores):
+            n = memo.get(v)
+            if n is None:
+                n = memo[v] = self._normalize(v)
+            normalizados[i] = n
+        return normalizados[codigos]
+
+    @staticmethod
+    def _tiene_stock(valor):
+        try:
+            return float(str(valor).replace(",", ".")) > 0
+        except:
+            return True
 
-        for phrase in self.stop_phrases:
-            q = q.replace(phrase, "")
+    def _filas_con_stock(self, stock):
+        if stock.dtype.kind in "iuf":
+            return (stock > 0).to_numpy()
+        codigos, valores = pd.factorize(stock, use_na_sentinel=False)
+        return np.array([self._tiene_stock(v) for v in valores], dtype=bool)[codigos]
 
-        words = q.split()
-        cleaned = []
+    # ---------------------------------------------------------
+    # BÚSQUEDA APROXIMADA (ERRORES DE TIPEO / VOZ)
+    # ---------------------------------------------------------
+    def _buscador_aproximado(self):
+        """
+        Índice de borrados simétricos sobre el vocabulario del snapshot
+        (sin tokens con números: códigos y talles no se corrigen) más las
+        claves de sinónimos. Devuelve el buscador y el término con el que
+        se reemplaza cada sugerencia.
+        """
+        with self._lock_aproximado:
+            if self._aproximado is None:
+                reemplazos = {}
+                pesos = {}
+                for token, filas in zip(self.indice.vocabulario, self.indice.postings):
+                    if len(token) >= 3 and not any(c.isdigit() for c in token):
+                        reemplazos[token] = token
+                        pesos[token] = len(filas)
+                for clave, destino in self.synonyms.items():
+                    if clave not in reemplazos:
+                        reemplazos[clave] = destino
+                        pesos[clave] = 0
+
+                terminos = list(reemplazos)
+                buscador = BuscadorAproximado(terminos, [pesos[t] for t in terminos])
+                self._aproximado = (buscador, reemplazos)
+            return self._aproximado
+
+    def buscar_aproximado(self, words):
+        """
+        Corrige las palabras que no aparecen en el índice con la sugerencia
+        más cercana. Devuelve las palabras corregidas y, por palabra, el
+        corte de distancia, los candidatos examinados y las sugerencias.
+        """
+        buscador, reemplazos = self._buscador_aproximado()
+        corregidas = []
+        detalle = []
 
         for w in words:
-            cleaned.append(self.synonyms.get(w, w))
+            if len(self.indice.filas_de(w)) > 0:
+                corregidas.append(w)
+                continue
 
-        return " ".join(cleaned).strip()
+            r = buscador.sugerir(w)
+            detalle.append({
+                "palabra": w,
+                "distancia_max": r.distancia_max,
+                "candidatos_examinados": r.candidatos_examinados,
+                "sugerencias": [{"termino": t, "distancia": d} for t, d in r.sugerencias],
+            })
+            corregidas.append(reemplazos[r.mejor] if r.mejor is not None else w)
+
+        return corregidas, detalle
+
+    def _clean_query(self, q):
+        """
+        Consulta normalizada, sin frases vacías (solo palabras completas) y
+        con los sinónimos reemplazados, en una sola pasada del analizador.
+        """
+        return analizador.analizar(q).limpio
 
     # ---------------------------------------------------------
     # ARMADO DE RESPUESTA
@@ -161,27 +254,114 @@ class Indexer:
             return self._build_response(df_prefix, question)
 
         # -----------------------------------------------------
-        # 3) BÚSQUEDA NORMAL (tu método original)
+        # 3) BÚSQUEDA NORMAL (índice invertido: todas las palabras)
         # -----------------------------------------------------
         words = q_lower.split()
-        results = []
-
-        for _, row in self.df.iterrows():
-            text = row["texto"]
-            if all(w in text for w in words):
-                if solo_stock:
-                    try:
-                        if float(str(row["stock"]).replace(",", ".")) <= 0:
-                            continue
-                    except:
-                        pass
-                results.append(row)
-
-        if not results:
-            return {
-                "tipo": "lista",
-                "items": [],
-                "voz": f"No encontré resultados para '{question}', pero puedo buscar algo parecido."
-            }
+        filas = self.indice.buscar(words)
+
+        if solo_stock:
+            filas = filas[self._con_stock[filas]]
+
+        if len(filas) > 0:
+            return self._build_response(self.df.iloc[filas], question)
+
+        # -----------------------------------------------------
+        # 4) ALGO PARECIDO (palabras corregidas por distancia de edición)
+        # -----------------------------------------------------
+        corregidas, detalle = self.buscar_aproximado(words)
+
+        if corregidas != words:
+            filas = self.indice.buscar(corregidas)
+            if solo_stock:
+                filas = filas[self._con_stock[filas]]
+
+            if len(filas) > 0:
+                respuesta = self._build_response(self.df.iloc[filas], question)
+                respuesta["voz"] = (
+                    f"No encontré '{question}', te muestro {len(respuesta['items'])} "
+                    f"resultados para '{' '.join(corregidas)}'."
+                )
+                respuesta["aproximado"] = detalle
+                return respuesta
+
+        return {
+            "tipo": "lista",
+            "items": [],
+            "voz": f"No encontré resultados para '{question}', pero puedo buscar algo parecido.",
+            "aproximado": detalle
+        }
+
+
+# ============================================================
+# PERSISTENCIA JUNTO AL SNAPSHOT
+# ============================================================
+
+def guardar_indexer(indexer, directorio):
+    """
+    Guarda el texto normalizado (como códigos + valores distintos) y el
+    índice invertido. El resto del Indexer se arma del snapshot al cargar.
+    """
+    codigos, valores = pd.factorize(indexer.df["texto"])
+    np.save(os.path.join(directorio, "texto.npy"), codigos.astype(np.int32), allow_pickle=False)
+    with open(os.path.join(directorio, "texto.json"), "w", encoding="utf-8") as f:
+        json.dump(list(valores), f, ensure_ascii=False)
+    indexer.indice.guardar(directorio)
+
+
+def cargar_indexer(df, directorio):
+    codigos = np.load(os.path.join(directorio, "texto.npy"), allow_pickle=False)
+    with open(os.path.join(directorio, "texto.json"), encoding="utf-8") as f:
+        valores = np.array(json.load(f), dtype=object)
+    if len(codigos) != len(df):
+        return None
+    return Indexer(df, texto=valores[codigos], indice=IndiceInvertido.cargar(directorio))
+
+
+def _construir_indexer(snap):
+    inicio = time.perf_counter()
+    ruta = ruta_derivado(snap.version, "indexer")
+    if ruta is not None:
+        try:
+            indexer = cargar_indexer(snap.df, ruta)
+            if indexer is not None:
+                print(f">>> Índice de búsqueda leído de caché en {time.perf_counter() - inicio:.3f}s")
+                return indexer
+        except (OSError, ValueError, KeyError) as e:
+            print(">>> WARNING: índice de búsqueda en caché ilegible:", repr(e))
+
+    indexer = Indexer(snap.df)
+    print(f">>> Índice de búsqueda construido en {time.perf_counter() - inicio:.3f}s")
+
+    try:
+        guardar_derivado(snap.version, "indexer", lambda d: guardar_indexer(indexer, d))
+    except Exception as e:
+        print(">>> WARNING: no se pudo guardar el índice de búsqueda:", repr(e))
+    return indexer
+
+
+def indexer_para(snap):
+    """
+    Indexer del snapshot, construido (o leído de la caché en disco) una
+    sola vez por versión.
+    """
+    return snap.derivado("indexer", _construir_indexer)
+
+
+# ============================================================
+# BÚSQUEDA DE UN ARTÍCULO (RESPUESTAS POR VOZ)
+# ============================================================
 
-        return self._build_response(results, question)
+def buscar_articulo_en_archivos(pregunta, snap=None):
+    """
+    Ficha del artículo mencionado en la pregunta (por código o descripción)
+    en el snapshot actual, y el archivo del que sale. Las fichas se arman
+    una vez por snapshot, así que un Excel nuevo se ve en la próxima
+    pregunta. Devuelve (None, None) si no hay snapshot o no hay match.
+    """
+    snap = snap or snapshots.actual()
+    if snap is None:
+        return None, None
+    info = fichas_articulos(snap).buscar(pregunta)
+    if info is None:
+        return None, None
+    return info, snap.file_name
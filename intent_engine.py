@@ -1,12 +1,8 @@
 # intent_engine.py
 
-def clasificar_intencion(pregunta: str) -> str:
-    p = pregunta.lower()
-
-    if any(x in p for x in ["stock", "hay de", "talle", "talles", "disponible", "disponibilidad"]):
-        return "consulta_stock"
+from query_phrases import analizador
 
-    if any(x in p for x in ["precio", "cuanto sale", "lista", "vale", "publico", "costo"]):
-        return "consulta_precio"
 
-    return "general"
+def clasificar_intencion(pregunta: str) -> str:
+    # Palabras clave en query_phrases.INTENCIONES (stock antes que precio)
+    return analizador.intencion(pregunta)
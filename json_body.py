@@ -0,0 +1,18 @@
+import json
+from typing import Any
+
+# ============================================================
+# CUERPOS JSON
+# ============================================================
+
+# Mismos parámetros que JSONResponse de Starlette: los cuerpos armados a mano
+# son idénticos byte a byte a los que devolvería FastAPI
+_ENCODER = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+
+def codificar_json(contenido: Any) -> str:
+    return _ENCODER.encode(contenido)
+
+
+def serializar_json(contenido: Any) -> bytes:
+    return _ENCODER.encode(contenido).encode("utf-8")
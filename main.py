@@ -1,15 +1,45 @@
-import io
+import os
 import json
+import time
 import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
+import numpy as np
 import pandas as pd
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import jwt
 
-from drive_service import listar_archivos_en_carpeta, descargar_archivo_por_id
+from drive_service import listar_archivos_en_carpeta, descargar_archivo_por_id, obtener_cliente
+from snapshot import SNAPSHOT_REFRESH_SECONDS, Snapshot, SnapshotRefresher, snapshots
+from snapshot_cache import SNAPSHOT_CACHE_DIR, cargar_snapshot, guardar_snapshot, ruta_derivado
+from snapshot_diff import diferencias
+from shared_snapshot import SHARED_SNAPSHOT_POLL_SECONDS, SnapshotCompartido
+from excel_reader import leer_stock_xlsx
+from singleflight import SingleFlight
+from execution import cerrar as cerrar_ejecucion, ejecutar_pesado, en_cpu, en_io
+from article_table import TablaArticulos, tabla_articulos
+from facets import Facetas, facetas
+from result_cache import CacheLRU, clave_consulta
+from ai_openrouter import cliente_openrouter
+from catalog import (
+    MEDIA_TYPES_STREAM,
+    abrir_catalogo,
+    catalogo_serializado,
+    coincide_etag,
+    escribir_catalogos,
+    etag_catalogo,
+    formato_stream,
+    partes_archivo,
+    stream_catalogo,
+    variante_para_rol,
+)
+from query_response import enmascarar, items_de_tabla, serializar_items, serializar_lote
+from user_directory import DirectorioUsuarios
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, medir_etapa, metricas
+from stock_schema import describir_memoria, memoria_por_columna
 
 # ============================================================
 # FASTAPI
@@ -51,6 +81,38 @@ async def verificar_token(request: Request, call_next):
 
     return await call_next(request)
 
+# ============================================================
+# MIDDLEWARE DE MÉTRICAS
+# ============================================================
+
+_rutas_conocidas: set = set()
+
+def _ruta_para_metricas(path: str) -> str:
+    # Solo rutas declaradas, para no crear una serie por cada URL inventada
+    if not _rutas_conocidas:
+        _rutas_conocidas.update(getattr(r, "path", "") for r in app.routes)
+    return path if path in _rutas_conocidas else "otra"
+
+@app.middleware("http")
+async def medir_request(request: Request, call_next):
+    if not metricas.habilitado:
+        return await call_next(request)
+
+    inicio = time.perf_counter()
+    estado = 500
+    try:
+        response = await call_next(request)
+        estado = response.status_code
+        return response
+    finally:
+        metricas.observar(
+            "stock_http_segundos",
+            time.perf_counter() - inicio,
+            metodo=request.method,
+            ruta=_ruta_para_metricas(request.url.path),
+            estado=estado,
+        )
+
 # ============================================================
 # ROOT / HEALTHCHECK
 # ============================================================
@@ -85,23 +147,109 @@ class QueryResponse(BaseModel):
     items: List[ItemResponse]
 
 # ============================================================
-# CACHE GLOBAL
+# SNAPSHOT GLOBAL
 # ============================================================
 
-df_global: Optional[pd.DataFrame] = None
-last_file_id: Optional[str] = None
-last_file_name: Optional[str] = None
+STOCK_FOLDER_ID = "1F0FUEMJmeHgb3ZY7XBBdacCGB3SZK4O-"
+
+# Máximo de consultas por request en /query/batch
+QUERY_BATCH_MAX = int(os.getenv("QUERY_BATCH_MAX", "50"))
+
+# Cuánto espera un request a que termine una carga en curso
+SNAPSHOT_WAIT_SECONDS = float(os.getenv("SNAPSHOT_WAIT_SECONDS", "30"))
+
+# Con 1 (default) los requests usan el snapshot anterior mientras se carga
+# uno nuevo; con 0 esperan a que termine la carga en curso.
+SNAPSHOT_SERVE_STALE = os.getenv("SNAPSHOT_SERVE_STALE", "1") != "0"
 
 # ============================================================
 # CARGA INTELIGENTE DESDE GOOGLE DRIVE (CON FIX DE COLUMNAS)
 # ============================================================
 
+def leer_excel_stock(contenido: bytes) -> pd.DataFrame:
+    # Solo las 9 columnas conocidas, leídas en streaming y ya tipadas.
+    # Con CPU_PROCESS_WORKERS > 0 el parseo corre en otro proceso.
+    with medir_etapa("excel_parseo"):
+        df, _ = ejecutar_pesado(leer_stock_xlsx, contenido)
+    return df
+
+def heredar_indices(snap: Snapshot, anterior: Optional[Snapshot]) -> None:
+    """
+    Compara el snapshot nuevo con el anterior por (Artículo, Color, Talle)
+    y, si el cambio es chico y solo de valores, parchea los índices del
+    anterior en lugar de reconstruirlos.
+    """
+    if anterior is None or anterior.version == snap.version:
+        return
+    try:
+        inicio = time.perf_counter()
+        with medir_etapa("snapshot_diff"):
+            cambios = diferencias(anterior.df, snap.df)
+        if cambios is None:
+            print(">>> Diff de snapshot: clave (Artículo, Color, Talle) no única, se reconstruye")
+            return
+
+        print(f">>> Diff de snapshot: {cambios.resumen()} en {time.perf_counter() - inicio:.3f}s")
+        if cambios.parcheable():
+            heredados = snap.heredar(anterior, cambios)
+            print(f">>> Índices parcheados: {', '.join(heredados) or 'ninguno'}")
+    except Exception as e:
+        print(">>> WARNING: no se pudo calcular el diff del snapshot:", repr(e))
+
+def preparar_snapshot(snap: Snapshot, anterior: Optional[Snapshot] = None) -> Snapshot:
+    """
+    Construye los índices del snapshot antes de publicarlo, así ningún
+    request paga ese costo. Si viene el snapshot anterior, reutiliza lo
+    que se pueda parchear.
+    """
+    heredar_indices(snap, anterior)
+    print(f">>> Memoria del snapshot: {describir_memoria(snap.df)}")
+    inicio = time.perf_counter()
+    with medir_etapa("indices"):
+        tabla_articulos(snap)
+        facetas(snap)
+    print(f">>> Índices listos en {time.perf_counter() - inicio:.3f}s")
+    return snap
+
+# Índices que se guardan junto al snapshot en disco: quien lee la entrada
+# los mapea con mmap en lugar de armar (y tener) su propia copia
+DERIVADOS_EN_DISCO = {"tabla_articulos": TablaArticulos, "facetas": Facetas}
+
+def leer_derivados(snap: Snapshot, directorio: str) -> None:
+    """
+    Adjunta al snapshot los índices guardados en su entrada de `directorio`;
+    preparar_snapshot solo arma los que falten.
+    """
+    for nombre, clase in DERIVADOS_EN_DISCO.items():
+        ruta = ruta_derivado(snap.version, nombre, directorio)
+        if ruta is None:
+            continue
+        try:
+            valor = clase.cargar(ruta)
+        except (OSError, ValueError, KeyError) as e:
+            print(f">>> WARNING: {nombre} en disco ilegible, se reconstruye:", repr(e))
+            continue
+        snap.derivado(nombre, lambda s, v=valor: v)
+
+def derivados_a_guardar(snap: Snapshot, catalogo: bool = False) -> dict:
+    # Se llama con los índices ya armados (después de preparar_snapshot)
+    derivados = {
+        "tabla_articulos": tabla_articulos(snap).guardar,
+        "facetas": facetas(snap).guardar,
+    }
+    if catalogo:
+        derivados["catalogo"] = lambda carpeta: escribir_catalogos(snap, carpeta)
+    return derivados
+
 def load_excel_smart() -> pd.DataFrame:
-    global df_global, last_file_id, last_file_name
+    """
+    Consulta Drive y, si apareció un .xlsx más nuevo, lo descarga y publica
+    un snapshot nuevo. Se llama siempre a través de refrescar_snapshot().
+    """
+    actual = snapshots.actual()
 
     try:
-        folder_id = "1F0FUEMJmeHgb3ZY7XBBdacCGB3SZK4O-"
-        archivos = listar_archivos_en_carpeta(folder_id)
+        archivos = listar_archivos_en_carpeta(STOCK_FOLDER_ID)
 
         excel_files = [
             f for f in archivos
@@ -111,53 +259,158 @@ def load_excel_smart() -> pd.DataFrame:
         excel_files.sort(key=lambda x: x.get("modifiedTime", ""), reverse=True)
 
         if not excel_files:
-            if df_global is not None:
-                return df_global
+            if actual is not None:
+                return actual.df
             raise RuntimeError("No se encontraron archivos .xlsx")
 
         newest = excel_files[0]
         file_id = newest.get("id")
-        last_file_name = newest.get("name")
-
-        if last_file_id == file_id and df_global is not None:
-            return df_global
-
-        contenido = descargar_archivo_por_id(file_id)
-        buffer = io.BytesIO(contenido)
-
-        df = pd.read_excel(buffer)
-
-        # ============================================================
-        # FIX CRÍTICO: FORZAR 9 COLUMNAS EXACTAS
-        # ============================================================
-        df = df.iloc[:, :9]
-        df.columns = [
-            "Marca",
-            "Rubro",
-            "Artículo",
-            "Descripción",
-            "Color",
-            "Talle",
-            "Cantidad",
-            "LISTA1",
-            "Valorizado LISTA1",
-        ]
+        modified_time = newest.get("modifiedTime", "")
+        version = f"{file_id}:{modified_time}"
+
+        if actual is not None and actual.version == version:
+            return actual.df
 
-        df_global = df
-        last_file_id = file_id
-        return df_global
+        # Si el proceso se reinició, el mismo archivo ya puede estar en disco
+        snap = cargar_snapshot(version)
+        en_cache = snap is not None
+
+        if en_cache:
+            leer_derivados(snap, SNAPSHOT_CACHE_DIR)
+        else:
+            contenido = descargar_archivo_por_id(file_id)
+            df = leer_excel_stock(contenido)
+
+            snap = Snapshot(
+                df=df,
+                version=version,
+                file_id=file_id,
+                file_name=newest.get("name") or "",
+                modified_time=modified_time,
+            )
+
+        preparar_snapshot(snap, actual)
+
+        if not en_cache:
+            try:
+                guardar_snapshot(snap, derivados=derivados_a_guardar(snap))
+            except Exception as e:
+                print(">>> WARNING: no se pudo guardar la caché del snapshot:", repr(e))
+
+        compartir_snapshot(snap)
+        snapshots.publicar(snap)
+        return snap.df
 
     except Exception:
-        if df_global is not None:
-            return df_global
+        if actual is not None:
+            return actual.df
         raise
+
+# ============================================================
+# SNAPSHOT COMPARTIDO ENTRE WORKERS
+# ============================================================
+
+compartido = SnapshotCompartido()
+
+def compartir_snapshot(snap: Snapshot) -> None:
+    # Con los índices y los cuerpos de /catalog, que los seguidores leen de disco
+    if not compartido.habilitado:
+        return
+    try:
+        compartido.publicar(snap, derivados_a_guardar(snap, catalogo=True))
+    except Exception as e:
+        print(">>> WARNING: no se pudo escribir el snapshot compartido:", repr(e))
+
+def adjuntar_snapshot_compartido(espera: float = 0) -> Optional[pd.DataFrame]:
+    """
+    Equivalente de load_excel_smart para los workers seguidores: no van a
+    Drive, se adjuntan a la versión que escribió el cargador.
+    """
+    actual = snapshots.actual()
+    snap = compartido.adjuntar(actual, espera=espera)
+    if snap is not None:
+        leer_derivados(snap, compartido.directorio)
+        snapshots.publicar(preparar_snapshot(snap, actual))
+        return snap.df
+    return actual.df if actual is not None else None
+
+# ============================================================
+# REFRESCO (SINGLE-FLIGHT)
+# ============================================================
+
+cargas = SingleFlight()
+
+def refrescar_snapshot(timeout: Optional[float] = None) -> Optional[pd.DataFrame]:
+    """
+    load_excel_smart con single-flight: si ya hay una carga en curso (del
+    refresco, de /admin/reload o de un request en frío), se espera esa misma
+    en lugar de descargar y parsear el Excel otra vez.
+    Con SHARED_SNAPSHOT_DIR, solo el worker cargador va a Drive.
+    """
+    if compartido.es_seguidor():
+        refresher.intervalo = SHARED_SNAPSHOT_POLL_SECONDS
+        return cargas.hacer(
+            "refresco",
+            lambda: adjuntar_snapshot_compartido(espera=timeout or 0),
+            timeout=timeout,
+        )
+
+    refresher.intervalo = SNAPSHOT_REFRESH_SECONDS
+    return cargas.hacer("refresco", load_excel_smart, timeout=timeout)
+
+refresher = SnapshotRefresher(refrescar_snapshot)
+
+@app.on_event("startup")
+async def iniciar_refresco():
+    # Arranque en frío: se publica lo último que quedó en disco antes de ir a Drive
+    if snapshots.actual() is None and not compartido.es_seguidor():
+        snap = await en_io(cargar_snapshot)
+        if snap is not None:
+            await en_io(leer_derivados, snap, SNAPSHOT_CACHE_DIR)
+            await en_io(preparar_snapshot, snap)
+            await en_io(compartir_snapshot, snap)
+            snapshots.publicar(snap)
+
+    refresher.iniciar()
+    usuarios.refrescar_en_segundo_plano()
+
+@app.on_event("shutdown")
+async def detener_refresco():
+    refresher.detener()
+    cerrar_ejecucion()
+    await cliente_openrouter.cerrar()
+
+def _esperar_carga() -> Optional[Snapshot]:
+    try:
+        if snapshots.actual() is None:
+            refrescar_snapshot(timeout=SNAPSHOT_WAIT_SECONDS)
+        else:
+            cargas.esperar("refresco", timeout=SNAPSHOT_WAIT_SECONDS)
+    except Exception as e:
+        print(">>> WARNING: carga de snapshot no disponible:", repr(e))
+    return snapshots.actual()
+
+async def obtener_snapshot() -> Snapshot:
+    """
+    Devuelve el snapshot vigente. Mientras se carga uno nuevo se sigue
+    sirviendo el anterior (salvo SNAPSHOT_SERVE_STALE=0). Si todavía no hay
+    ninguno, todos los requests en frío esperan la misma carga.
+    """
+    snap = snapshots.actual()
+    if snap is not None and (SNAPSHOT_SERVE_STALE or not cargas.en_vuelo("refresco")):
+        return snap
+
+    snap = await en_io(_esperar_carga)
+    if snap is None:
+        raise HTTPException(status_code=503, detail="El stock todavía se está cargando")
+    return snap
+
 # ============================================================
 # LOGIN
 # ============================================================
 
 def cargar_usuarios() -> list:
-    folder_id = "1F0FUEMJmeHgb3ZY7XBBdacCGB3SZK4O-"
-    archivos = listar_archivos_en_carpeta(folder_id)
+    archivos = listar_archivos_en_carpeta(STOCK_FOLDER_ID)
 
     json_files = [
         f for f in archivos
@@ -171,23 +424,28 @@ def cargar_usuarios() -> list:
     contenido = descargar_archivo_por_id(file_id)
     return json.loads(contenido.decode("utf-8"))
 
+# Usuarios en memoria: Drive solo se consulta al vencer el TTL
+usuarios = DirectorioUsuarios(cargar_usuarios)
+
 @app.post("/login")
 async def login(request: Request):
     data = await request.json()
     username = data.get("username")
     password = data.get("password")
 
-    usuarios = cargar_usuarios()
+    if not usuarios.vigente():
+        await en_io(usuarios.asegurar)
+
+    u = await en_cpu(usuarios.verificar, username, password)
 
-    for u in usuarios:
-        if u["username"] == username and u["password"] == password:
-            payload = {
-                "username": username,
-                "role": u["role"],
-                "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=12)
-            }
-            token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
-            return {"token": token, "role": u["role"]}
+    if u is not None:
+        payload = {
+            "username": username,
+            "role": u["role"],
+            "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=12)
+        }
+        token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
+        return {"token": token, "role": u["role"]}
 
     raise HTTPException(status_code=401, detail="Credenciales inválidas")
 
@@ -195,142 +453,196 @@ async def login(request: Request):
 # FILTROS
 # ============================================================
 
-def aplicar_filtros_globales(df: pd.DataFrame, filtros: dict) -> pd.DataFrame:
-    df2 = df.copy()
-
-    if filtros.get("marca"):
-        df2 = df2[df2["Marca"] == filtros["marca"]]
-
-    if filtros.get("rubro"):
-        df2 = df2[df2["Rubro"] == filtros["rubro"]]
-
-    if filtros.get("talleDesde") is not None or filtros.get("talleHasta") is not None:
-        df2["__talle_num"] = pd.to_numeric(df2["Talle"], errors="coerce")
-
-        if filtros.get("talleDesde") is not None:
-            df2 = df2[df2["__talle_num"] >= filtros["talleDesde"]]
+def mascara_filtros(snap: Snapshot, filtros: dict) -> np.ndarray:
+    """
+    Máscara booleana (en el orden de las filas del snapshot) con los filtros
+    de marca, rubro y rango de talle, resuelta con los índices de facetas.
+    """
+    return facetas(snap).mascara(filtros)
 
-        if filtros.get("talleHasta") is not None:
-            df2 = df2[df2["__talle_num"] <= filtros["talleHasta"]]
-
-    return df2
+def aplicar_filtros_globales(snap: Snapshot, filtros: dict) -> pd.DataFrame:
+    return snap.df[mascara_filtros(snap, filtros)]
 
 # ============================================================
-# PROCESAMIENTO PRINCIPAL (CORREGIDO)
+# PROCESAMIENTO PRINCIPAL (SOBRE LA TABLA DE ARTÍCULOS)
 # ============================================================
 
-def procesar(df: pd.DataFrame, filtros: dict) -> List[ItemResponse]:
-    df2 = aplicar_filtros_globales(df, filtros)
-
-    if df2.empty:
+def _seleccion_filtros(snap: Snapshot, filtros: dict, mascaras: Optional[dict]) -> np.ndarray:
+    """
+    Máscara de filtros en el orden de la tabla de artículos. Con `mascaras`
+    (un dict por lote de consultas) cada combinación de filtros se resuelve
+    una sola vez.
+    """
+    orden = tabla_articulos(snap).orden
+    if mascaras is None:
+        return mascara_filtros(snap, filtros)[orden]
+
+    clave = clave_consulta(snap.version, filtros)[2:]
+    if clave not in mascaras:
+        mascaras[clave] = mascara_filtros(snap, filtros)[orden]
+    return mascaras[clave].copy()
+
+def procesar(snap: Snapshot, filtros: dict, mascaras: Optional[dict] = None) -> List[dict]:
+    tabla = tabla_articulos(snap)
+
+    # Máscara en el orden de la tabla (filas agrupadas por artículo)
+    with medir_etapa("filtros"):
+        seleccion = _seleccion_filtros(snap, filtros, mascaras)
+
+    if not seleccion.any():
         return []
 
     question = (filtros.get("question") or "").strip().upper()
 
-    df2["__desc"] = df2["Descripción"].astype(str).str.upper()
-    df2["__cod"] = df2["Artículo"].astype(str).str.upper()
-
     if question:
-        exact = df2[df2["__cod"] == question]
-        if not exact.empty:
-            df2 = exact
-        else:
-            mask = df2["__desc"].str.contains(question, na=False)
-            df2 = df2[mask]
+        with medir_etapa("pregunta"):
+            # Código exacto o, si no hay, texto libre literal en la descripción
+            exactos = tabla.grupos_con_pregunta(tabla.grupos_de(seleccion), question)
 
-    items = []
+            elegidos = np.zeros(tabla.n_grupos, dtype=bool)
+            elegidos[exactos] = True
+            seleccion &= elegidos[tabla.grupo_fila]
 
-    for (codigo, descripcion), grupo in df2.groupby(["Artículo", "Descripción"]):
-        cantidades = pd.to_numeric(grupo["Cantidad"], errors="coerce").fillna(0).astype(int)
-        precios = pd.to_numeric(grupo["LISTA1"], errors="coerce").fillna(0).astype(float)
+    # Dicts planos con el formato de ItemResponse, sin objetos pydantic
+    with medir_etapa("agrupado"):
+        return items_de_tabla(tabla, seleccion)
 
-        talles = [
-            TalleItem(talle=str(t), stock=int(s))
-            for t, s in zip(grupo["Talle"], cantidades)
-        ]
-
-        valorizado = float((cantidades * precios).sum())
-        precio_ref = float(precios.iloc[0]) if len(set(precios.tolist())) == 1 else 0.0
-
-        items.append(
-            ItemResponse(
-                codigo=str(codigo),
-                descripcion=str(descripcion),
-                marca=str(grupo["Marca"].iloc[0]),
-                rubro=str(grupo["Rubro"].iloc[0]),
-                color=str(grupo["Color"].iloc[0]),
-                precio=precio_ref,
-                valorizado=valorizado,
-                talles=talles,
-            )
-        )
+# ============================================================
+# CACHÉ DE RESULTADOS DE /query
+# ============================================================
 
+def _tamano_items(items: List[dict]) -> int:
+    # Estimación gruesa de memoria: dicts, strings y talles de cada item
+    total = 64
+    for item in items:
+        total += 400 + len(item["codigo"]) + len(item["descripcion"]) + 120 * len(item["talles"])
+    return total
+
+cache_resultados = CacheLRU(tamano=_tamano_items)
+snapshots.al_publicar(cache_resultados.limpiar)
+
+def consultar(snap: Snapshot, filtros: dict, mascaras: Optional[dict] = None) -> List[dict]:
+    """
+    procesar() con caché LRU por versión de snapshot y filtros normalizados.
+    Los items guardados conservan el valorizado; el enmascarado por rol se
+    hace al responder, sin tocar la copia cacheada.
+    """
+    question = filtros.get("question")
+    if question is not None and not isinstance(question, str):
+        raise TypeError("question debe ser texto")
+
+    clave = clave_consulta(snap.version, filtros)
+    try:
+        hash(clave)
+    except TypeError:
+        return procesar(snap, filtros)
+
+    items = cache_resultados.obtener(clave)
+    if items is None:
+        items = procesar(snap, filtros, mascaras)
+        cache_resultados.guardar(clave, items)
     return items
+
 # ============================================================
 # ENDPOINT: CATALOGO (ROBUSTO)
 # ============================================================
 
+async def _partes_en_cpu(partes):
+    """
+    Recorre un generador de partes del cuerpo en el pool de CPU, de a una
+    parte por vez, sin bloquear el event loop.
+    """
+    while True:
+        parte = await en_cpu(next, partes, None)
+        if parte is None:
+            return
+        yield parte
+
+
 @app.get("/catalog")
-async def get_catalog(request: Request):
+async def get_catalog(request: Request, stream: Optional[str] = None):
     role = request.state.user["role"]
 
-    df = load_excel_smart()
-
-    resumen = {
-        "archivo": last_file_name or "No informado",
-        "fecha": "Automático",
-        "marcas": df["Marca"].nunique(),
-        "rubros": df["Rubro"].nunique(),
-        "articulos": len(df),
-        "stock_total": int(df["Cantidad"].sum()),
-        "stock_negativo": int((df["Cantidad"] < 0).sum()),
+    try:
+        formato = formato_stream(request.headers.get("accept"), stream)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    snap = await obtener_snapshot()
+    variante = variante_para_rol(role)
+    comprimido = formato is None and "gzip" in request.headers.get("accept-encoding", "")
+    etag = etag_catalogo(snap, variante, formato or "", comprimido)
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Vary": "Authorization, Accept, Accept-Encoding",
     }
 
-    items = []
-    for _, row in df.iterrows():
-        try:
-            marca = str(row.get("Marca", "") or "")
-            rubro = str(row.get("Rubro", "") or "")
-            codigo = str(row.get("Artículo", "") or "")
-            descripcion = str(row.get("Descripción", "") or "")
-            color = str(row.get("Color", "") or "")
-            talle = str(row.get("Talle", "") or "")
-
-            stock = int(pd.to_numeric(row.get("Cantidad", 0), errors="coerce") or 0)
-            precio = float(pd.to_numeric(row.get("LISTA1", 0), errors="coerce") or 0)
-            valorizado = float(pd.to_numeric(row.get("Valorizado LISTA1", 0), errors="coerce") or 0)
-
-            if role != "admin":
-                valorizado = 0.0
-
-            items.append({
-                "marca": marca,
-                "rubro": rubro,
-                "codigo": codigo,
-                "descripcion": descripcion,
-                "color": color,
-                "talle": talle,
-                "stock": stock,
-                "precio": precio,
-                "valorizado": valorizado,
-            })
-
-        except Exception as e:
-            print(">>> WARNING: fila inválida en /catalog:", repr(e))
-            continue
+    if coincide_etag(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    # Streaming: las filas se arman por lotes mientras se envían
+    if formato is not None:
+        return StreamingResponse(
+            _partes_en_cpu(stream_catalogo(snap, variante, formato)),
+            media_type=MEDIA_TYPES_STREAM[formato],
+            headers=headers,
+        )
+
+    if comprimido:
+        headers["Content-Encoding"] = "gzip"
+
+    # Con snapshot compartido el cuerpo ya está escrito en disco: se envía
+    # desde el archivo en lugar de guardar una copia en cada worker
+    archivo = abrir_catalogo(ruta_derivado(snap.version, "catalogo", compartido.directorio), variante, comprimido)
+    if archivo is not None:
+        headers["Content-Length"] = str(os.fstat(archivo.fileno()).st_size)
+        return StreamingResponse(partes_archivo(archivo), media_type="application/json", headers=headers)
+
+    cuerpo = await en_cpu(catalogo_serializado, snap, variante, comprimido)
+    return Response(content=cuerpo, media_type="application/json", headers=headers)
+
+# ============================================================
+# ENDPOINT: FACETAS (CONTEOS PARA LOS DESPLEGABLES)
+# ============================================================
+
+@app.get("/facets")
+async def get_facets(
+    marca: Optional[str] = None,
+    rubro: Optional[str] = None,
+    talleDesde: Optional[float] = None,
+    talleHasta: Optional[float] = None,
+):
+    filtros = {
+        "marca": marca,
+        "rubro": rubro,
+        "talleDesde": talleDesde,
+        "talleHasta": talleHasta,
+    }
 
-    return {"items": items, "resumen": resumen}
+    snap = await obtener_snapshot()
+    return await en_cpu(lambda: facetas(snap).conteos(filtros))
 
 # ============================================================
 # ENDPOINT: QUERY
 # ============================================================
 
-@app.post("/query", response_model=QueryResponse)
-async def query_stock(request: Request):
-    role = request.state.user["role"]
-    raw = await request.json()
+def responder_query(snap: Snapshot, filtros: dict, role: str) -> Response:
+    items = consultar(snap, filtros)
 
-    filtros = {
+    if role != "admin":
+        with medir_etapa("enmascarado"):
+            items = enmascarar(items)
+
+    # Se serializa acá (en el pool de CPU) y no en el event loop; mismo
+    # JSON que QueryResponse, sin reconstruir los modelos
+    with medir_etapa("json"):
+        cuerpo = serializar_items(items)
+    return Response(content=cuerpo, media_type="application/json")
+
+def _filtros_de(raw: dict) -> dict:
+    return {
         "question": raw.get("question"),
         "marca": raw.get("marca"),
         "rubro": raw.get("rubro"),
@@ -338,11 +650,150 @@ async def query_stock(request: Request):
         "talleHasta": raw.get("talleHasta"),
     }
 
-    df = load_excel_smart()
-    items = procesar(df, filtros)
+@app.post("/query", response_model=QueryResponse)
+async def query_stock(request: Request):
+    role = request.state.user["role"]
+    raw = await request.json()
 
-    if role != "admin":
-        for item in items:
-            item.valorizado = 0.0
+    filtros = _filtros_de(raw)
+
+    snap = await obtener_snapshot()
+    return await en_cpu(responder_query, snap, filtros, role)
+
+# ============================================================
+# ENDPOINT: QUERY EN LOTE
+# ============================================================
+
+def responder_batch(snap: Snapshot, consultas: List[dict], role: str) -> Response:
+    """
+    Evalúa todas las consultas contra el mismo snapshot, en orden. Las
+    máscaras de filtros se comparten entre consultas con los mismos
+    filtros, y cada una pasa por la misma caché que /query.
+    """
+    mascaras: dict = {}
+    resultados = []
+
+    for filtros in consultas:
+        inicio = time.perf_counter()
+        resultado: dict = {"items": []}
+        try:
+            items = consultar(snap, filtros, mascaras)
+            resultado["items"] = items if role == "admin" else enmascarar(items)
+        except (TypeError, ValueError) as e:
+            resultado["error"] = f"Consulta inválida: {e}"
+        resultado["ms"] = round((time.perf_counter() - inicio) * 1000, 3)
+        resultados.append(resultado)
+
+    with medir_etapa("json"):
+        cuerpo = serializar_lote(resultados)
+    return Response(content=cuerpo, media_type="application/json")
+
+@app.post("/query/batch")
+async def query_batch(request: Request):
+    """
+    Body: una lista de consultas (los mismos campos que /query), o
+    {"consultas": [...]}. Responde {"resultados": [...]} en el mismo orden,
+    cada uno con sus items y "ms".
+    """
+    role = request.state.user["role"]
+    raw = await request.json()
+
+    consultas = raw.get("consultas") if isinstance(raw, dict) else raw
+    if not isinstance(consultas, list) or not all(isinstance(c, dict) for c in consultas):
+        raise HTTPException(status_code=400, detail="Se espera una lista de consultas")
+    if len(consultas) > QUERY_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"Máximo {QUERY_BATCH_MAX} consultas por lote")
+
+    filtros = [_filtros_de(c) for c in consultas]
+
+    snap = await obtener_snapshot()
+    return await en_cpu(responder_batch, snap, filtros, role)
+
+# ============================================================
+# ENDPOINTS: ADMINISTRACIÓN DEL SNAPSHOT
+# ============================================================
+
+def _requerir_admin(request: Request):
+    if request.state.user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Solo administradores")
+
+@app.post("/admin/reload")
+async def admin_reload(request: Request, esperar: bool = False):
+    _requerir_admin(request)
+
+    if esperar:
+        await en_io(refresher.ejecutar)
+    else:
+        refresher.solicitar()
+
+    return await admin_estado(request)
+
+@app.get("/admin/estado")
+async def admin_estado(request: Request):
+    _requerir_admin(request)
+
+    snap = snapshots.actual()
+    return {
+        "version": snap.version if snap else None,
+        "archivo": snap.file_name if snap else None,
+        "filas": len(snap.df) if snap else 0,
+        "cargado": snap.loaded_at if snap else None,
+        "ultimo_refresco": refresher.ultimo_refresco,
+        "ultimo_error": refresher.ultimo_error,
+        "cargas": cargas.estadisticas(),
+        "intervalo": refresher.intervalo,
+        "cargador": not compartido.es_seguidor(),
+        "drive": obtener_cliente().estadisticas(),
+        "cache_query": cache_resultados.estadisticas(),
+        "usuarios": usuarios.estadisticas(),
+        "memoria_columnas": _memoria_snapshot(snap) if snap else {},
+    }
+
+# ============================================================
+# MÉTRICAS (PROMETHEUS)
+# ============================================================
+
+snapshots.al_publicar(lambda *_: metricas.incrementar("stock_snapshot_publicaciones_total"))
+
+def _memoria_snapshot(snap: Snapshot) -> Dict[str, int]:
+    return snap.derivado("memoria", lambda s: memoria_por_columna(s.df))
+
+def _colector_estado():
+    snap = snapshots.actual()
+    if snap is not None:
+        yield "stock_snapshot_filas", "gauge", {}, len(snap.df)
+        memoria = _memoria_snapshot(snap)
+        yield "stock_snapshot_bytes", "gauge", {}, sum(memoria.values())
+        for columna, valor in memoria.items():
+            yield "stock_snapshot_columna_bytes", "gauge", {"columna": columna}, valor
+        yield "stock_snapshot_info", "gauge", {"version": snap.version, "archivo": snap.file_name}, 1
+
+    yield "stock_snapshot_ultimo_refresco_timestamp", "gauge", {}, refresher.ultimo_refresco
+    yield "stock_snapshot_refresco_con_error", "gauge", {}, int(refresher.ultimo_error is not None)
+
+    for clave, valor in cargas.estadisticas().items():
+        yield "stock_snapshot_cargas_total", "counter", {"tipo": clave}, valor
+
+    cache = cache_resultados.estadisticas()
+    for clave in ("aciertos", "fallos", "desalojos"):
+        yield "stock_cache_query_total", "counter", {"resultado": clave}, cache[clave]
+    yield "stock_cache_query_entradas", "gauge", {}, cache["entradas"]
+    yield "stock_cache_query_bytes", "gauge", {}, cache["bytes"]
+    consultas = cache["aciertos"] + cache["fallos"]
+    yield "stock_cache_query_tasa_aciertos", "gauge", {}, cache["aciertos"] / consultas if consultas else 0.0
+
+    for clave, valor in obtener_cliente().estadisticas().items():
+        yield "stock_drive_operaciones_total", "counter", {"tipo": clave}, valor
+
+    yield "stock_usuarios", "gauge", {}, usuarios.estadisticas()["usuarios"]
+
+metricas.registrar_colector(_colector_estado)
+
+@app.get("/metrics")
+async def get_metrics(request: Request):
+    _requerir_admin(request)
+    if not metricas.habilitado:
+        raise HTTPException(status_code=404, detail="Métricas deshabilitadas")
 
-    return QueryResponse(items=items)
+    texto = await en_cpu(metricas.exportar)
+    return Response(content=texto, media_type=METRICS_CONTENT_TYPE)
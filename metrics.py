@@ -0,0 +1,211 @@
+import bisect
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+# Límites de los buckets de latencia, en segundos
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Etiquetas = Tuple[Tuple[str, str], ...]
+
+# ============================================================
+# HISTOGRAMA
+# ============================================================
+
+class Histograma:
+    __slots__ = ("cuentas", "suma", "total")
+
+    def __init__(self, n_buckets: int):
+        self.cuentas = [0] * (n_buckets + 1)
+        self.suma = 0.0
+        self.total = 0
+
+
+class _Cronometro:
+    __slots__ = ("_metricas", "_nombre", "_etiquetas", "_inicio")
+
+    def __init__(self, metricas: "Metricas", nombre: str, etiquetas: Etiquetas):
+        self._metricas = metricas
+        self._nombre = nombre
+        self._etiquetas = etiquetas
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._metricas._observar(self._nombre, self._etiquetas, time.perf_counter() - self._inicio)
+        return False
+
+
+class _Nulo:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULO = _Nulo()
+
+# ============================================================
+# REGISTRO
+# ============================================================
+
+def _etiquetas(valores: Dict[str, object]) -> Etiquetas:
+    return tuple(sorted((k, str(v)) for k, v in valores.items()))
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatear(etiquetas: Etiquetas, extra: Etiquetas = ()) -> str:
+    pares = etiquetas + extra
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+
+def _numero(v: float) -> str:
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Metricas:
+    """
+    Histogramas de latencia y contadores en memoria, exportados en el
+    formato de texto de Prometheus. Los valores que ya llevan otros
+    componentes (cachés, Drive, snapshot) se leen recién al exportar, con
+    colectores registrados en `registrar_colector`.
+
+    Deshabilitado (METRICS_ENABLED=0), medir() no toma tiempos.
+    """
+
+    def __init__(self, habilitado: bool = METRICS_ENABLED, buckets: Tuple[float, ...] = BUCKETS):
+        self.habilitado = habilitado
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histogramas: Dict[str, Dict[Etiquetas, Histograma]] = {}
+        self._contadores: Dict[str, Dict[Etiquetas, float]] = {}
+        self._ayuda: Dict[str, str] = {}
+        self._colectores: List[Callable[[], Iterable[tuple]]] = []
+
+    def describir(self, nombre: str, ayuda: str) -> None:
+        self._ayuda[nombre] = ayuda
+
+    # ---------------------------------------------------------
+    # REGISTRO DE VALORES
+    # ---------------------------------------------------------
+    def _observar(self, nombre: str, etiquetas: Etiquetas, valor: float) -> None:
+        i = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._histogramas.setdefault(nombre, {})
+            h = serie.get(etiquetas)
+            if h is None:
+                h = serie[etiquetas] = Histograma(len(self.buckets))
+            h.cuentas[i] += 1
+            h.suma += valor
+            h.total += 1
+
+    def observar(self, nombre: str, valor: float, **etiquetas) -> None:
+        if self.habilitado:
+            self._observar(nombre, _etiquetas(etiquetas), valor)
+
+    def medir(self, nombre: str, **etiquetas):
+        """
+        Context manager que observa en el histograma `nombre` lo que tarda
+        el bloque.
+        """
+        if not self.habilitado:
+            return _NULO
+        return _Cronometro(self, nombre, _etiquetas(etiquetas))
+
+    def incrementar(self, nombre: str, valor: float = 1, **etiquetas) -> None:
+        if not self.habilitado:
+            return
+        clave = _etiquetas(etiquetas)
+        with self._lock:
+            serie = self._contadores.setdefault(nombre, {})
+            serie[clave] = serie.get(clave, 0) + valor
+
+    def registrar_colector(self, colector: Callable[[], Iterable[tuple]]) -> None:
+        """
+        `colector()` devuelve tuplas (nombre, tipo, etiquetas, valor), con
+        tipo "gauge" o "counter"; se llama en cada exportación.
+        """
+        self._colectores.append(colector)
+
+    # ---------------------------------------------------------
+    # EXPORTACIÓN
+    # ---------------------------------------------------------
+    def _encabezado(self, lineas: List[str], nombre: str, tipo: str) -> None:
+        if nombre in self._ayuda:
+            lineas.append(f"# HELP {nombre} {self._ayuda[nombre]}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+
+    def exportar(self) -> str:
+        lineas: List[str] = []
+        limites = [_numero(b) for b in self.buckets] + ["+Inf"]
+
+        with self._lock:
+            histogramas = {
+                n: {k: (list(h.cuentas), h.suma, h.total) for k, h in s.items()}
+                for n, s in self._histogramas.items()
+            }
+            contadores = {n: dict(s) for n, s in self._contadores.items()}
+
+        for nombre in sorted(histogramas):
+            self._encabezado(lineas, nombre, "histogram")
+            for etiquetas, (cuentas, suma, total) in sorted(histogramas[nombre].items()):
+                acumulado = 0
+                for limite, cuenta in zip(limites, cuentas):
+                    acumulado += cuenta
+                    lineas.append(f"{nombre}_bucket{_formatear(etiquetas, (('le', limite),))} {acumulado}")
+                lineas.append(f"{nombre}_sum{_formatear(etiquetas)} {_numero(suma)}")
+                lineas.append(f"{nombre}_count{_formatear(etiquetas)} {total}")
+
+        for nombre in sorted(contadores):
+            self._encabezado(lineas, nombre, "counter")
+            for etiquetas, valor in sorted(contadores[nombre].items()):
+                lineas.append(f"{nombre}{_formatear(etiquetas)} {_numero(valor)}")
+
+        familias: Dict[str, Tuple[str, List[Tuple[Etiquetas, float]]]] = {}
+        for colector in self._colectores:
+            try:
+                for nombre, tipo, etiquetas, valor in colector():
+                    if valor is None:
+                        continue
+                    familias.setdefault(nombre, (tipo, []))[1].append((_etiquetas(etiquetas), valor))
+            except Exception as e:
+                print(">>> WARNING: colector de métricas falló:", repr(e))
+
+        for nombre in sorted(familias):
+            tipo, muestras = familias[nombre]
+            self._encabezado(lineas, nombre, tipo)
+            for etiquetas, valor in muestras:
+                lineas.append(f"{nombre}{_formatear(etiquetas)} {_numero(valor)}")
+
+        return "\n".join(lineas) + "\n"
+
+
+metricas = Metricas()
+
+metricas.describir("stock_etapa_segundos", "Duración de cada etapa del pipeline (Drive, parseo, filtros, JSON...)")
+metricas.describir("stock_http_segundos", "Duración de los requests por endpoint")
+metricas.describir("stock_snapshot_publicaciones_total", "Snapshots nuevos publicados")
+
+
+def medir_etapa(etapa: str):
+    """
+    Atajo para el histograma de etapas: `with medir_etapa("drive_listado"): ...`
+    """
+    return metricas.medir("stock_etapa_segundos", etapa=etapa)
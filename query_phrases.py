@@ -0,0 +1,165 @@
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# ============================================================
+# TABLAS DE FRASES
+# ============================================================
+
+# Palabras clave de cada intención, en orden de prioridad
+INTENCIONES: List[Tuple[str, List[str]]] = [
+    ("consulta_stock", [
+        "stock", "hay de", "hay del", "talle", "talles", "disponible",
+        "disponibles", "disponibilidad",
+    ]),
+    ("consulta_precio", [
+        "precio", "precios", "cuanto sale", "cuanto salen", "lista", "listas",
+        "vale", "valen", "publico", "costo", "costos",
+    ]),
+]
+
+# Frases que no aportan significado a la búsqueda
+FRASES_VACIAS = [
+    "dime", "decime", "mostrame", "mostrar", "que hay", "qué hay",
+    "que tenes", "qué tenés", "quiero ver", "hay", "tengo", "busco",
+    "necesito", "decime que hay", "mostrame que hay", "cuantos", "cuánto"
+]
+
+# Sinónimos
+SINONIMOS = {
+    "pelota": "balon",
+    "pelotas": "balon",
+    "balon": "balon",
+    "balones": "balon",
+    "remera": "camiseta",
+    "remeras": "camiseta",
+    "zapatilla": "calzado",
+    "zapatillas": "calzado",
+    "gorra": "gorra",
+    "buzo": "hoodie",
+    "ojota": "ojotas",
+    "ojotas": "ojotas",
+    "sandalia": "sandalia",
+    "sandalias": "sandalia"
+}
+
+# ============================================================
+# NORMALIZACIÓN
+# ============================================================
+
+def normalizar(texto: str) -> str:
+    """
+    Minúsculas, sin acentos y solo letras y números separados por un
+    espacio. Es la normalización del texto indexado (Indexer), de las
+    consultas y de las fichas de artículo.
+    """
+    texto = str(texto).lower()
+    texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+    texto = re.sub(r"[^a-z0-9 ]", " ", texto)
+    return re.sub(r"\s+", " ", texto).strip()
+
+# ============================================================
+# AUTÓMATA DE FRASES POR PALABRAS
+# ============================================================
+
+# Clave de los nodos del trie donde termina una frase
+_FIN = ""
+
+
+@dataclass
+class AnalisisConsulta:
+    tokens: List[str]
+    # Intenciones con alguna palabra clave en la consulta, y la de mayor prioridad
+    intenciones: Set[str] = field(default_factory=set)
+    intencion: str = "general"
+    # Consulta sin frases vacías y con los sinónimos reemplazados
+    limpio: str = ""
+
+
+class AnalizadorConsulta:
+    """
+    Trie de palabras con todas las frases (palabras clave de intención,
+    frases vacías y sinónimos), armado una vez. Como las frases se comparan
+    palabra por palabra, solo coinciden palabras completas ("hay" no toca
+    "playa").
+
+    analizar() recorre la consulta una sola vez: desde cada palabra baja por
+    el trie (a lo sumo tantos pasos como palabras tiene la frase más larga),
+    anota las intenciones y se queda con la frase vacía o sinónimo más largo
+    que empiece ahí.
+    """
+
+    def __init__(self, intenciones: Sequence[Tuple[str, Iterable[str]]] = INTENCIONES,
+                 frases_vacias: Iterable[str] = FRASES_VACIAS,
+                 sinonimos: Optional[Dict[str, str]] = None):
+        self.prioridad = [nombre for nombre, _ in intenciones]
+        self._raiz: dict = {}
+
+        for nombre, frases in intenciones:
+            for frase in frases:
+                self._nodo(frase)["intencion"] = nombre
+        for frase in frases_vacias:
+            self._nodo(frase)["reemplazo"] = ""
+        for palabra, canonica in (SINONIMOS if sinonimos is None else sinonimos).items():
+            self._nodo(palabra)["reemplazo"] = normalizar(canonica)
+
+    def _nodo(self, frase: str) -> dict:
+        nodo = self._raiz
+        for palabra in normalizar(frase).split():
+            nodo = nodo.setdefault(palabra, {})
+        return nodo.setdefault(_FIN, {})
+
+    def analizar(self, texto: str) -> AnalisisConsulta:
+        tokens = normalizar(texto).split()
+        resultado = AnalisisConsulta(tokens=tokens)
+        intenciones = resultado.intenciones
+        raiz = self._raiz
+        salida: List[str] = []
+        # Primera palabra que no quedó dentro de una frase ya reemplazada
+        libre = 0
+
+        for i, token in enumerate(tokens):
+            nodo = raiz.get(token)
+            if nodo is None:
+                if i >= libre:
+                    salida.append(token)
+                continue
+
+            reemplazo, fin = None, i
+            j = i
+            while nodo is not None:
+                datos = nodo.get(_FIN)
+                if datos is not None:
+                    if "intencion" in datos:
+                        intenciones.add(datos["intencion"])
+                    if "reemplazo" in datos:
+                        reemplazo, fin = datos["reemplazo"], j + 1
+                j += 1
+                nodo = nodo.get(tokens[j]) if j < len(tokens) else None
+
+            if i < libre:
+                continue
+            if reemplazo is None:
+                salida.append(token)
+            else:
+                if reemplazo:
+                    salida.append(reemplazo)
+                libre = fin
+
+        resultado.limpio = " ".join(salida)
+        for nombre in self.prioridad:
+            if nombre in intenciones:
+                resultado.intencion = nombre
+                break
+        return resultado
+
+    def intencion(self, texto: str) -> str:
+        """
+        La intención de mayor prioridad presente en el texto ("general" si
+        no hay ninguna).
+        """
+        return self.analizar(texto).intencion
+
+
+analizador = AnalizadorConsulta()
@@ -0,0 +1,79 @@
+import os
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+from article_table import TablaArticulos
+from json_body import serializar_json
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+# Items por llamada a json.dumps. Cada llamada retiene el GIL entera:
+# con lotes chicos el event loop puede correr entre uno y otro.
+QUERY_JSON_BATCH = int(os.getenv("QUERY_JSON_BATCH", "500"))
+
+# ============================================================
+# ITEMS COMO DICTS PLANOS
+# ============================================================
+
+def items_de_tabla(tabla: TablaArticulos, seleccion: np.ndarray) -> List[Dict[str, Any]]:
+    """
+    Items de /query armados directo desde la tabla de artículos, como dicts
+    con las mismas claves y en el mismo orden que ItemResponse/TalleItem
+    (lo que daba QueryResponse.model_dump(mode="json")).
+    """
+    return [
+        {
+            "codigo": codigo,
+            "descripcion": descripcion,
+            "marca": marca,
+            "rubro": rubro,
+            "color": color,
+            "precio": precio,
+            "valorizado": valorizado,
+            "talles": [{"talle": t, "stock": s} for t, s in talles],
+        }
+        for codigo, descripcion, marca, rubro, color, precio, valorizado, talles
+        in tabla.articulos(seleccion)
+    ]
+
+
+def enmascarar(items: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Copias para roles no admin, con valorizado en 0. Los talles se comparten
+    con el original (no se modifican).
+    """
+    return [{**item, "valorizado": 0.0} for item in items]
+
+# ============================================================
+# SERIALIZACIÓN POR LOTES
+# ============================================================
+
+def serializar_items(items: List[Dict[str, Any]], lote: int = QUERY_JSON_BATCH) -> bytes:
+    """
+    Cuerpo {"items": [...]} idéntico byte a byte a JSONResponse, pero
+    codificado de a `lote` items.
+    """
+    lote = max(lote, 1)
+    if len(items) <= lote:
+        return serializar_json({"items": items})
+
+    # Cada lote se codifica como lista y se le sacan los corchetes
+    partes = [serializar_json(items[i:i + lote])[1:-1] for i in range(0, len(items), lote)]
+    return b'{"items":[' + b",".join(partes) + b"]}"
+
+
+def serializar_lote(resultados: List[Dict[str, Any]], lote: int = QUERY_JSON_BATCH) -> bytes:
+    """
+    Cuerpo de /query/batch: {"resultados": [...]}, donde cada resultado es
+    el mismo objeto que devuelve /query más "ms" (y "error" si falló).
+    Los items de cada resultado se codifican por lotes como en /query.
+    """
+    partes = []
+    for r in resultados:
+        extra = {k: v for k, v in r.items() if k != "items"}
+        cuerpo = serializar_items(r.get("items", []), lote)
+        partes.append(cuerpo[:-1] + b"," + serializar_json(extra)[1:])
+    return b'{"resultados":[' + b",".join(partes) + b"]}"
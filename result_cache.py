@@ -0,0 +1,114 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "256"))
+QUERY_CACHE_MAX_BYTES = int(os.getenv("QUERY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# ============================================================
+# CACHÉ LRU ACOTADA
+# ============================================================
+
+class CacheLRU:
+    """
+    Caché LRU acotada por cantidad de entradas y por bytes (estimados con
+    `tamano`). Es thread-safe y lleva contadores de aciertos, fallos y
+    desalojos.
+    """
+
+    def __init__(self, max_entradas: int = QUERY_CACHE_MAX_ENTRIES,
+                 max_bytes: int = QUERY_CACHE_MAX_BYTES,
+                 tamano: Callable[[Any], int] = lambda v: 1):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._tamano = tamano
+        self._datos: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def obtener(self, clave: Hashable, vigente: Optional[Callable[[Any], bool]] = None) -> Optional[Any]:
+        """
+        Valor guardado para `clave`, o None. Si se pasa `vigente` y el valor
+        ya no lo está, se descarta y cuenta como fallo.
+        """
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None and vigente is not None and not vigente(entrada[0]):
+                del self._datos[clave]
+                self._bytes -= entrada[1]
+                entrada = None
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[0]
+
+    def guardar(self, clave: Hashable, valor: Any) -> None:
+        tamano = self._tamano(valor)
+        if tamano > self.max_bytes or self.max_entradas <= 0:
+            return
+
+        with self._lock:
+            anterior = self._datos.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= anterior[1]
+
+            self._datos[clave] = (valor, tamano)
+            self._bytes += tamano
+
+            while len(self._datos) > self.max_entradas or self._bytes > self.max_bytes:
+                _, (_, t) = self._datos.popitem(last=False)
+                self._bytes -= t
+                self.desalojos += 1
+
+    def limpiar(self, *_: Any) -> None:
+        with self._lock:
+            self._datos.clear()
+            self._bytes = 0
+
+    def estadisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entradas": len(self._datos),
+                "bytes": self._bytes,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "desalojos": self.desalojos,
+            }
+
+# ============================================================
+# CLAVE NORMALIZADA DE /query
+# ============================================================
+
+def _numero_o_valor(v: Any) -> Any:
+    if v is None:
+        return None
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return v
+
+
+def clave_consulta(version: str, filtros: dict) -> tuple:
+    """
+    Clave de caché: la versión del snapshot más los filtros normalizados de
+    la misma forma en que los interpreta procesar (pregunta sin espacios y
+    en mayúsculas, filtros vacíos como None, talles como float).
+    """
+    return (
+        version,
+        (filtros.get("question") or "").strip().upper(),
+        filtros.get("marca") or None,
+        filtros.get("rubro") or None,
+        _numero_o_valor(filtros.get("talleDesde")),
+        _numero_o_valor(filtros.get("talleHasta")),
+    )
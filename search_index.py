@@ -0,0 +1,128 @@
+import json
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Set
+
+import numpy as np
+
+# ============================================================
+# ÍNDICE INVERTIDO SOBRE EL TEXTO NORMALIZADO
+# ============================================================
+
+_VACIO = np.empty(0, dtype=np.int64)
+
+
+class IndiceInvertido:
+    """
+    Índice token → filas (ordenadas) sobre textos ya normalizados
+    (minúsculas, sin acentos, separados por un espacio).
+
+    Una palabra de la consulta coincide con una fila si es substring de
+    alguno de sus tokens, igual que `w in texto`. Para resolver eso sin
+    recorrer las filas se indexan los n-gramas (1 a 3 caracteres) de cada
+    token del vocabulario.
+    """
+
+    N = 3
+
+    def __init__(self, textos: Sequence[str]):
+        filas_por_token: Dict[str, List[int]] = defaultdict(list)
+
+        for fila, texto in enumerate(textos):
+            for token in set(texto.split()):
+                filas_por_token[token].append(fila)
+
+        self.vocabulario: List[str] = list(filas_por_token)
+        self.postings: List[np.ndarray] = [
+            np.asarray(filas_por_token[t], dtype=np.int64) for t in self.vocabulario
+        ]
+        self.total_filas = len(textos)
+        self._indexar_ngramas()
+
+    def _indexar_ngramas(self) -> None:
+        ngramas: Dict[str, Set[int]] = defaultdict(set)
+        for tid, token in enumerate(self.vocabulario):
+            for n in range(1, self.N + 1):
+                for i in range(len(token) - n + 1):
+                    ngramas[token[i:i + n]].add(tid)
+        self._ngramas = dict(ngramas)
+
+    # ---------------------------------------------------------
+    # PERSISTENCIA
+    # ---------------------------------------------------------
+    def guardar(self, directorio: str) -> None:
+        """
+        Vocabulario en JSON y postings concatenadas con sus cortes en .npy.
+        Los n-gramas no se guardan: se recalculan del vocabulario al cargar.
+        """
+        largos = np.fromiter((len(p) for p in self.postings), dtype=np.int64, count=len(self.postings))
+        cortes = np.concatenate([[0], np.cumsum(largos)])
+        filas = np.concatenate(self.postings) if self.postings else _VACIO
+        np.save(os.path.join(directorio, "postings.npy"), filas, allow_pickle=False)
+        np.save(os.path.join(directorio, "cortes.npy"), cortes, allow_pickle=False)
+        with open(os.path.join(directorio, "vocabulario.json"), "w", encoding="utf-8") as f:
+            json.dump({"total_filas": self.total_filas, "vocabulario": self.vocabulario}, f, ensure_ascii=False)
+
+    @classmethod
+    def cargar(cls, directorio: str) -> "IndiceInvertido":
+        with open(os.path.join(directorio, "vocabulario.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        filas = np.load(os.path.join(directorio, "postings.npy"), allow_pickle=False)
+        cortes = np.load(os.path.join(directorio, "cortes.npy"), allow_pickle=False)
+
+        indice = cls.__new__(cls)
+        indice.vocabulario = meta["vocabulario"]
+        indice.total_filas = meta["total_filas"]
+        indice.postings = [filas[a:b] for a, b in zip(cortes[:-1].tolist(), cortes[1:].tolist())]
+        indice._indexar_ngramas()
+        return indice
+
+    def tokens_que_contienen(self, palabra: str) -> Iterable[int]:
+        """
+        Ids de los tokens del vocabulario que contienen `palabra`.
+        """
+        if len(palabra) <= self.N:
+            return self._ngramas.get(palabra, ())
+
+        trigramas = {palabra[i:i + self.N] for i in range(len(palabra) - self.N + 1)}
+        conjuntos = []
+        for tg in trigramas:
+            ids = self._ngramas.get(tg)
+            if not ids:
+                return ()
+            conjuntos.append(ids)
+
+        conjuntos.sort(key=len)
+        candidatos = set(conjuntos[0]).intersection(*conjuntos[1:])
+        return [tid for tid in candidatos if palabra in self.vocabulario[tid]]
+
+    def filas_de(self, palabra: str) -> np.ndarray:
+        listas = [self.postings[tid] for tid in self.tokens_que_contienen(palabra)]
+        if not listas:
+            return _VACIO
+        if len(listas) == 1:
+            return listas[0]
+        return np.unique(np.concatenate(listas))
+
+    def buscar(self, palabras: Sequence[str]) -> np.ndarray:
+        """
+        Filas (en orden) que contienen todas las palabras: intersección
+        de las listas de cada palabra, empezando por la más corta.
+        """
+        if not palabras:
+            return np.arange(self.total_filas, dtype=np.int64)
+
+        listas = []
+        for palabra in set(palabras):
+            filas = self.filas_de(palabra)
+            if len(filas) == 0:
+                return _VACIO
+            listas.append(filas)
+
+        listas.sort(key=len)
+        resultado = listas[0]
+        for filas in listas[1:]:
+            resultado = np.intersect1d(resultado, filas, assume_unique=True)
+            if len(resultado) == 0:
+                break
+        return resultado
@@ -0,0 +1,101 @@
+import os
+import time
+from typing import Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin coordinación entre procesos
+    fcntl = None
+
+from snapshot import Snapshot
+from snapshot_cache import cargar_snapshot, entrada_publicada, guardar_snapshot, nombre_entrada
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+# Carpeta compartida entre workers de uvicorn (idealmente en /dev/shm).
+# Vacía = cada proceso carga su propio snapshot desde Drive.
+SHARED_SNAPSHOT_DIR = os.getenv("SHARED_SNAPSHOT_DIR", "")
+
+# Cada cuántos segundos un worker seguidor mira si hay una versión nueva
+SHARED_SNAPSHOT_POLL_SECONDS = float(os.getenv("SHARED_SNAPSHOT_POLL_SECONDS", "2"))
+
+_LOCK_CARGADOR = "loader.lock"
+
+# ============================================================
+# SNAPSHOT COMPARTIDO ENTRE PROCESOS
+# ============================================================
+
+class SnapshotCompartido:
+    """
+    Coordina el snapshot entre varios workers:
+    - Un solo proceso (el que tiene el lock de `loader.lock`) va a Drive,
+      parsea el Excel y escribe el snapshot columnar en la carpeta compartida.
+    - Los demás solo se adjuntan a la última versión escrita, mapeando las
+      columnas con mmap: los arrays numéricos no se copian por proceso. La
+      tabla de artículos, las facetas y los cuerpos de /catalog también se
+      escriben una vez y se leen desde la carpeta.
+    Si el cargador muere, el lock se libera y otro worker toma su lugar.
+    """
+
+    def __init__(self, directorio: str = SHARED_SNAPSHOT_DIR):
+        self.directorio = directorio
+        self._fd: Optional[int] = None
+
+    @property
+    def habilitado(self) -> bool:
+        return bool(self.directorio)
+
+    def es_cargador(self) -> bool:
+        if not self.habilitado or fcntl is None:
+            return True
+        if self._fd is not None:
+            return True
+
+        os.makedirs(self.directorio, exist_ok=True)
+        fd = os.open(os.path.join(self.directorio, _LOCK_CARGADOR), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        self._fd = fd
+        print(f">>> Este proceso ({os.getpid()}) es el cargador del snapshot compartido")
+        return True
+
+    def es_seguidor(self) -> bool:
+        return self.habilitado and not self.es_cargador()
+
+    def publicar(self, snap: Snapshot, derivados: Optional[Dict[str, Callable[[str], None]]] = None) -> None:
+        """
+        Escribe el snapshot para los demás workers, si todavía no está escrito,
+        junto con los `derivados` (ver guardar_snapshot) que leen en lugar de
+        armar cada uno los suyos.
+        """
+        if not self.habilitado:
+            return
+        if entrada_publicada(self.directorio) == nombre_entrada(snap.version):
+            return
+        guardar_snapshot(snap, self.directorio, derivados)
+
+    def adjuntar(self, actual: Optional[Snapshot], espera: float = 0) -> Optional[Snapshot]:
+        """
+        Devuelve la versión publicada si es distinta de `actual` (o None).
+        Si todavía no hay nada publicado, espera hasta `espera` segundos.
+        """
+        limite = time.monotonic() + espera
+
+        while True:
+            nombre = entrada_publicada(self.directorio)
+            if nombre is not None:
+                if actual is not None and nombre == nombre_entrada(actual.version):
+                    return None
+                snap = cargar_snapshot(directorio=self.directorio, mmap=True)
+                if snap is not None:
+                    return snap
+
+            if time.monotonic() >= limite:
+                return None
+            time.sleep(0.2)
@@ -0,0 +1,79 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# ============================================================
+# SINGLE-FLIGHT
+# ============================================================
+
+class _Vuelo:
+    def __init__(self):
+        self.listo = threading.Event()
+        self.resultado: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce llamadas concurrentes con la misma clave: la primera ejecuta
+    `fn` y las demás esperan ese mismo resultado (o excepción) en vez de
+    repetir el trabajo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._vuelos: Dict[Hashable, _Vuelo] = {}
+        self._stats = {"ejecuciones": 0, "compartidas": 0, "timeouts": 0}
+
+    def hacer(self, clave: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Ejecuta `fn` o se suma a la ejecución en curso para `clave`.
+        Quien se suma espera hasta `timeout` segundos (TimeoutError si no
+        llega); quien ejecuta siempre termina su llamada.
+        """
+        with self._lock:
+            vuelo = self._vuelos.get(clave)
+            lider = vuelo is None
+            if lider:
+                vuelo = self._vuelos[clave] = _Vuelo()
+                self._stats["ejecuciones"] += 1
+            else:
+                self._stats["compartidas"] += 1
+
+        if lider:
+            try:
+                vuelo.resultado = fn()
+            except BaseException as e:
+                vuelo.error = e
+            finally:
+                with self._lock:
+                    self._vuelos.pop(clave, None)
+                vuelo.listo.set()
+        else:
+            self._esperar_vuelo(vuelo, timeout)
+
+        if vuelo.error is not None:
+            raise vuelo.error
+        return vuelo.resultado
+
+    def _esperar_vuelo(self, vuelo: _Vuelo, timeout: Optional[float]) -> None:
+        if not vuelo.listo.wait(timeout):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise TimeoutError("Tiempo de espera agotado para la carga en curso")
+
+    def en_vuelo(self, clave: Hashable) -> bool:
+        with self._lock:
+            return clave in self._vuelos
+
+    def esperar(self, clave: Hashable, timeout: Optional[float] = None) -> None:
+        """
+        Espera a que termine la ejecución en curso para `clave`, si la hay.
+        """
+        with self._lock:
+            vuelo = self._vuelos.get(clave)
+        if vuelo is not None:
+            self._esperar_vuelo(vuelo, timeout)
+
+    def estadisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
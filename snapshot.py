@@ -0,0 +1,170 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+# Cada cuántos segundos se consulta la carpeta de Drive buscando un Excel nuevo.
+# Con 0 el refresco automático queda desactivado (solo manual vía /admin/reload).
+SNAPSHOT_REFRESH_SECONDS = float(os.getenv("SNAPSHOT_REFRESH_SECONDS", "60"))
+
+# ============================================================
+# SNAPSHOT INMUTABLE
+# ============================================================
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    Foto inmutable del stock: el dataframe ya normalizado más la
+    identificación del archivo de Drive del que salió.
+    Nunca se modifica después de publicarse; un Excel nuevo genera
+    un Snapshot nuevo que reemplaza al anterior de forma atómica.
+    """
+    df: pd.DataFrame
+    version: str
+    file_id: str
+    file_name: str
+    modified_time: str = ""
+    loaded_at: float = field(default_factory=time.time)
+    _derivados: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+    _lock: threading.RLock = field(default_factory=threading.RLock, repr=False, compare=False)
+
+    def derivado(self, nombre: str, builder: Callable[["Snapshot"], Any]) -> Any:
+        """
+        Devuelve una estructura derivada (índices, respuestas serializadas, etc.)
+        calculándola una sola vez por snapshot.
+        """
+        try:
+            return self._derivados[nombre]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if nombre not in self._derivados:
+                self._derivados[nombre] = builder(self)
+            return self._derivados[nombre]
+
+    def heredar(self, anterior: "Snapshot", cambios: Any) -> List[str]:
+        """
+        Reutiliza las estructuras derivadas de `anterior` que saben
+        actualizarse (método `parchear(df, cambios)`) en lugar de
+        reconstruirlas. Devuelve los nombres heredados.
+        """
+        heredados = []
+        with self._lock:
+            for nombre, valor in list(anterior._derivados.items()):
+                parchear = getattr(valor, "parchear", None)
+                if parchear is None or nombre in self._derivados:
+                    continue
+                nuevo = parchear(self.df, cambios)
+                if nuevo is not None:
+                    self._derivados[nombre] = nuevo
+                    heredados.append(nombre)
+        return heredados
+
+
+# ============================================================
+# CONTENEDOR DEL SNAPSHOT ACTUAL
+# ============================================================
+
+class SnapshotStore:
+    """
+    Guarda el snapshot vigente. Los handlers solo leen `actual()`;
+    el refresco publica uno nuevo con `publicar()`.
+    """
+
+    def __init__(self):
+        self._actual: Optional[Snapshot] = None
+        self._lock = threading.Lock()
+        self._al_publicar: List[Callable[[Snapshot], Any]] = []
+
+    def actual(self) -> Optional[Snapshot]:
+        return self._actual
+
+    def al_publicar(self, callback: Callable[[Snapshot], Any]) -> None:
+        """
+        Registra una función que se llama cada vez que cambia el snapshot
+        (por ejemplo, para vaciar cachés atadas a la versión anterior).
+        """
+        self._al_publicar.append(callback)
+
+    def publicar(self, snap: Snapshot) -> Snapshot:
+        with self._lock:
+            anterior = self._actual
+            self._actual = snap
+        print(f">>> Snapshot publicado: {snap.file_name} ({snap.version}), {len(snap.df)} filas")
+
+        if anterior is None or anterior.version != snap.version:
+            for callback in self._al_publicar:
+                try:
+                    callback(snap)
+                except Exception as e:
+                    print(">>> WARNING: error en callback de snapshot:", repr(e))
+        return snap
+
+
+snapshots = SnapshotStore()
+
+# ============================================================
+# REFRESCO EN SEGUNDO PLANO
+# ============================================================
+
+class SnapshotRefresher:
+    """
+    Hilo que ejecuta `refrescar` cada `intervalo` segundos o cuando
+    se lo pide explícitamente con `solicitar()`.
+    """
+
+    def __init__(self, refrescar: Callable[[], Any], intervalo: float = SNAPSHOT_REFRESH_SECONDS):
+        self._refrescar = refrescar
+        self.intervalo = intervalo
+        self._pedido = threading.Event()
+        self._detener = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.ultimo_refresco: Optional[float] = None
+        self.ultimo_error: Optional[str] = None
+
+    def ejecutar(self) -> None:
+        """
+        Corre un refresco ahora mismo en el hilo actual.
+        Dos refrescos nunca se ejecutan en paralelo.
+        """
+        with self._lock:
+            try:
+                self._refrescar()
+                self.ultimo_error = None
+            except Exception as e:
+                self.ultimo_error = repr(e)
+                print(">>> ERROR en refresco de snapshot:", repr(e))
+            finally:
+                self.ultimo_refresco = time.time()
+
+    def solicitar(self) -> None:
+        self._pedido.set()
+
+    def iniciar(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._detener.clear()
+        self._thread = threading.Thread(target=self._loop, name="snapshot-refresher", daemon=True)
+        self._thread.start()
+
+    def detener(self) -> None:
+        self._detener.set()
+        self._pedido.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def _loop(self) -> None:
+        while not self._detener.is_set():
+            self.ejecutar()
+            self._pedido.wait(self.intervalo if self.intervalo > 0 else None)
+            self._pedido.clear()
@@ -0,0 +1,285 @@
+import os
+import json
+import shutil
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from snapshot import Snapshot
+from stock_schema import compactar
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+# Carpeta local donde se persiste el último snapshot en formato columnar.
+# Con SNAPSHOT_CACHE_DIR vacío la caché en disco queda desactivada.
+SNAPSHOT_CACHE_DIR = os.getenv(
+    "SNAPSHOT_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "stock-snapshot"),
+)
+
+_PUNTERO = "CURRENT"
+_META = "meta.json"
+_DERIVADOS = "derivados"
+_DATOS_ARRAYS = "datos.json"
+
+# ============================================================
+# SERIALIZACIÓN DE COLUMNAS
+# ============================================================
+
+def _valor_json(v: Any) -> Any:
+    if isinstance(v, np.generic):
+        v = v.item()
+    if v is None or isinstance(v, (str, bool, int, float)):
+        return v
+    return str(v)
+
+
+def _escribir_columna(serie: pd.Series, ruta: str) -> Dict[str, Any]:
+    """
+    Columnas numéricas: el array tal cual.
+    Categóricas: sus códigos tal cual más la tabla de categorías.
+    Columnas de texto/objeto: códigos int32 más la tabla de valores distintos.
+    """
+    if serie.dtype.kind in "biuf":
+        np.save(ruta, serie.to_numpy(), allow_pickle=False)
+        return {"tipo": "numerico"}
+
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        np.save(ruta, serie.cat.codes.to_numpy(), allow_pickle=False)
+        return {"tipo": "categoria", "valores": [_valor_json(v) for v in serie.cat.categories]}
+
+    codes, uniques = pd.factorize(serie, use_na_sentinel=True)
+    np.save(ruta, codes.astype(np.int32), allow_pickle=False)
+    return {"tipo": "texto", "valores": [_valor_json(v) for v in uniques]}
+
+
+def _leer_columna(info: Dict[str, Any], ruta: str, mmap: bool = False) -> Any:
+    datos = np.load(ruta, mmap_mode="r" if mmap else None, allow_pickle=False)
+
+    if info["tipo"] == "numerico":
+        return datos
+
+    if info["tipo"] == "categoria":
+        # Los códigos no se copian: con mmap quedan compartidos entre procesos
+        tipo = pd.CategoricalDtype(pd.Index(info["valores"], dtype=object))
+        return pd.Categorical.from_codes(datos, dtype=tipo, validate=False)
+
+    valores = info["valores"]
+    # El último lugar de la tabla es NaN: los códigos -1 (faltantes) caen ahí.
+    tabla = np.empty(len(valores) + 1, dtype=object)
+    tabla[:len(valores)] = valores
+    tabla[len(valores)] = np.nan
+    return tabla[datos]
+
+
+def nombre_entrada(version: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in version)
+
+# ============================================================
+# GUARDAR / CARGAR
+# ============================================================
+
+def guardar_snapshot(snap: Snapshot, directorio: str = SNAPSHOT_CACHE_DIR,
+                     derivados: Optional[Dict[str, Callable[[str], None]]] = None) -> Optional[str]:
+    """
+    Persiste el dataframe del snapshot en `directorio`.
+    Se escribe en una carpeta temporal y se publica con un rename atómico,
+    así un proceso que arranca nunca lee una entrada a medio escribir.
+    `derivados` ({nombre: escribir(carpeta)}) se escriben dentro de la
+    entrada antes de publicarla: quien la lee ya los encuentra.
+    """
+    if not directorio:
+        return None
+
+    os.makedirs(directorio, exist_ok=True)
+    nombre = nombre_entrada(snap.version)
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=directorio)
+
+    try:
+        columnas: List[Dict[str, Any]] = []
+        for i, col in enumerate(snap.df.columns):
+            archivo = f"{i}.npy"
+            info = _escribir_columna(snap.df[col], os.path.join(tmp, archivo))
+            info.update({"nombre": col, "archivo": archivo})
+            columnas.append(info)
+
+        meta = {
+            "version": snap.version,
+            "file_id": snap.file_id,
+            "file_name": snap.file_name,
+            "modified_time": snap.modified_time,
+            "filas": len(snap.df),
+            "columnas": columnas,
+        }
+        with open(os.path.join(tmp, _META), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        for nombre_derivado, escribir in (derivados or {}).items():
+            carpeta = os.path.join(tmp, _DERIVADOS, nombre_derivado)
+            os.makedirs(carpeta)
+            try:
+                escribir(carpeta)
+            except Exception as e:
+                # Sin el derivado, quien lea la entrada lo reconstruye
+                shutil.rmtree(carpeta, ignore_errors=True)
+                print(f">>> WARNING: no se pudo guardar {nombre_derivado} junto al snapshot:", repr(e))
+
+        destino = os.path.join(directorio, nombre)
+        if os.path.exists(destino):
+            shutil.rmtree(destino, ignore_errors=True)
+        os.rename(tmp, destino)
+
+        puntero_tmp = os.path.join(directorio, f".{_PUNTERO}.tmp")
+        with open(puntero_tmp, "w", encoding="utf-8") as f:
+            f.write(nombre)
+        os.replace(puntero_tmp, os.path.join(directorio, _PUNTERO))
+
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    # Solo se conserva la última entrada
+    for entrada in os.listdir(directorio):
+        ruta = os.path.join(directorio, entrada)
+        if entrada != nombre and os.path.isdir(ruta) and not entrada.startswith(".tmp-"):
+            shutil.rmtree(ruta, ignore_errors=True)
+
+    print(f">>> Snapshot guardado en caché local: {destino}")
+    return destino
+
+
+def entrada_publicada(directorio: str = SNAPSHOT_CACHE_DIR) -> Optional[str]:
+    """
+    Nombre de la última entrada publicada en `directorio` (sin leerla).
+    """
+    try:
+        with open(os.path.join(directorio, _PUNTERO), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def cargar_snapshot(version: Optional[str] = None,
+                    directorio: str = SNAPSHOT_CACHE_DIR,
+                    mmap: bool = False) -> Optional[Snapshot]:
+    """
+    Carga el último snapshot persistido. Si se indica `version`, solo lo
+    devuelve cuando coincide (file id + modifiedTime); si no, devuelve None.
+    Con `mmap` las columnas numéricas quedan mapeadas desde el archivo, sin
+    copiarlas a la memoria del proceso.
+    """
+    if not directorio:
+        return None
+
+    nombre = entrada_publicada(directorio)
+    if nombre is None:
+        return None
+
+    try:
+        base = os.path.join(directorio, nombre)
+        with open(os.path.join(base, _META), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if version is not None and meta.get("version") != version:
+        return None
+
+    t0 = time.perf_counter()
+    try:
+        datos = {
+            info["nombre"]: _leer_columna(info, os.path.join(base, info["archivo"]), mmap)
+            for info in meta["columnas"]
+        }
+    except (OSError, ValueError, KeyError) as e:
+        print(">>> WARNING: caché de snapshot ilegible:", repr(e))
+        return None
+
+    # Las entradas guardadas antes del esquema compacto se convierten al leerlas
+    df = compactar(pd.DataFrame(datos, columns=[info["nombre"] for info in meta["columnas"]], copy=not mmap))
+    print(f">>> Snapshot leído de caché local en {time.perf_counter() - t0:.3f}s ({len(df)} filas)")
+
+    return Snapshot(
+        df=df,
+        version=meta["version"],
+        file_id=meta.get("file_id", ""),
+        file_name=meta.get("file_name", ""),
+        modified_time=meta.get("modified_time", ""),
+    )
+
+# ============================================================
+# ESTRUCTURAS DERIVADAS JUNTO AL SNAPSHOT
+# ============================================================
+
+def ruta_derivado(version: str, nombre: str, directorio: str = SNAPSHOT_CACHE_DIR) -> Optional[str]:
+    """
+    Carpeta de una estructura derivada (por ejemplo el índice de búsqueda)
+    guardada junto a la entrada de `version`, si existe.
+    """
+    if not directorio:
+        return None
+    ruta = os.path.join(directorio, nombre_entrada(version), _DERIVADOS, nombre)
+    return ruta if os.path.isdir(ruta) else None
+
+
+def guardar_derivado(version: str, nombre: str, escribir: Callable[[str], None],
+                     directorio: str = SNAPSHOT_CACHE_DIR) -> Optional[str]:
+    """
+    Guarda una estructura derivada dentro de la entrada de `version`:
+    `escribir(carpeta)` escribe en una carpeta temporal que después se
+    publica con un rename. Si la entrada no existe (otra versión, caché
+    desactivada) no hace nada.
+    """
+    if not directorio:
+        return None
+    entrada = os.path.join(directorio, nombre_entrada(version))
+    if not os.path.isdir(entrada):
+        return None
+
+    base = os.path.join(entrada, _DERIVADOS)
+    os.makedirs(base, exist_ok=True)
+    destino = os.path.join(base, nombre)
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=base)
+
+    try:
+        escribir(tmp)
+        os.rename(tmp, destino)
+    except OSError:
+        # Otro proceso lo publicó primero
+        shutil.rmtree(tmp, ignore_errors=True)
+        return destino if os.path.isdir(destino) else None
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return destino
+
+
+def guardar_arrays(carpeta: str, arrays: Dict[str, np.ndarray], datos: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Escribe cada array como <nombre>.npy y `datos` (tablas de textos,
+    tamaños) en JSON, para leerlos con cargar_arrays.
+    """
+    for nombre, array in arrays.items():
+        np.save(os.path.join(carpeta, f"{nombre}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+    with open(os.path.join(carpeta, _DATOS_ARRAYS), "w", encoding="utf-8") as f:
+        json.dump({"arrays": list(arrays), "datos": datos or {}}, f, ensure_ascii=False)
+
+
+def cargar_arrays(carpeta: str, mmap: bool = True) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Arrays y datos escritos con guardar_arrays. Con `mmap` los arrays quedan
+    mapeados (solo lectura): los procesos que leen la misma carpeta
+    comparten esas páginas en lugar de tener cada uno su copia.
+    """
+    with open(os.path.join(carpeta, _DATOS_ARRAYS), encoding="utf-8") as f:
+        meta = json.load(f)
+    arrays = {
+        nombre: np.load(os.path.join(carpeta, f"{nombre}.npy"), mmap_mode="r" if mmap else None, allow_pickle=False)
+        for nombre in meta["arrays"]
+    }
+    return arrays, meta["datos"]
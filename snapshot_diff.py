@@ -0,0 +1,155 @@
+import os
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from stock_schema import como_texto
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+# Por encima de esta fracción de filas cambiadas se reconstruye todo
+SNAPSHOT_DIFF_MAX_RATIO = float(os.getenv("SNAPSHOT_DIFF_MAX_RATIO", "0.1"))
+
+CLAVE = ["Artículo", "Color", "Talle"]
+COLUMNAS_VALOR = ["Cantidad", "LISTA1", "Valorizado LISTA1"]
+COLUMNAS_DESCRIPTIVAS = ["Marca", "Rubro", "Descripción"]
+
+# ============================================================
+# CONJUNTO DE CAMBIOS
+# ============================================================
+
+@dataclass(frozen=True)
+class CambiosSnapshot:
+    """
+    Diferencias entre dos snapshots por clave (Artículo, Color, Talle).
+    - agregadas: posiciones en el df nuevo sin clave en el viejo.
+    - eliminadas: posiciones en el df viejo sin clave en el nuevo.
+    - actualizadas: posiciones en el df nuevo cuya fila cambió.
+    - mismo_orden: las claves comunes están en las mismas posiciones.
+    - solo_valores: las filas actualizadas solo cambiaron Cantidad/precios.
+    """
+    agregadas: np.ndarray
+    eliminadas: np.ndarray
+    actualizadas: np.ndarray
+    mismo_orden: bool
+    solo_valores: bool
+    filas: int
+
+    @property
+    def total(self) -> int:
+        return len(self.agregadas) + len(self.eliminadas) + len(self.actualizadas)
+
+    def parcheable(self, max_ratio: float = SNAPSHOT_DIFF_MAX_RATIO) -> bool:
+        """
+        Se puede parchear en lugar de reconstruir: misma estructura de filas,
+        solo cambiaron valores numéricos y el cambio es chico.
+        """
+        return (
+            len(self.agregadas) == 0
+            and len(self.eliminadas) == 0
+            and self.mismo_orden
+            and self.solo_valores
+            and len(self.actualizadas) <= max_ratio * max(self.filas, 1)
+        )
+
+    def resumen(self) -> str:
+        return (
+            f"{len(self.agregadas)} agregadas, {len(self.eliminadas)} eliminadas, "
+            f"{len(self.actualizadas)} actualizadas de {self.filas}"
+        )
+
+# ============================================================
+# DIFF
+# ============================================================
+
+def _codigos(serie: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(), serie.cat.categories
+    codigos, valores = pd.factorize(serie.to_numpy(dtype=object))
+    return codigos, pd.Index(valores, dtype=object)
+
+
+def _codigos_comunes(viejo: pd.Series, nuevo: pd.Series) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Códigos de una columna de los dos snapshots sobre una misma tabla de
+    valores (los faltantes quedan en -1). Con categóricas solo se cruzan las
+    tablas de categorías, no las filas.
+    """
+    cv, valores_v = _codigos(viejo)
+    cn, valores_n = _codigos(nuevo)
+    tabla = valores_n.append(valores_v).unique()
+    mapa_v = np.append(tabla.get_indexer(valores_v), -1)
+    mapa_n = np.append(tabla.get_indexer(valores_n), -1)
+    return mapa_v[cv], mapa_n[cn], len(tabla)
+
+
+def _claves(viejo: pd.DataFrame, nuevo: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Clave (Artículo, Color, Talle) de cada fila como un entero, combinando
+    los códigos comunes de las tres columnas. Si no entra en 63 bits se usa
+    el texto de las tres.
+    """
+    codigos = [_codigos_comunes(viejo[c], nuevo[c]) for c in CLAVE]
+    if np.prod([float(n + 1) for _, _, n in codigos]) >= 2 ** 62:
+        return _claves_texto(viejo), _claves_texto(nuevo)
+
+    claves_v = np.zeros(len(viejo), dtype=np.int64)
+    claves_n = np.zeros(len(nuevo), dtype=np.int64)
+    for cv, cn, n in codigos:
+        # El faltante es un valor más (n), como "nan" en astype(str)
+        claves_v = claves_v * (n + 1) + np.where(cv >= 0, cv, n)
+        claves_n = claves_n * (n + 1) + np.where(cn >= 0, cn, n)
+    return claves_v, claves_n
+
+
+def _claves_texto(df: pd.DataFrame) -> np.ndarray:
+    partes = [como_texto(df[c]) for c in CLAVE]
+    return partes[0] + "\x1f" + partes[1] + "\x1f" + partes[2]
+
+
+def _distintos(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # Dos faltantes se consideran iguales
+    return (a != b) & ~(pd.isna(a) & pd.isna(b))
+
+
+def diferencias(viejo: pd.DataFrame, nuevo: pd.DataFrame) -> Optional[CambiosSnapshot]:
+    """
+    Calcula el conjunto de cambios entre dos dataframes de stock. Devuelve
+    None si la clave no es única en alguno de los dos (no se puede alinear).
+    """
+    claves_v, claves_n = _claves(viejo, nuevo)
+    claves_viejo = pd.Index(claves_v)
+    claves_nuevo = pd.Index(claves_n)
+    if not claves_viejo.is_unique or not claves_nuevo.is_unique:
+        return None
+
+    en_viejo = claves_viejo.get_indexer(claves_nuevo)
+    comunes = np.flatnonzero(en_viejo >= 0)
+    origen = en_viejo[comunes]
+
+    agregadas = np.flatnonzero(en_viejo < 0)
+    presentes = np.zeros(len(viejo), dtype=bool)
+    presentes[origen] = True
+    eliminadas = np.flatnonzero(~presentes)
+
+    cambio_valor = np.zeros(len(comunes), dtype=bool)
+    for col in COLUMNAS_VALOR:
+        cambio_valor |= _distintos(viejo[col].to_numpy()[origen], nuevo[col].to_numpy()[comunes])
+
+    cambio_texto = np.zeros(len(comunes), dtype=bool)
+    for col in COLUMNAS_DESCRIPTIVAS:
+        cv, cn, _ = _codigos_comunes(viejo[col], nuevo[col])
+        cambio_texto |= cv[origen] != cn[comunes]
+
+    return CambiosSnapshot(
+        agregadas=agregadas,
+        eliminadas=eliminadas,
+        actualizadas=comunes[cambio_valor | cambio_texto],
+        mismo_orden=bool(np.array_equal(origen, comunes)),
+        solo_valores=not cambio_texto.any(),
+        filas=len(nuevo),
+    )
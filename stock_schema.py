@@ -0,0 +1,154 @@
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# ESQUEMA COMPACTO DEL SNAPSHOT
+# ============================================================
+
+# Texto repetido: categóricas con la tabla de valores ordenada
+COLUMNAS_CATEGORICAS = ["Marca", "Rubro", "Artículo", "Descripción", "Color", "Talle"]
+# Cantidades: int32 (los faltantes cuentan como 0, igual que en el resto del código)
+COLUMNAS_CANTIDAD = ["Cantidad"]
+# Precios: float64 (los faltantes quedan como NaN)
+COLUMNAS_PRECIO = ["LISTA1", "Valorizado LISTA1"]
+
+_INT32 = np.iinfo(np.int32)
+
+
+def _es_categorica_compacta(serie: pd.Series) -> bool:
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        return False
+    categorias = serie.cat.categories
+    return categorias.dtype == object and categorias.is_monotonic_increasing
+
+
+def _categorica(serie: pd.Series) -> pd.Series:
+    """
+    Columna como categórica de strings con las categorías ordenadas, así el
+    orden de los códigos es el orden de los textos. Valores que dan el mismo
+    texto (40 y "40") quedan en la misma categoría; los faltantes, código -1.
+    """
+    if _es_categorica_compacta(serie):
+        return serie
+
+    codigos, valores = pd.factorize(serie.to_numpy(dtype=object))
+    textos = np.array([str(v) for v in valores], dtype=object)
+    categorias, inversa = np.unique(textos, return_inverse=True)
+    codigos = np.where(codigos >= 0, inversa[codigos] if len(inversa) else codigos, -1)
+
+    categorica = pd.Categorical.from_codes(codigos, dtype=pd.CategoricalDtype(pd.Index(categorias, dtype=object)))
+    return pd.Series(categorica, index=serie.index, name=serie.name)
+
+
+def _cantidad(serie: pd.Series) -> pd.Series:
+    if serie.dtype == np.int32:
+        return serie
+    numeros = pd.to_numeric(serie, errors="coerce").fillna(0)
+    valores = numeros.to_numpy(dtype=float)
+    # Cantidades con decimales o fuera de rango se dejan como están
+    if len(valores) and (
+        not np.array_equal(valores, np.floor(valores))
+        or valores.min() < _INT32.min or valores.max() > _INT32.max
+    ):
+        return numeros
+    return numeros.astype(np.int32)
+
+
+def _precio(serie: pd.Series) -> pd.Series:
+    if serie.dtype == np.float64:
+        return serie
+    return pd.to_numeric(serie, errors="coerce").astype(np.float64)
+
+
+def compactar(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    El dataframe de stock con el esquema compacto: texto repetido como
+    categóricas (códigos int8/16/32 + tabla de strings ordenada), cantidades
+    int32 y precios float64. Las columnas que ya lo cumplen no se copian.
+    """
+    columnas = {}
+    for col in df.columns:
+        serie = df[col]
+        if col in COLUMNAS_CATEGORICAS:
+            serie = _categorica(serie)
+        elif col in COLUMNAS_CANTIDAD:
+            serie = _cantidad(serie)
+        elif col in COLUMNAS_PRECIO:
+            serie = _precio(serie)
+        columnas[col] = serie
+    return pd.DataFrame(columnas, index=df.index, columns=df.columns, copy=False)
+
+
+def memoria_por_columna(df: pd.DataFrame) -> Dict[str, int]:
+    """
+    Bytes por columna (incluida la tabla de strings de las categóricas).
+    """
+    return {str(col): int(df[col].memory_usage(deep=True, index=False)) for col in df.columns}
+
+
+def describir_memoria(df: pd.DataFrame) -> str:
+    memoria = memoria_por_columna(df)
+    detalle = ", ".join(f"{col} {b / 1e6:.1f}MB" for col, b in memoria.items())
+    return f"{sum(memoria.values()) / 1e6:.1f}MB ({detalle})"
+
+# ============================================================
+# LECTURA POR CÓDIGOS
+# ============================================================
+
+def codigos_texto(serie: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (códigos, textos) tales que textos[códigos] == serie.astype(str): los
+    faltantes apuntan al último texto, "nan". Con una categórica no se
+    recorren las filas, solo la tabla de categorías.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos = serie.cat.codes.to_numpy()
+        valores = serie.cat.categories
+    else:
+        codigos, valores = pd.factorize(serie.to_numpy(dtype=object))
+
+    textos = np.empty(len(valores) + 1, dtype=object)
+    textos[:len(valores)] = [str(v) for v in valores]
+    textos[len(valores)] = "nan"
+    return np.where(codigos >= 0, codigos, len(valores)), textos
+
+
+def como_texto(serie: pd.Series, posiciones: Optional[np.ndarray] = None,
+               faltante: str = "nan") -> np.ndarray:
+    """
+    Los valores de la columna como strings (en `posiciones`, si se pasan),
+    con `faltante` en lugar de los nulos.
+    """
+    codigos, textos = codigos_texto(serie)
+    textos[-1] = faltante
+    return textos[codigos if posiciones is None else codigos[posiciones]]
+
+
+def texto_categorico(serie: pd.Series) -> pd.Series:
+    """
+    Equivalente a serie.astype(str) pero sin materializar un string por fila:
+    una categórica cuyos faltantes pasan a la categoría "nan".
+    """
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.astype(str)
+    if not serie.isna().any():
+        return serie
+    if "nan" not in serie.cat.categories:
+        serie = serie.cat.add_categories(["nan"])
+    return serie.fillna("nan")
+
+
+def como_numero(serie: pd.Series) -> np.ndarray:
+    """
+    pd.to_numeric(errors="coerce") como float, convirtiendo cada categoría
+    una sola vez.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        tabla = np.append(
+            pd.to_numeric(pd.Series(serie.cat.categories, dtype=object), errors="coerce").to_numpy(dtype=float),
+            np.nan,
+        )
+        return tabla[serie.cat.codes.to_numpy()]
+    return pd.to_numeric(serie, errors="coerce").to_numpy(dtype=float)
@@ -0,0 +1,137 @@
+"""
+/query como era antes de la tabla de artículos, para comparar: filtros
+sobre el dataframe y df.groupby(["Artículo", "Descripción"]) armando
+ItemResponse/TalleItem validados.
+"""
+import random
+from typing import List
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import JSONResponse
+
+import main
+from benchmarks.synthetic import ConfigSintetica, generar_filas
+from excel_reader import COLUMNAS_STOCK
+
+
+def filtrar(df: pd.DataFrame, filtros: dict) -> pd.DataFrame:
+    df2 = df.copy()
+
+    if filtros.get("marca"):
+        df2 = df2[df2["Marca"] == filtros["marca"]]
+
+    if filtros.get("rubro"):
+        df2 = df2[df2["Rubro"] == filtros["rubro"]]
+
+    if filtros.get("talleDesde") is not None or filtros.get("talleHasta") is not None:
+        df2["__talle_num"] = pd.to_numeric(df2["Talle"], errors="coerce")
+
+        if filtros.get("talleDesde") is not None:
+            df2 = df2[df2["__talle_num"] >= filtros["talleDesde"]]
+
+        if filtros.get("talleHasta") is not None:
+            df2 = df2[df2["__talle_num"] <= filtros["talleHasta"]]
+
+    return df2
+
+
+def agrupar(df2: pd.DataFrame) -> List[main.ItemResponse]:
+    items = []
+
+    for (codigo, descripcion), grupo in df2.groupby(["Artículo", "Descripción"]):
+        cantidades = pd.to_numeric(grupo["Cantidad"], errors="coerce").fillna(0).astype(int)
+        precios = pd.to_numeric(grupo["LISTA1"], errors="coerce").fillna(0).astype(float)
+
+        talles = [
+            main.TalleItem(talle=str(t), stock=int(s))
+            for t, s in zip(grupo["Talle"], cantidades)
+        ]
+
+        valorizado = float((cantidades * precios).sum())
+        precio_ref = float(precios.iloc[0]) if len(set(precios.tolist())) == 1 else 0.0
+
+        items.append(
+            main.ItemResponse(
+                codigo=str(codigo),
+                descripcion=str(descripcion),
+                marca=str(grupo["Marca"].iloc[0]),
+                rubro=str(grupo["Rubro"].iloc[0]),
+                color=str(grupo["Color"].iloc[0]),
+                precio=precio_ref,
+                valorizado=valorizado,
+                talles=talles,
+            )
+        )
+
+    return items
+
+
+def procesar(df: pd.DataFrame, filtros: dict) -> List[main.ItemResponse]:
+    df2 = filtrar(df, filtros)
+
+    if df2.empty:
+        return []
+
+    question = (filtros.get("question") or "").strip().upper()
+
+    if question:
+        codigos = df2["Artículo"].astype(str).str.upper()
+        exact = df2[codigos == question]
+        if not exact.empty:
+            df2 = exact
+        else:
+            # /query busca la pregunta como texto literal
+            df2 = df2[df2["Descripción"].astype(str).str.upper().str.contains(question, na=False, regex=False)]
+
+    return agrupar(df2)
+
+
+def cuerpo(df: pd.DataFrame, filtros: dict, role: str) -> bytes:
+    items = procesar(df, filtros)
+    if role != "admin":
+        for item in items:
+            item.valorizado = 0.0
+    return JSONResponse(main.QueryResponse(items=items).model_dump(mode="json")).body
+
+# ============================================================
+# PLANILLAS DE PRUEBA
+# ============================================================
+
+def hoja(filas: int = 3000, seed: int = 1, nulos: float = 0.02) -> pd.DataFrame:
+    """
+    Planilla sintética como la leería pandas (columnas object), con una
+    fracción `nulos` de celdas vacías en cada columna.
+    """
+    datos = list(generar_filas(ConfigSintetica(filas=filas, seed=seed)))
+    df = pd.DataFrame(datos, columns=COLUMNAS_STOCK, dtype=object)
+    rnd = np.random.default_rng(seed)
+    for col in df.columns:
+        df.loc[rnd.random(len(df)) < nulos, col] = np.nan
+    return df
+
+
+def hoja_mixta(filas: int = 3000, seed: int = 1) -> pd.DataFrame:
+    """
+    Planilla con códigos y talles de tipos mezclados (enteros, floats y
+    strings, incluso 40 y "40" a la vez) y celdas vacías.
+    """
+    rnd = random.Random(seed)
+    codigos = [1005, "1005", 99, 1000, "A-12", "a-12", "B7", 7.5, "Ñandú", np.nan]
+    descripciones = ["ZAPATILLA RUNNING", "Remera dry fit", "BUZO", "buzo", np.nan, "GORRA 40"]
+    talles = [40, "40", 40.5, "M", "XL", 38, "38", np.nan, "U"]
+    filas_df = [
+        [
+            rnd.choice(["NIKE", "ADIDAS", "PUMA", np.nan]),
+            rnd.choice(["CALZADO", "CAMISETA", np.nan]),
+            rnd.choice(codigos),
+            rnd.choice(descripciones),
+            rnd.choice(["NEGRO", "AZUL", np.nan]),
+            rnd.choice(talles),
+            rnd.choice([rnd.randint(-2, 20), np.nan, "3"]),
+            rnd.choice([9999.0, 15999.5, np.nan, "abc"]),
+            np.nan,
+        ]
+        for _ in range(filas)
+    ]
+    return pd.DataFrame(filas_df, columns=COLUMNAS_STOCK, dtype=object)
@@ -0,0 +1,51 @@
+import pytest
+
+import referencia
+from article_table import TablaArticulos
+from facets import Facetas
+from query_response import items_de_tabla
+from stock_schema import compactar
+
+FILTROS = [
+    {},
+    {"marca": "NIKE"},
+    {"rubro": "CALZADO"},
+    {"marca": "PUMA", "rubro": "CAMISETA"},
+    {"talleDesde": 39},
+    {"talleDesde": 38, "talleHasta": 40},
+    {"talleHasta": 38},
+    {"marca": "MARCA INEXISTENTE"},
+]
+
+
+def _items(df, filtros):
+    tabla = TablaArticulos(df)
+    mascara = Facetas(df).mascara(filtros)
+    return items_de_tabla(tabla, mascara[tabla.orden])
+
+
+def _esperado(df, filtros):
+    return [item.model_dump(mode="json") for item in referencia.agrupar(referencia.filtrar(df, filtros))]
+
+
+@pytest.mark.parametrize("filtros", FILTROS)
+def test_items_igual_a_groupby_con_tipos_mezclados(filtros):
+    # Planilla tal como la lee pandas: códigos 1005 y "1005", talles 40 y "40"
+    df = referencia.hoja_mixta(filas=3000, seed=7)
+    assert _items(df, filtros) == _esperado(df, filtros)
+
+
+@pytest.mark.parametrize("filtros", FILTROS)
+def test_items_igual_a_groupby_con_esquema_compacto(filtros):
+    df = compactar(referencia.hoja_mixta(filas=3000, seed=11))
+    # groupby sobre categóricas arma también los grupos vacíos: la
+    # referencia corre sobre los mismos textos como object
+    crudo = df.astype(object)
+    assert _items(df, filtros) == _esperado(crudo, filtros)
+
+
+@pytest.mark.parametrize("filtros", FILTROS)
+def test_items_igual_a_groupby_con_nulos(filtros):
+    df = referencia.hoja(filas=4000, seed=3, nulos=0.05)
+    assert _items(df, filtros) == _esperado(df, filtros)
+    assert _items(compactar(df), filtros) == _esperado(df, filtros)
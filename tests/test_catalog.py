@@ -0,0 +1,29 @@
+import json
+
+import pytest
+
+import referencia
+from catalog import VARIANTE_ADMIN, VARIANTE_PUBLICA, construir_items, stream_catalogo
+from snapshot import Snapshot
+from stock_schema import compactar
+
+
+@pytest.fixture(scope="module", params=["nulos", "mixta"])
+def snap(request):
+    if request.param == "nulos":
+        df = referencia.hoja(filas=2000, seed=4, nulos=0.05)
+    else:
+        df = referencia.hoja_mixta(filas=2000, seed=4)
+    return Snapshot(df=compactar(df), version=f"test:{request.param}", file_id="test", file_name="test.xlsx")
+
+
+@pytest.mark.parametrize("variante", [VARIANTE_ADMIN, VARIANTE_PUBLICA])
+def test_stream_igual_a_catalogo_completo(snap, variante):
+    # Lotes chicos: las tablas de texto del snapshot se indexan por lote
+    esperado = construir_items(snap.df, variante)
+
+    lineas = b"".join(stream_catalogo(snap, variante, "ndjson", lote=7)).decode("utf-8").splitlines()
+    assert [json.loads(linea) for linea in lineas[1:]] == esperado
+
+    documento = json.loads(b"".join(stream_catalogo(snap, variante, "json", lote=7)))
+    assert documento["items"] == esperado
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import pytest
+
+from ai_openrouter import MENSAJE_RESPUESTA_INVALIDA, ClienteOpenRouter
+from benchmarks.openrouter_stub import iniciar_stub
+
+
+@pytest.fixture(scope="module")
+def stub():
+    servidor, url, registro = iniciar_stub(latencia=0.05)
+    yield url, registro
+    servidor.shutdown()
+
+
+def _correr(url, escenario, **opciones):
+    async def con_cliente():
+        cliente = ClienteOpenRouter(url=url, api_key="stub", **opciones)
+        try:
+            return await escenario(cliente)
+        finally:
+            await cliente.cerrar()
+    return asyncio.run(con_cliente())
+
+
+def _preguntar_todos(cliente, prompts):
+    return asyncio.gather(*(cliente.preguntar("system", p) for p in prompts))
+
+
+def test_identicos_simultaneos_una_llamada(stub):
+    url, registro = stub
+    registro.reiniciar()
+
+    respuestas = _correr(url, lambda c: _preguntar_todos(c, ["hola"] * 20))
+
+    assert set(respuestas) == {"eco: hola"}
+    assert len(registro.llamadas) == 1, registro.llamadas
+
+
+def test_repetido_sale_de_la_cache(stub):
+    url, registro = stub
+
+    async def escenario(cliente):
+        await cliente.preguntar("system", "cacheado")
+        registro.reiniciar()
+        respuestas = await _preguntar_todos(cliente, ["cacheado"] * 10)
+        return respuestas, cliente.estadisticas()["cache"]
+
+    respuestas, cache = _correr(url, escenario, ttl=60)
+
+    assert set(respuestas) == {"eco: cacheado"}
+    assert len(registro.llamadas) == 0
+    assert cache["aciertos"] == 10
+
+
+def test_entrada_vencida_es_fallo(stub):
+    url, registro = stub
+
+    async def escenario(cliente):
+        await cliente.preguntar("system", "vence")
+        time.sleep(0.15)
+        registro.reiniciar()
+        respuesta = await cliente.preguntar("system", "vence")
+        return respuesta, cliente.estadisticas()["cache"]
+
+    respuesta, cache = _correr(url, escenario, ttl=0.1)
+
+    assert respuesta == "eco: vence"
+    assert len(registro.llamadas) == 1
+    assert cache["aciertos"] == 0
+    assert cache["fallos"] == 2
+
+
+def test_concurrencia_acotada(stub):
+    url, registro = stub
+    registro.reiniciar()
+    distintos = [f"prompt {i}" for i in range(16)]
+
+    respuestas = _correr(url, lambda c: _preguntar_todos(c, distintos), max_concurrencia=3)
+
+    assert respuestas == [f"eco: {p}" for p in distintos]
+    assert len(registro.llamadas) == len(distintos)
+    assert registro.pico <= 3, registro.pico
+
+
+def test_errores_no_se_cachean(stub):
+    url, registro = stub
+    registro.reiniciar()
+
+    async def escenario(cliente):
+        return [await cliente.preguntar("system", "ERROR500") for _ in range(2)]
+
+    respuestas = _correr(url, escenario, ttl=60)
+
+    assert respuestas == [MENSAJE_RESPUESTA_INVALIDA] * 2
+    assert len(registro.llamadas) == 2
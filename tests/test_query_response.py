@@ -0,0 +1,46 @@
+import pytest
+
+import main
+import referencia
+from query_response import enmascarar, serializar_items
+from snapshot import Snapshot
+from stock_schema import compactar
+
+
+@pytest.fixture(scope="module")
+def planilla():
+    return referencia.hoja(filas=4000, seed=5)
+
+
+@pytest.fixture(scope="module")
+def snap(planilla):
+    return Snapshot(df=compactar(planilla), version="test:query", file_id="test", file_name="test.xlsx")
+
+
+def _filtros(planilla):
+    codigo = next(c for c in planilla["Artículo"] if isinstance(c, str))
+    de_nike = planilla.loc[planilla["Marca"] == "NIKE", "Artículo"].dropna().iloc[0]
+    return [
+        {},
+        {"marca": "NIKE"},
+        {"rubro": "CALZADO", "talleDesde": 38, "talleHasta": 42},
+        {"talleDesde": 40},
+        {"question": codigo},
+        {"question": de_nike.lower(), "marca": "NIKE"},
+        {"question": " running "},
+        {"question": "BUZO HOODIE", "rubro": "BUZO"},
+        {"question": "NO EXISTE"},
+        {"marca": "MARCA INEXISTENTE"},
+    ]
+
+
+@pytest.mark.parametrize("role", ["admin", "vendedor"])
+def test_cuerpo_igual_a_query_response(planilla, snap, role):
+    for filtros in _filtros(planilla):
+        items = main.procesar(snap, filtros)
+        if role != "admin":
+            items = enmascarar(items)
+        esperado = referencia.cuerpo(planilla, filtros, role)
+        assert serializar_items(items) == esperado, filtros
+        # Codificado en lotes chicos da el mismo cuerpo
+        assert serializar_items(items, lote=7) == esperado, filtros
@@ -0,0 +1,63 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import ConfigSintetica, generar_filas
+from query_phrases import normalizar
+from search_index import IndiceInvertido
+
+
+@pytest.fixture(scope="module")
+def textos():
+    # Mismo texto que indexa Indexer: las columnas de texto normalizadas
+    filas = generar_filas(ConfigSintetica(filas=3000, marcas=10, rubros=8, seed=7))
+    return [normalizar(" ".join(str(v) for v in fila[:6])) for fila in filas]
+
+
+@pytest.fixture(scope="module")
+def indice(textos):
+    return IndiceInvertido(textos)
+
+
+def _esperado(textos, palabras):
+    return [i for i, texto in enumerate(textos) if all(w in texto for w in palabras)]
+
+
+def _consultas(textos):
+    rnd = random.Random(3)
+    vocabulario = sorted({t for texto in textos for t in texto.split()})
+    consultas = [[t] for t in vocabulario]
+    # Palabras parciales: prefijos, sufijos y fragmentos de 1 a 6 letras
+    for token in rnd.sample(vocabulario, min(60, len(vocabulario))):
+        for largo in range(1, min(len(token), 6) + 1):
+            inicio = rnd.randint(0, len(token) - largo)
+            consultas.append([token[inicio:inicio + largo]])
+    # Varias palabras, completas y parciales, incluso de filas distintas
+    for _ in range(300):
+        texto = rnd.choice(textos).split()
+        palabras = rnd.sample(texto, rnd.randint(2, min(4, len(texto))))
+        consultas.append([p[:rnd.randint(1, len(p))] for p in palabras])
+    for a, b in itertools.islice(itertools.combinations(vocabulario, 2), 200):
+        consultas.append([a, b])
+    # Sin coincidencias
+    consultas += [["zzz"], ["nike", "qqqq"], ["xyzw"]]
+    return consultas
+
+
+def test_buscar_igual_a_substring(textos, indice):
+    for palabras in _consultas(textos):
+        assert indice.buscar(palabras).tolist() == _esperado(textos, palabras), palabras
+
+
+def test_palabras_repetidas_y_sin_palabras(textos, indice):
+    assert indice.buscar(["run", "run"]).tolist() == _esperado(textos, ["run"])
+    assert indice.buscar([]).tolist() == list(range(len(textos)))
+
+
+def test_guardar_y_cargar(tmp_path, textos, indice):
+    indice.guardar(str(tmp_path))
+    cargado = IndiceInvertido.cargar(str(tmp_path))
+    for palabras in _consultas(textos)[::7]:
+        assert np.array_equal(cargado.buscar(palabras), indice.buscar(palabras)), palabras
@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+import main
+from benchmarks.synthetic import ConfigSintetica, generar_xlsx
+from drive_service import FakeDriveClient, configurar_cliente
+from snapshot_cache import cargar_snapshot, guardar_snapshot
+
+
+class DriveLento(FakeDriveClient):
+    """
+    FakeDriveClient cuya descarga tarda, para que las cargas se solapen.
+    """
+
+    def __init__(self, demora: float):
+        super().__init__()
+        self.demora = demora
+
+    def descargar(self, file_id: str) -> bytes:
+        time.sleep(self.demora)
+        return super().descargar(file_id)
+
+
+@pytest.fixture
+def drive(tmp_path, monkeypatch):
+    # Caché en disco aislada: la versión siempre se baja de Drive
+    directorio = str(tmp_path)
+    monkeypatch.setattr(main, "cargar_snapshot", lambda version: cargar_snapshot(version, directorio=directorio))
+    monkeypatch.setattr(main, "guardar_snapshot", lambda snap: guardar_snapshot(snap, directorio=directorio))
+
+    cliente = DriveLento(demora=0.5)
+    cliente.agregar_archivo(
+        "stock-sf", "stock.xlsx", generar_xlsx(ConfigSintetica(filas=2000)),
+        modified_time="2099-01-01T00:00:00.000Z",
+    )
+    configurar_cliente(cliente)
+    yield cliente
+    configurar_cliente(None)
+
+
+def test_cargas_concurrentes_descargan_una_vez(drive):
+    n = 8
+    barrera = threading.Barrier(n)
+    resultados, errores = [], []
+
+    def cargar():
+        barrera.wait()
+        try:
+            resultados.append(main.refrescar_snapshot())
+        except Exception as e:
+            errores.append(e)
+
+    hilos = [threading.Thread(target=cargar) for _ in range(n)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    assert not errores
+    assert drive.estadisticas()["descargas"] == 1
+    assert len(resultados) == n
+    assert all(df is resultados[0] for df in resultados)
+    assert main.snapshots.actual().file_id == "stock-sf"
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+import referencia
+from article_table import TablaArticulos
+from snapshot import Snapshot
+from snapshot_diff import diferencias
+from stock_schema import compactar
+
+
+@pytest.fixture(scope="module")
+def planilla():
+    # Sin nulos en la clave (Artículo, Color, Talle), así el diff puede alinear
+    return referencia.hoja(filas=3000, seed=13, nulos=0.0)
+
+
+def _cambiar_valores(df: pd.DataFrame, filas: np.ndarray) -> pd.DataFrame:
+    nuevo = df.copy()
+    # Siempre distinta de la anterior, y a veces negativa
+    nuevo.loc[filas, "Cantidad"] = df.loc[filas, "Cantidad"].astype(int) - 1 - np.arange(len(filas)) % 30
+    # Algunos precios cambian en un solo talle: el precio de referencia pasa a 0
+    nuevo.loc[filas[::3], "LISTA1"] = 12345.5
+    nuevo["Valorizado LISTA1"] = nuevo["Cantidad"].astype(float) * nuevo["LISTA1"].astype(float)
+    return nuevo
+
+
+def _snapshot(df: pd.DataFrame, version: str) -> Snapshot:
+    return Snapshot(df=df, version=version, file_id="test", file_name="test.xlsx")
+
+
+def _assert_misma_tabla(tabla: TablaArticulos, esperada: TablaArticulos):
+    np.testing.assert_array_equal(tabla.orden, esperada.orden)
+    np.testing.assert_array_equal(tabla.cantidades, esperada.cantidades)
+    np.testing.assert_array_equal(tabla.precios, esperada.precios)
+    np.testing.assert_array_equal(tabla.valorizado, esperada.valorizado)
+    np.testing.assert_array_equal(tabla.precio_ref, esperada.precio_ref)
+
+    todas = np.ones(len(esperada.orden), dtype=bool)
+    algunas = np.arange(len(esperada.orden)) % 3 == 0
+    for seleccion in (todas, algunas):
+        assert list(tabla.articulos(seleccion)) == list(esperada.articulos(seleccion))
+
+
+def test_parche_de_valores_igual_a_tabla_nueva(planilla):
+    filas = np.arange(5, len(planilla), 40)
+    viejo = compactar(planilla)
+    nuevo = compactar(_cambiar_valores(planilla, filas))
+
+    cambios = diferencias(viejo, nuevo)
+    assert cambios.parcheable()
+    np.testing.assert_array_equal(cambios.actualizadas, filas)
+
+    parcheada = TablaArticulos(viejo).parchear(nuevo, cambios)
+    _assert_misma_tabla(parcheada, TablaArticulos(nuevo))
+
+
+def test_preparar_snapshot_hereda_la_tabla_parcheada(planilla):
+    filas = np.arange(0, len(planilla), 50)
+    anterior = main.preparar_snapshot(_snapshot(compactar(planilla), "test:v1"))
+    snap = main.preparar_snapshot(_snapshot(compactar(_cambiar_valores(planilla, filas)), "test:v2"), anterior)
+
+    tabla = main.tabla_articulos(snap)
+    # Heredada con parchear: comparte los textos con la tabla anterior
+    assert tabla.textos is main.tabla_articulos(anterior).textos
+    _assert_misma_tabla(tabla, TablaArticulos(snap.df))
+
+
+def test_filas_agregadas_y_eliminadas_se_reconstruyen(planilla):
+    eliminadas = np.arange(10, len(planilla), 97)
+    cambiadas = np.arange(3, len(planilla), 61)
+    cambiadas = cambiadas[~np.isin(cambiadas, eliminadas)]
+
+    agregadas = planilla.iloc[:25].copy()
+    agregadas["Artículo"] = [f"NUEVO{i:03d}" for i in range(len(agregadas))]
+
+    crudo = _cambiar_valores(planilla, cambiadas).drop(index=eliminadas)
+    crudo = pd.concat([crudo, agregadas], ignore_index=True)
+    viejo, nuevo = compactar(planilla), compactar(crudo)
+
+    cambios = diferencias(viejo, nuevo)
+    np.testing.assert_array_equal(cambios.eliminadas, eliminadas)
+    np.testing.assert_array_equal(cambios.agregadas, np.arange(len(crudo) - len(agregadas), len(crudo)))
+    posiciones = np.flatnonzero(~np.isin(np.arange(len(planilla)), eliminadas))
+    np.testing.assert_array_equal(cambios.actualizadas, np.searchsorted(posiciones, cambiadas))
+
+    assert not cambios.parcheable()
+    assert TablaArticulos(viejo).parchear(nuevo, cambios) is None
+
+    anterior = main.preparar_snapshot(_snapshot(viejo, "test:v1"))
+    snap = main.preparar_snapshot(_snapshot(nuevo, "test:v2"), anterior)
+    _assert_misma_tabla(main.tabla_articulos(snap), TablaArticulos(nuevo))
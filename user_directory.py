@@ -0,0 +1,213 @@
+import hashlib
+import hmac
+import os
+import secrets
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from singleflight import SingleFlight
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+# Cada cuántos segundos se vuelve a leer usuarios.json de Drive
+USERS_REFRESH_SECONDS = float(os.getenv("USERS_REFRESH_SECONDS", "300"))
+# Tras una lectura fallida, cuánto se espera antes de volver a intentar
+USERS_RETRY_SECONDS = float(os.getenv("USERS_RETRY_SECONDS", "30"))
+
+# Costo de PBKDF2-SHA256 por verificación. Hashes guardados con más
+# iteraciones que el máximo se rechazan, así un login nunca cuesta más.
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", "100000"))
+PASSWORD_HASH_MAX_ITERATIONS = int(os.getenv("PASSWORD_HASH_MAX_ITERATIONS", "300000"))
+
+_ALGORITMO = "pbkdf2_sha256"
+
+# ============================================================
+# HASH DE CONTRASEÑAS
+# ============================================================
+
+def hash_password(password: str, iteraciones: int = PASSWORD_HASH_ITERATIONS,
+                  salt: Optional[bytes] = None) -> str:
+    """
+    Hash con sal en formato "pbkdf2_sha256$<iteraciones>$<sal hex>$<hash hex>".
+    """
+    salt = salt if salt is not None else secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iteraciones)
+    return f"{_ALGORITMO}${iteraciones}${salt.hex()}${digest.hex()}"
+
+
+def _partes_hash(codificado: str) -> Optional[tuple]:
+    try:
+        algoritmo, iteraciones, salt, digest = codificado.split("$")
+        iteraciones = int(iteraciones)
+        if algoritmo != _ALGORITMO or not 0 < iteraciones <= PASSWORD_HASH_MAX_ITERATIONS:
+            return None
+        return iteraciones, bytes.fromhex(salt), bytes.fromhex(digest)
+    except (AttributeError, ValueError):
+        return None
+
+
+def verificar_password(password: str, codificado: str) -> bool:
+    partes = _partes_hash(codificado)
+    if partes is None:
+        return False
+    iteraciones, salt, esperado = partes
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iteraciones)
+    return hmac.compare_digest(digest, esperado)
+
+# ============================================================
+# DIRECTORIO DE USUARIOS EN MEMORIA
+# ============================================================
+
+class DirectorioUsuarios:
+    """
+    Usuarios de usuarios.json indexados por username, con las contraseñas
+    guardadas como hash con sal. El archivo puede traer la contraseña en
+    texto plano (se hashea al cargar) o ya hasheada con hash_password().
+
+    Los logins se resuelven en memoria; el archivo se vuelve a leer cada
+    `ttl` segundos en segundo plano, sin frenar a quien está entrando. Si la
+    lectura falla, no se reintenta hasta pasados `reintento` segundos.
+    """
+
+    def __init__(self, cargar: Callable[[], List[dict]], ttl: float = USERS_REFRESH_SECONDS,
+                 reintento: float = USERS_RETRY_SECONDS):
+        self._cargar = cargar
+        self.ttl = ttl
+        self.reintento = reintento
+        self._usuarios: Dict[str, Dict[str, str]] = {}
+        # username -> (huella de la contraseña en texto plano, hash): al
+        # releer el archivo no se vuelve a hashear lo que no cambió. La
+        # huella es un HMAC con una clave aleatoria que nunca sale del proceso
+        self._hashes: Dict[str, Tuple[bytes, str]] = {}
+        self._clave_huellas = secrets.token_bytes(32)
+        self._cargado_en: Optional[float] = None
+        self._fallo_en: Optional[float] = None
+        self._cargas = SingleFlight()
+        self._lock = threading.Lock()
+        # Se verifica contra este hash cuando el usuario no existe, para
+        # que la respuesta tarde lo mismo que con un usuario válido
+        self._hash_dummy = hash_password(secrets.token_hex(8))
+        self.ultimo_error: Optional[str] = None
+
+    @property
+    def cargado(self) -> bool:
+        return self._cargado_en is not None
+
+    def vigente(self) -> bool:
+        return self.cargado and time.monotonic() - self._cargado_en < self.ttl
+
+    def _en_espera(self) -> bool:
+        return self._fallo_en is not None and time.monotonic() - self._fallo_en < self.reintento
+
+    def _indexar(self, registros: List[dict]) -> Dict[str, Dict[str, str]]:
+        usuarios = {}
+        hashes = {}
+        for u in registros:
+            username = u.get("username")
+            password = u.get("password")
+            if not username or password is None:
+                continue
+            # Con usernames repetidos vale el primero, como en el login original
+            if str(username) in usuarios:
+                continue
+
+            password = str(password)
+            if password.startswith(_ALGORITMO + "$"):
+                if _partes_hash(password) is None:
+                    print(f">>> WARNING: hash inválido o demasiado costoso para {username!r}")
+                    continue
+                hashed = password
+            else:
+                huella = hmac.new(self._clave_huellas, password.encode("utf-8"), "sha256").digest()
+                previo = self._hashes.get(str(username))
+                if previo is not None and hmac.compare_digest(previo[0], huella):
+                    hashed = previo[1]
+                else:
+                    hashed = hash_password(password)
+                hashes[str(username)] = (huella, hashed)
+
+            usuarios[str(username)] = {"hash": hashed, "role": u.get("role")}
+        self._hashes = hashes
+        return usuarios
+
+    def _recargar(self) -> int:
+        try:
+            usuarios = self._indexar(self._cargar())
+        except Exception as e:
+            self._fallo_en = time.monotonic()
+            self.ultimo_error = repr(e)
+            raise
+        with self._lock:
+            self._usuarios = usuarios
+            self._cargado_en = time.monotonic()
+        self._fallo_en = None
+        self.ultimo_error = None
+        print(f">>> Usuarios cargados: {len(usuarios)}")
+        return len(usuarios)
+
+    def refrescar(self) -> int:
+        """
+        Vuelve a leer el archivo ahora. Las llamadas concurrentes comparten
+        la misma lectura.
+        """
+        return self._cargas.hacer("usuarios", self._recargar)
+
+    def _refrescar_silencioso(self) -> None:
+        try:
+            self.refrescar()
+        except Exception as e:
+            print(">>> WARNING: no se pudieron refrescar los usuarios:", repr(e))
+
+    def refrescar_en_segundo_plano(self) -> None:
+        if self._cargas.en_vuelo("usuarios"):
+            return
+        threading.Thread(target=self._refrescar_silencioso, name="usuarios-refresher", daemon=True).start()
+
+    def asegurar(self) -> None:
+        """
+        Si nunca se cargó, carga ahora (bloqueante, los errores se propagan).
+        Si está vencido, sigue sirviendo lo que hay y refresca de fondo.
+        Después de un intento fallido no hace nada hasta pasado `reintento`.
+        """
+        if self._en_espera():
+            if not self.cargado:
+                raise RuntimeError(f"usuarios no disponibles: {self.ultimo_error}")
+        elif not self.cargado:
+            self.refrescar()
+        elif not self.vigente():
+            self.refrescar_en_segundo_plano()
+
+    def verificar(self, username: Any, password: Any) -> Optional[Dict[str, str]]:
+        """
+        Devuelve {"username", "role"} si las credenciales son válidas.
+        Siempre calcula un hash, exista o no el usuario.
+        """
+        with self._lock:
+            usuario = self._usuarios.get(username) if isinstance(username, str) else None
+
+        valida = verificar_password(
+            password if isinstance(password, str) else "",
+            usuario["hash"] if usuario is not None else self._hash_dummy,
+        )
+        if usuario is None or not valida or not isinstance(password, str):
+            return None
+        return {"username": username, "role": usuario["role"]}
+
+    def estadisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            cantidad = len(self._usuarios)
+        return {
+            "usuarios": cantidad,
+            "vigente": self.vigente(),
+            "ultimo_error": self.ultimo_error,
+        }
+
+
+if __name__ == "__main__":
+    # Genera el hash para guardar en usuarios.json en lugar del texto plano
+    for p in sys.argv[1:]:
+        print(hash_password(p))